@@ -1,8 +1,13 @@
 import streamlit as st
 import pandas as pd
 from pathlib import Path
-from artifacts.inference import score_context, ACTIONS
+from artifacts.assets import AssetCache
+from artifacts.inference import ACTIONS
+from artifacts.score_cache import get_cache
 from artifacts.inference import META  # to access FEATURE_COLS
+from artifacts.posterior import posterior_context
+from artifacts.team_store import TeamWeekStore
+from artifacts.thresholds import go_thresholds
 FEATURE_COLS = META["feature_cols"]
 
 TEAM_ABBRS = [
@@ -13,53 +18,35 @@ TEAM_ABBRS = [
 
 st.set_page_config(page_title="4th-Down Decision Calculator", page_icon="🏈", layout="centered")
 APP_DIR = Path(__file__).parent
-logo_path = APP_DIR / "NFL.png"
+
+# images: pre-sized variants from `python artifacts/assets.py build`, held in memory across
+# reruns and sessions; the original file when a variant is missing
+@st.cache_resource(show_spinner=False)
+def load_assets() -> AssetCache:
+    return AssetCache(APP_DIR)
+
+ASSETS = load_assets()
 
 # display NFL logo at the top, centered
 c1, c2, c3 = st.columns([1, 1, 1])
 with c2:
-    st.image(str(logo_path), width=150)
+    nfl_logo = ASSETS.get("NFL.png")
+    if nfl_logo:
+        st.image(nfl_logo, width=150)
 
 # page title
 st.title("4th-Down Decision Calculator")
 
-# load decisions CSV once and pre-aggregate team-week features
-@st.cache_data(show_spinner=False)
-def load_team_week_features(path="data/decisions_2016_2024.csv") -> pd.DataFrame:
-    usecols = ["season","week","posteam","off_epa_4w","def_epa_4w",
-               "fg_pct_short","fg_pct_mid","fg_pct_long","punt_net_4w"]
-    df = pd.read_csv(path, usecols=usecols, low_memory=False)
-    df["season"] = pd.to_numeric(df["season"], errors="coerce").astype("Int64")
-    df["week"]   = pd.to_numeric(df["week"], errors="coerce").astype("Int64")
-    df["posteam"] = df["posteam"].astype(str).str.strip()
-
-    feats = (df.groupby(["season","week","posteam"], dropna=False)
-               [["off_epa_4w","def_epa_4w","fg_pct_short","fg_pct_mid","fg_pct_long","punt_net_4w"]]
-               .mean().reset_index())
-
-    feats = feats.fillna({
-        "off_epa_4w": 0.0, "def_epa_4w": 0.0,
-        "fg_pct_short": 0.88, "fg_pct_mid": 0.75, "fg_pct_long": 0.55, # historical averages if unknown
-        "punt_net_4w": 42.0
-    })
-    return feats
-
-TEAM_FEATS = load_team_week_features()
+# team-week metrics from the precomputed store (built from the decisions table if missing)
+@st.cache_resource(show_spinner=False)
+def load_team_store(path="data/decisions_2016_2024.csv") -> TeamWeekStore:
+    return TeamWeekStore.load_or_build(path)
+
+TEAM_STORE = load_team_store()
 
 def get_team_feats(season:int, week:int, team:str):
-    row = TEAM_FEATS[
-        (TEAM_FEATS["season"] == season) &
-        (TEAM_FEATS["week"] == week) &
-        (TEAM_FEATS["posteam"].str.upper() == team.upper())
-    ]
-    if row.empty:
-        return dict(off_epa_4w=0.0, def_epa_4w=0.0,
-                    fg_pct_short=0.88, fg_pct_mid=0.75, fg_pct_long=0.55,
-                    punt_net_4w=42.0)
-    r = row.iloc[0]
-    return dict(off_epa_4w=float(r.off_epa_4w), def_epa_4w=float(r.def_epa_4w),
-                fg_pct_short=float(r.fg_pct_short), fg_pct_mid=float(r.fg_pct_mid),
-                fg_pct_long=float(r.fg_pct_long), punt_net_4w=float(r.punt_net_4w))
+    # this team-week, else the team's latest earlier week, else league defaults
+    return TEAM_STORE.lookup(season, week, team)
 
 # venue map (roof/surface) by home team
 VENUE = {
@@ -103,12 +90,9 @@ def venue_defaults(home_team:str):
     return VENUE.get(ht, ("outdoors", "grass"))
 
 # for team logos
-LOGO_DIR = Path(__file__).parent / "team_logos"
-
 def team_logo(team: str):
-    """Return path to team logo if found, else None."""
-    path = LOGO_DIR / f"{team}.png"
-    return str(path) if path.exists() else None
+    """Return the team logo (100px variant bytes, else the file's path) if found, else None."""
+    return ASSETS.get(f"team_logos/{team}.png")
 
 # team full names
 TEAM_FULL_NAMES = {
@@ -187,17 +171,14 @@ def venue_defaults(home_team: str):
     v = STADIUMS.get(ht, {"name": "Unknown stadium", "roof": "outdoors", "surface": "grass"})
     return v["name"], v["roof"], v["surface"]
 
-STADIUMS_DIR = Path(__file__).parent / "team_stadiums"
-
 def stadium_image_path(team: str):
     """
-    Return path to the home stadium image for a team, or None if not found.
-    Expects files named like 'KC_HOME.png' in team_stadiums/.
+    Return the home stadium image for a team (column-width variant bytes, else the file's
+    path), or None if not found. Expects files named like 'KC_HOME.png' in team_stadiums/.
     """
     if not team:
         return None
-    p = STADIUMS_DIR / f"{team.upper()}_HOME.png"
-    return str(p) if p.exists() else None
+    return ASSETS.get(f"team_stadiums/{team.upper()}_HOME.png")
 
 # sidebar: objective
 with st.sidebar:
@@ -205,6 +186,10 @@ with st.sidebar:
     metric = "wpa" if st.radio(
         "Optimize for:", ["Win Probability (WPA)", "Expected Points (EPA)"]
     ).startswith("Win") else "epa"
+    policy = "linucb" if st.radio(
+        "Policy:", ["Greedy (best estimate)", "LinUCB (optimism bonus)"]
+    ).startswith("LinUCB") else "greedy"
+    alpha = st.slider("LinUCB α", 0.0, 3.0, 0.8, 0.1) if policy == "linucb" else 0.8
 
 # game info
 st.subheader("Game Info")
@@ -301,7 +286,7 @@ with c4:
     side = st.selectbox("Ball on", ["OWN side","OPP side"], index=1)
     yard_line = st.number_input("Yard line (1–49)", 1, 49, 48)
 with c5:
-    st.image("field_diagram.png", caption="Example: 48 yd line, enemy territory near midfield → 'OPP side', 48. 10 yd line, deep in own territory → 'OWN side', 10.", use_column_width=True)
+    st.image(ASSETS.get("field_diagram.png") or "field_diagram.png", caption="Example: 48 yd line, enemy territory near midfield → 'OPP side', 48. 10 yd line, deep in own territory → 'OWN side', 10.", use_column_width=True)
 
 # convert to yardline_100
 yardline_100 = (50 + yard_line) if side == "OWN side" else (50 - yard_line)
@@ -392,13 +377,31 @@ ctx.update({k: v for k, v in maybe.items() if k in FEATURE_COLS})
 kick_dist = int(17 + yardline_100)
 st.caption(f"Estimated FG distance from here: ~{kick_dist} yards.")
 
+# go/no-go boundary for this game state: longest yards-to-go that is still a GO, per yardline
+with st.expander("Go-for-it boundary (this situation, every yardline)", expanded=False):
+    bounds = go_thresholds(ctx, metric=metric)
+    chart = bounds.set_index("yardline_100")[["go_max_ytg", "break_even_ytg"]]
+    chart.index.name = "Yards to opponent end zone"
+    st.line_chart(chart.rename(columns={"go_max_ytg": "Go up to (yards to go)",
+                                        "break_even_ytg": "Break-even yards to go"}))
+    here = bounds.loc[bounds["yardline_100"] == yardline_100].iloc[0]
+    st.caption(f"From the {yardline_100}: GO up to 4th-and-{int(here['go_max_ytg'])}"
+               + (f", then {str(here['flips_to']).upper()}." if here["flips_to"] else "."))
+
 
-# recommend
+# recommend (memoized: both metrics come from one scoring, so toggling WPA/EPA never rescores)
+SCORES = get_cache()
 if st.button("Recommend decision"):
-    epa_scores, wpa_scores, rec, _ = score_context(ctx, metric=metric)
+    try:
+        epa_scores, wpa_scores, rec, details = SCORES.score_context(ctx, metric=metric, policy=policy, alpha=alpha)
+    except FileNotFoundError as e:   # LinUCB factors not exported yet
+        st.warning(f"LinUCB unavailable, falling back to greedy: {e}")
+        policy = "greedy"
+        epa_scores, wpa_scores, rec, details = SCORES.score_context(ctx, metric=metric)
 
-    # pick metric dict
-    scores = wpa_scores if metric == "wpa" else epa_scores
+    # pick metric dict (LinUCB ranks by the upper confidence bound); gains shown are always μ̂
+    mu = wpa_scores if metric == "wpa" else epa_scores
+    scores = details["linucb"]["ucb"] if policy == "linucb" else mu
 
     # filter out infeasible actions (masked in inference as huge negative)
     SENTINEL = -1e8  # must be > the mask used in inference (-1e9 there)
@@ -411,13 +414,15 @@ if st.button("Recommend decision"):
 
     # rank feasible only
     ranked = sorted(feasible.items(), key=lambda kv: kv[1], reverse=True)
-    best_action, best_val = ranked[0]
+    best_action = ranked[0][0]
+    best_val = mu[best_action]
 
     # build html for box 
     title_html = f"<h3 style='margin:0;'>Recommendation: <b>{best_action.upper()}</b> <i>(optimized for {metric.upper()})</i></h3>"
 
     if len(ranked) >= 2:
-        second_action, second_val = ranked[1]
+        second_action = ranked[1][0]
+        second_val = mu[second_action]
         if metric == "wpa":
             lead_html = (
                 f"<p><b>{best_action.upper()}</b> improves win probability by "
@@ -433,7 +438,8 @@ if st.button("Recommend decision"):
 
     # friendly bullets vs *each* alternative (feasible only)
     bullets = []
-    for a, v in ranked[1:]:
+    for a, _ in ranked[1:]:
+        v = mu[a]
         if metric == "wpa":
             bullets.append(f"{best_action.upper()} vs {a.upper()}: <b>{(best_val - v):.1%} WPA</b>")
         else:
@@ -442,7 +448,9 @@ if st.button("Recommend decision"):
     bullets_html = ""
     if bullets:
         bullets_html = (
-            "<p style='margin:0 0 4px 0; color:#555;'>Relative gains:</p>"
+            "<p style='margin:0 0 4px 0; color:#555;'>Relative gains"
+            + (" (model estimates; the pick adds LinUCB's exploration bonus)" if policy == "linucb" else "")
+            + ":</p>"
             "<ul style='margin-top:4px;'>" +
             "".join(f"<li>{b}</li>" for b in bullets) +
             "</ul>"
@@ -473,4 +481,31 @@ if st.button("Recommend decision"):
     </div>
     """
 
-    st.markdown(box_html, unsafe_allow_html=True)
\ No newline at end of file
+    st.markdown(box_html, unsafe_allow_html=True)
+
+    if policy == "linucb":
+        lin = details["linucb"]
+        st.table(pd.DataFrame(
+            {"μ̂": lin["mu"], "bonus": lin["bonus"], "UCB": lin["ucb"]}
+        ).loc[list(feasible)].rename(index=str.upper))
+
+    # how sure the models are: Ridge-arm posterior, when it was exported with the artifacts
+    try:
+        post = posterior_context(ctx, metric=metric)
+    except FileNotFoundError:
+        post = None
+        st.caption("Confidence table unavailable: these artifacts have no posterior arrays "
+                   "(run the save cells of the behavior notebooks, or serve a retrain.py split).")
+    if post is not None:
+        fmt = (lambda v: f"{v:+.1%}") if metric == "wpa" else (lambda v: f"{v:+.2f}")
+        rows = {}
+        for a in feasible:
+            row = {"P(best)": f"{post['p_best'][a]:.0%}"}
+            if a != best_action:
+                if f"{best_action}-{a}" in post["delta"]:
+                    mean, lo, hi = post["delta"][f"{best_action}-{a}"]
+                else:
+                    mean, hi, lo = (-v for v in post["delta"][f"{a}-{best_action}"])
+                row[f"{best_action.upper()} gain ({post['level']:.0%} interval)"] = f"{fmt(mean)} [{fmt(lo)}, {fmt(hi)}]"
+            rows[a.upper()] = row
+        st.table(pd.DataFrame(rows).T.fillna("—"))
@@ -0,0 +1,178 @@
+"""
+Pickle-free, memory-mappable artifact format.
+
+Every model parameter is stored as its own .npy file under artifacts/arrays/ and listed in
+the "arrays" section of metadata.json. np.load(mmap_mode="r") maps the files read-only, so
+forked workers share one copy through the page cache, and nothing depends on the sklearn
+version that trained the models.
+
+Arrays (K = len(actions), rows in `actions` order; d = preprocessed width):
+    pre_num_median, pre_num_mean, pre_num_scale          (n_num,)
+    pre_cat_fill (n_cat,) str, pre_cat_vocab (n_levels,) str, pre_cat_vocab_sizes (n_cat,)
+    arm_epa_coef, arm_wpa_coef                           (K, d)
+    arm_epa_intercept, arm_wpa_intercept                 (K,)
+    behavior_coef (K, d), behavior_intercept (K,)        multinomial logistic regression
+    linucb_{epa,wpa}_A_inv, linucb_{epa,wpa}_chol        (K, d, d), from the behavior notebooks
+    linucb_{epa,wpa}_lambda                              ()
+    linucb_{epa,wpa}_{gram,xty,xsum,rsum,n}              per-arm sufficient statistics (online.py)
+
+Export from the joblib artifacts:  python artifacts/array_store.py
+"""
+import json
+import os
+import numpy as np
+from pathlib import Path
+
+try:
+    from .fused import METRICS, extract_params, preprocessor_params
+    from .linucb import linucb_arrays, posterior_arrays
+except ImportError:  # run as a script from artifacts/
+    from fused import METRICS, extract_params, preprocessor_params
+    from linucb import linucb_arrays, posterior_arrays
+
+FORMAT_VERSION = 1
+ARRAY_DIR = "arrays"
+
+
+def _write_json_atomic(path: Path, obj) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(obj, f, indent=2)
+    os.replace(tmp, path)
+
+
+def _save_npy_atomic(path: Path, arr) -> None:
+    tmp = path.with_name(path.name + ".tmp.npy")
+    np.save(tmp, np.ascontiguousarray(arr))
+    os.replace(tmp, path)
+
+
+def write_arrays(art_dir, arrays: dict, preprocessor: dict = None) -> None:
+    """Write/replace arrays and record them in metadata.json (other entries are kept)."""
+    art_dir = Path(art_dir)
+    out = art_dir / ARRAY_DIR
+    out.mkdir(exist_ok=True)
+    meta_path = art_dir / "metadata.json"
+    meta = json.load(open(meta_path))
+    section = meta.get("arrays") or {"format": FORMAT_VERSION, "dir": ARRAY_DIR, "entries": {}}
+    for name, arr in arrays.items():
+        arr = np.asarray(arr)
+        _save_npy_atomic(out / f"{name}.npy", arr)
+        section["entries"][name] = {"shape": list(arr.shape), "dtype": arr.dtype.str}
+    if preprocessor is not None:
+        section["preprocessor"] = preprocessor
+    meta["arrays"] = section
+    _write_json_atomic(meta_path, meta)
+
+
+def load_arrays(art_dir, mmap: bool = True) -> dict:
+    """name -> ndarray for every entry in the manifest (read-only memory maps by default)."""
+    art_dir = Path(art_dir)
+    section = json.load(open(art_dir / "metadata.json")).get("arrays")
+    if not section:
+        raise FileNotFoundError(f"No 'arrays' manifest in {art_dir / 'metadata.json'}; "
+                                "run `python artifacts/array_store.py` first")
+    if section.get("format") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported array format {section.get('format')}")
+    d = art_dir / section["dir"]
+    return {name: np.load(d / f"{name}.npy", mmap_mode="r" if mmap else None, allow_pickle=False)
+            for name in section["entries"]}
+
+
+def params_from_arrays(arrays: dict, meta: dict) -> dict:
+    """Rebuild the extract_params() dict (see fused.py) from loaded arrays."""
+    pre = meta["arrays"]["preprocessor"]
+    flat = [str(v) for v in arrays["pre_cat_vocab"]]
+    vocab, i = [], 0
+    for n in arrays["pre_cat_vocab_sizes"]:
+        vocab.append(flat[i:i + int(n)])
+        i += int(n)
+    params = {
+        "actions": list(meta["actions"]),
+        "num_cols": list(pre["num_cols"]),
+        "num_median": arrays["pre_num_median"],
+        "num_mean": arrays["pre_num_mean"],
+        "num_scale": arrays["pre_num_scale"],
+        "cat_cols": list(pre["cat_cols"]),
+        "cat_fill": [str(v) for v in arrays["pre_cat_fill"]],
+        "cat_vocab": vocab,
+    }
+    for metric in METRICS:
+        params[f"arm_{metric}_coef"] = arrays[f"arm_{metric}_coef"]
+        params[f"arm_{metric}_intercept"] = arrays[f"arm_{metric}_intercept"]
+    return params
+
+
+def behavior_arrays(behavior, pre, actions) -> dict:
+    """Logistic-regression coefficients of the behavior pipeline, rows in `actions` order."""
+    lr = behavior.named_steps["logisticregression"]
+    beh_pre = behavior.named_steps["columntransformer"]
+    mine, theirs = preprocessor_params(pre), preprocessor_params(beh_pre)
+    for key in ("num_median", "num_mean", "num_scale"):
+        if not np.allclose(mine[key], theirs[key]):
+            raise ValueError("behavior policy was fit with a different preprocessor than preprocessor.joblib")
+    if mine["cat_vocab"] != theirs["cat_vocab"]:
+        raise ValueError("behavior policy was fit with different category vocabularies")
+    classes = [str(c) for c in lr.classes_]
+    if len(classes) < 3:
+        raise ValueError("expected a multinomial behavior policy with one row per action")
+    order = [classes.index(a) for a in actions]
+    return {"behavior_coef": np.asarray(lr.coef_, dtype=float)[order],
+            "behavior_intercept": np.asarray(lr.intercept_, dtype=float)[order]}
+
+
+def export_from_joblib(art_dir) -> list:
+    """Convert preprocessor / arm / behavior joblibs in art_dir to the array format."""
+    import joblib
+
+    art_dir = Path(art_dir)
+    actions = json.load(open(art_dir / "metadata.json"))["actions"]
+    pre = joblib.load(art_dir / "preprocessor.joblib")
+    arms = {m: joblib.load(art_dir / f"arm_models_{m}.joblib") for m in METRICS}
+    params = extract_params(pre, arms, actions)
+
+    arrays = {
+        "pre_num_median": params["num_median"],
+        "pre_num_mean": params["num_mean"],
+        "pre_num_scale": params["num_scale"],
+        "pre_cat_fill": np.array(params["cat_fill"]),
+        "pre_cat_vocab": np.array([v for vocab in params["cat_vocab"] for v in vocab]),
+        "pre_cat_vocab_sizes": np.array([len(v) for v in params["cat_vocab"]], dtype=np.int64),
+    }
+    for m in METRICS:
+        arrays[f"arm_{m}_coef"] = params[f"arm_{m}_coef"]
+        arrays[f"arm_{m}_intercept"] = params[f"arm_{m}_intercept"]
+    beh_path = art_dir / "behavior_policy.joblib"
+    if beh_path.exists():
+        arrays.update(behavior_arrays(joblib.load(beh_path), pre, actions))
+
+    write_arrays(art_dir, arrays,
+                 preprocessor={"num_cols": params["num_cols"], "cat_cols": params["cat_cols"]})
+    return sorted(arrays)
+
+
+def save_linucb(art_dir, metric: str, actions, X, y, lam: float, rewards=None) -> None:
+    """
+    Persist the per-arm LinUCB state for one reward from the training design X and the
+    logged actions y: (X_a^T X_a + λI)^(-1) and its Cholesky factor (see linucb.py).
+    With the logged `rewards`, also the sufficient statistics online.py resumes from.
+    """
+    write_arrays(art_dir, linucb_arrays(metric, X, y, actions, lam, rewards))
+
+
+def save_posterior(art_dir, metric: str, actions, X, y, rewards, l2: float = 5.0, min_n: int = 50) -> None:
+    """
+    Persist the Ridge arms' posterior for one reward (see posterior.py) from the training
+    design, logged actions and rewards, with the arms' own l2 / min_n.
+    """
+    write_arrays(art_dir, posterior_arrays(metric, X, y, rewards, actions, l2, min_n))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Export joblib artifacts to the pickle-free array format.")
+    ap.add_argument("--art-dir", default=str(Path(__file__).parent))
+    args = ap.parse_args()
+    names = export_from_joblib(args.art_dir)
+    print(f"Wrote {len(names)} arrays to {Path(args.art_dir) / ARRAY_DIR}:", ", ".join(names))
@@ -0,0 +1,234 @@
+"""
+Pre-sized image variants for the Streamlit app, with a content-hash manifest.
+
+The app shows the stadium photo at column width, the team logos at 100px, the NFL logo at
+150px and the field diagram at column width, but the sources are full-resolution PNGs
+(stadiums 1-2.7 MB each). `build` writes one resized, compressed variant per source under
+assets/, named by the hash of its content, and records both hashes in assets/manifest.json:
+
+    NFL.png                   150px wide  PNG
+    team_logos/*.png          100px       PNG (palette-quantized where it has few colours)
+    team_stadiums/*_HOME.png  800px       JPEG (PNG if the photo has transparency)
+    field_diagram.png         800px       PNG
+
+Logos are made at exactly their display width, so st.image sends them as they are instead of
+resizing them on every rerun; column-width images are sized for a ~420px column at 2x.
+Nothing is upscaled, and a source that is already smaller than its variant (the field
+diagram) is kept as it is. Re-running `build` only redoes sources whose content changed.
+
+AssetCache serves the variants' bytes from memory (read once per process) and falls back
+to the original file when a variant is missing or its source changed since the build.
+
+    python artifacts/assets.py build [--force]
+    python artifacts/assets.py check          # sizes: originals vs variants
+"""
+import hashlib
+import io
+import json
+import os
+import threading
+from fnmatch import fnmatch
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent      # the app's directory
+ASSET_DIR = "assets"
+FORMAT_VERSION = 1
+# (source glob relative to ROOT, width in px, output format)
+SPECS = [
+    ("NFL.png", 150, "png"),
+    ("team_logos/*.png", 100, "png"),
+    ("team_stadiums/*_HOME.png", 800, "jpeg"),
+    ("field_diagram.png", 800, "png"),
+]
+JPEG_QUALITY = 82
+PALETTE_MAX_COLORS = 256        # logos with at most this many colours are stored as a palette PNG
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def manifest_path(root=ROOT) -> Path:
+    return Path(root) / ASSET_DIR / "manifest.json"
+
+
+def load_manifest(root=ROOT) -> dict:
+    """Source path (relative, '/'-separated) -> variant entry; {} when nothing was built."""
+    path = manifest_path(root)
+    try:
+        m = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return {}
+    return m.get("assets", {}) if m.get("format") == FORMAT_VERSION else {}
+
+
+def render(data: bytes, width: int, fmt: str):
+    """(variant bytes, extension, (w, h)) of one source image."""
+    from PIL import Image
+
+    im = Image.open(io.BytesIO(data))
+    im.load()
+    source = (im.format, im.size)
+    if im.mode == "P":
+        im = im.convert("RGBA")
+    if im.width > width:
+        im = im.resize((width, max(1, round(im.height * width / im.width))), Image.LANCZOS)
+    alpha = im.mode in ("RGBA", "LA") and im.getchannel("A").getextrema()[0] < 255
+    out = io.BytesIO()
+    if fmt == "jpeg" and not alpha:
+        im.convert("RGB").save(out, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+        return _smaller(out.getvalue(), "jpg", im.size, data, source)
+    if im.mode not in ("RGB", "RGBA"):
+        im = im.convert("RGBA" if alpha else "RGB")
+    if not alpha and im.mode == "RGBA":
+        im = im.convert("RGB")
+    colors = im.getcolors(PALETTE_MAX_COLORS)
+    if colors is not None:                 # few colours (flat logos): lossless as a palette
+        im = im.quantize(len(colors), method=Image.FASTOCTREE if alpha else Image.MEDIANCUT)
+    im.save(out, "PNG", optimize=True)
+    return _smaller(out.getvalue(), "png", im.size, data, source)
+
+
+def _smaller(variant: bytes, ext: str, size, data: bytes, source):
+    """The variant, or the source itself when that is no bigger and already in the same format."""
+    if len(variant) >= len(data) and source[0] == {"jpg": "JPEG", "png": "PNG"}[ext]:
+        return data, ext, source[1]
+    return variant, ext, size
+
+
+def sources(root=ROOT, specs=SPECS) -> dict:
+    """Source path (relative) -> (width, format) for every file a spec matches (first match wins)."""
+    root = Path(root)
+    out = {}
+    for pattern, width, fmt in specs:
+        for p in sorted(root.glob(pattern)):
+            rel = p.relative_to(root).as_posix()
+            if p.is_file() and not rel.startswith(ASSET_DIR + "/"):
+                out.setdefault(rel, (width, fmt))
+    return out
+
+
+def build(root=ROOT, specs=SPECS, force: bool = False) -> dict:
+    """Write every variant that is missing or out of date, and the manifest; returns the manifest."""
+    root = Path(root)
+    out_dir = root / ASSET_DIR
+    old = load_manifest(root)
+    assets = {}
+    for rel, (width, fmt) in sources(root, specs).items():
+        src = root / rel
+        data = src.read_bytes()
+        sha = _sha256(data)
+        prev = old.get(rel)
+        if (prev and not force and prev["source"]["sha256"] == sha and prev["spec"] == [width, fmt, JPEG_QUALITY]
+                and (out_dir / prev["path"]).exists()):
+            st = src.stat()
+            assets[rel] = {**prev, "source": {**prev["source"], "mtime_ns": st.st_mtime_ns}}
+            continue
+        variant, ext, (w, h) = render(data, width, fmt)
+        vsha = _sha256(variant)
+        path = Path(rel).parent / f"{Path(rel).stem}.{vsha[:12]}.{ext}"
+        (out_dir / path.parent).mkdir(parents=True, exist_ok=True)
+        _write_atomic(out_dir / path, variant)
+        st = src.stat()
+        assets[rel] = {"path": path.as_posix(), "sha256": vsha, "bytes": len(variant), "width": w, "height": h,
+                       "spec": [width, fmt, JPEG_QUALITY],
+                       "source": {"sha256": sha, "bytes": st.st_size, "mtime_ns": st.st_mtime_ns}}
+    # variants no longer referenced (source gone or changed)
+    keep = {a["path"] for a in assets.values()}
+    for p in list(out_dir.rglob("*")):
+        if p.suffix in (".png", ".jpg") and p.relative_to(out_dir).as_posix() not in keep:
+            p.unlink()
+    out_dir.mkdir(parents=True, exist_ok=True)
+    _write_atomic(manifest_path(root), json.dumps({"format": FORMAT_VERSION, "assets": assets},
+                                                  indent=1, sort_keys=True).encode())
+    return assets
+
+
+class AssetCache:
+    """
+    get(rel) -> the variant's bytes (read once, then from memory), else the original's path
+    (str) when there is no usable variant, else None when the original is missing too.
+    """
+
+    def __init__(self, root=ROOT):
+        self.root = Path(root)
+        self.manifest = load_manifest(self.root)
+        self._data = {}
+        self._lock = threading.Lock()
+        self.counters = {"variants": 0, "fallbacks": 0}
+
+    def _fresh(self, rel: str, entry: dict) -> bool:
+        """The source is still what the variant was built from (stat, then hash if only mtime moved)."""
+        src = self.root / rel
+        try:
+            st = src.stat()
+        except OSError:
+            return True                         # original gone: the variant is all there is
+        meta = entry["source"]
+        if st.st_size != meta["bytes"]:
+            return False
+        return st.st_mtime_ns == meta["mtime_ns"] or _sha256(src.read_bytes()) == meta["sha256"]
+
+    def get(self, rel: str):
+        rel = Path(rel).as_posix()
+        data = self._data.get(rel)
+        if data is not None:
+            return data
+        with self._lock:
+            if rel not in self._data:
+                entry = self.manifest.get(rel)
+                data = None
+                if entry is not None and self._fresh(rel, entry):
+                    try:
+                        data = (self.root / ASSET_DIR / entry["path"]).read_bytes()
+                    except OSError:
+                        pass
+                self._data[rel] = data if data is not None else False
+                self.counters["variants" if data is not None else "fallbacks"] += 1
+            data = self._data[rel]
+        if data is not False:
+            return data
+        src = self.root / rel
+        return str(src) if src.exists() else None
+
+    def nbytes(self) -> int:
+        return sum(len(v) for v in self._data.values() if v)
+
+
+def check(root=ROOT, specs=SPECS) -> list:
+    """(source, original bytes, variant bytes or None) for every source."""
+    root = Path(root)
+    manifest = load_manifest(root)
+    return [(rel, (root / rel).stat().st_size, manifest[rel]["bytes"] if rel in manifest else None)
+            for rel in sources(root, specs)]
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    ap = argparse.ArgumentParser(description="Build the app's pre-sized image variants.")
+    ap.add_argument("command", choices=["build", "check"])
+    ap.add_argument("--root", default=str(ROOT))
+    ap.add_argument("--force", action="store_true", help="rebuild every variant")
+    args = ap.parse_args()
+
+    if args.command == "build":
+        t0 = time.perf_counter()
+        assets = build(args.root, force=args.force)
+        print(f"{len(assets)} variants in {time.perf_counter() - t0:.1f}s -> {manifest_path(args.root)}")
+    rows = check(args.root)
+    for group, _, _ in SPECS:
+        sel = [r for r in rows if fnmatch(r[0], group)]
+        if sel:
+            orig = sum(r[1] for r in sel)
+            var = sum(r[2] or r[1] for r in sel)
+            missing = sum(r[2] is None for r in sel)
+            print(f"{group:26s} {len(sel):3d} files  {orig / 1024:9.0f} KB -> {var / 1024:7.0f} KB"
+                  + (f"  ({missing} without a variant)" if missing else ""))
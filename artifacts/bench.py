@@ -0,0 +1,390 @@
+"""
+Benchmark suite for the serving, feature-build and OPE hot paths. Everything runs on
+synthetic data (decisions shaped like metadata.json, nflverse-like play-by-play), so it
+needs no network and no data/ directory.
+
+    load_cold        artifact load + first score, per backend
+    single           score_context / score_context_fast latency (p50, p99)
+    batch            score_batch throughput at 1 / 100 / 10k / 1M rows
+    features         clean_pbp (EPA / fatigue rolling features) on a synthetic season set
+    ope              DM / IPS / SNIPS / DR point estimates
+    bootstrap        bootstrap CIs at B = 100 / 1000
+    sparse           dense vs CSR design: transform, Ridge/LinUCB Gram statistics and
+                     confidence widths at the 2016-2024 scale (~36k rows) and 10x that,
+                     with the design's bytes and each stage's peak allocation
+
+Results are one JSON document (environment, then one entry per case with median / min
+seconds and throughput). With a baseline, each case's median is compared against it and
+cases slower by more than `--tolerance` are reported as regressions (exit status 1).
+
+    python artifacts/bench.py --out bench.json [--quick] [--only batch,ope]
+    python artifacts/bench.py --baseline bench_baseline.json [--tolerance 0.25]
+    python artifacts/bench.py --save-baseline bench_baseline.json
+"""
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+try:
+    from .array_store import ARRAY_DIR
+    from .features import RAW_COLS, clean_pbp
+    from .inference import ART, ModelBundle, get_bundle, score_batch, score_context, score_context_fast
+    from .linucb import arm_stats, confidence_widths, grams_from_stats
+    from .ope import bootstrap_ci, estimators, policy_greedy
+except ImportError:  # run as a script from artifacts/
+    from array_store import ARRAY_DIR
+    from features import RAW_COLS, clean_pbp
+    from inference import ART, ModelBundle, get_bundle, score_batch, score_context, score_context_fast
+    from linucb import arm_stats, confidence_widths, grams_from_stats
+    from ope import bootstrap_ci, estimators, policy_greedy
+
+TEAMS = ["ARI", "ATL", "BAL", "BUF", "CAR", "CHI", "CIN", "CLE", "DAL", "DEN", "DET", "GB",
+         "HOU", "IND", "JAX", "KC", "LA", "LAC", "LV", "MIA", "MIN", "NE", "NO", "NYG", "NYJ",
+         "PHI", "PIT", "SEA", "SF", "TB", "TEN", "WAS"]
+# (low, high) of a uniform draw per numeric feature; integer-valued where the data is
+NUMERIC_RANGES = {
+    "yardline_100": (1, 99, int), "ydstogo": (1, 20, int), "score_differential": (-28, 28, int),
+    "qtr": (1, 4, int), "game_seconds_remaining": (0, 3600, int), "off_epa_4w": (-0.3, 0.3, float),
+    "def_epa_4w": (-0.3, 0.3, float), "fg_pct_short": (0.8, 1.0, float), "fg_pct_mid": (0.6, 0.95, float),
+    "fg_pct_long": (0.3, 0.8, float), "punt_net_4w": (35, 46, float), "plays_in_drive_so_far": (1, 18, int),
+    "def_time_on_field_cum": (0, 2000, float), "def_time_on_field_share": (0.3, 0.7, float),
+    "home_timeouts_remaining": (0, 3, int), "away_timeouts_remaining": (0, 3, int),
+    "posteam_timeouts_remaining": (0, 3, int), "defteam_timeouts_remaining": (0, 3, int),
+    "temp": (10, 95, int), "wind": (0, 25, int),
+}
+CATEGORIES = {"posteam_type": ["home", "away"], "roof": ["outdoors", "dome", "closed", "open"],
+              "surface": ["grass", "fieldturf", "sportturf", "a_turf"]}
+BATCH_SIZES = [1, 100, 10_000, 1_000_000]
+QUICK_BATCH_SIZES = [1, 100, 10_000]
+BOOTSTRAP_B = [100, 1000]
+SPARSE_ROWS = [36_000, 360_000]           # ~2016-2024 decisions, and a synthetic 10x
+CASES = ["load_cold", "single", "batch", "features", "ope", "bootstrap", "sparse"]
+DEFAULT_TOLERANCE = 0.25
+
+
+# --- synthetic data ---
+def synthetic_decisions(n: int, seed: int = 0, meta: dict = None) -> pd.DataFrame:
+    """
+    `n` decision rows with every column of metadata.json's feature_cols (plus season, week,
+    action, epa, wpa). Numeric features not in NUMERIC_RANGES are standard normal.
+    """
+    meta = meta or get_bundle().meta
+    rng = np.random.default_rng(seed)
+    cols = {}
+    for c in meta["numeric_features"]:
+        lo, hi, kind = NUMERIC_RANGES.get(c, (None, None, float))
+        if lo is None:
+            cols[c] = rng.normal(size=n)
+        elif kind is int:
+            cols[c] = rng.integers(lo, hi + 1, size=n)
+        else:
+            cols[c] = rng.uniform(lo, hi, size=n)
+    if "yardline_100" in cols and "ydstogo" in cols:
+        cols["ydstogo"] = np.minimum(cols["ydstogo"], cols["yardline_100"])
+    if "qtr" in cols and "game_seconds_remaining" in cols:
+        cols["game_seconds_remaining"] = (4 - cols["qtr"]) * 900 + rng.integers(0, 901, size=n)
+    pos = rng.integers(0, len(TEAMS), size=n)
+    de = (pos + rng.integers(1, len(TEAMS), size=n)) % len(TEAMS)
+    home = rng.random(n) < 0.5
+    teams = np.asarray(TEAMS)
+    derived = {
+        "posteam": teams[pos], "defteam": teams[de],
+        "home_team": np.where(home, teams[pos], teams[de]), "away_team": np.where(home, teams[de], teams[pos]),
+        "posteam_type": np.where(home, "home", "away"),
+        "goal_to_go": ((cols.get("yardline_100", 50) <= 10)
+                       & (cols.get("ydstogo", 10) >= cols.get("yardline_100", 50))).astype(int),
+    }
+    for c in meta["categorical_features"]:
+        if c in derived:
+            cols[c] = derived[c]
+        else:
+            vocab = CATEGORIES.get(c, ["a", "b", "c"])
+            cols[c] = np.asarray(vocab)[rng.integers(0, len(vocab), size=n)]
+    df = pd.DataFrame(cols)[meta["feature_cols"]]
+    df["season"] = rng.integers(2016, 2025, size=n)
+    df["week"] = rng.integers(1, 19, size=n)
+    df["action"] = np.asarray(meta["actions"])[rng.integers(0, len(meta["actions"]), size=n)]
+    df["epa"] = rng.normal(0, 1.5, size=n)
+    df["wpa"] = rng.normal(0, 0.04, size=n)
+    return df
+
+
+def synthetic_pbp(seasons=(2023, 2024), weeks=range(1, 19), games: int = 16, plays: int = 150,
+                  seed: int = 0) -> pd.DataFrame:
+    """Raw nflverse-like regular-season play-by-play (the RAW_COLS clean_pbp reads)."""
+    rng = np.random.default_rng(seed)
+    weeks = list(weeks)
+    n_games = len(seasons) * len(weeks) * games
+    n = n_games * plays
+    g = np.repeat(np.arange(n_games), plays)
+    i = np.tile(np.arange(plays), n_games)
+    season = np.asarray(seasons)[g // (len(weeks) * games)]
+    week = np.asarray(weeks)[(g // games) % len(weeks)]
+    teams = np.asarray(TEAMS)
+    perm = np.argsort(rng.random((n_games // games, len(TEAMS))), axis=1)   # weekly pairings
+    slot = g % games
+    home = teams[perm[g // games, 2 * slot % len(TEAMS)]]
+    away = teams[perm[g // games, (2 * slot + 1) % len(TEAMS)]]
+    drive = i // 6 + 1
+    pos_home = drive % 2 == 1
+    gsr = np.maximum(3600 - (i * 3600) // plays - rng.integers(0, 20, size=n), 0)
+    down = i % 4 + 1
+    pt = np.where(down == 4, rng.choice(["punt", "field_goal", "run", "pass"], size=n, p=[0.5, 0.25, 0.15, 0.1]),
+                  rng.choice(["run", "pass", "no_play"], size=n, p=[0.45, 0.45, 0.1]))
+    fga = pt == "field_goal"
+    df = pd.DataFrame({
+        "season": season, "week": week, "season_type": "REG",
+        "game_id": [f"{s}_{w:02d}_{a}_{h}" for s, w, a, h in zip(season, week, away, home)],
+        "game_date": [f"{s}-09-{w:02d}" for s, w in zip(season, week)],
+        "play_id": 40 + 25 * i, "drive": drive,
+        "posteam": np.where(pos_home, home, away), "defteam": np.where(pos_home, away, home),
+        "home_team": home, "away_team": away, "posteam_type": np.where(pos_home, "home", "away"),
+        "qtr": np.minimum(4, 1 + (3600 - gsr) // 900), "game_seconds_remaining": gsr,
+        "half_seconds_remaining": gsr % 1800, "quarter_seconds_remaining": gsr % 900,
+        "down": down.astype(float), "ydstogo": rng.integers(1, 15, size=n),
+        "yardline_100": rng.integers(1, 99, size=n), "score_differential": rng.integers(-21, 21, size=n),
+        "home_timeouts_remaining": 3, "away_timeouts_remaining": 3,
+        "posteam_timeouts_remaining": 3, "defteam_timeouts_remaining": 3,
+        "roof": "outdoors", "surface": "grass", "temp": rng.integers(30, 90, size=n).astype(float),
+        "wind": rng.integers(0, 20, size=n).astype(float), "play_type": pt,
+        "punt_attempt": (pt == "punt").astype(float), "field_goal_attempt": fga.astype(float),
+        "rush_attempt": (pt == "run").astype(float), "pass_attempt": (pt == "pass").astype(float),
+        "epa": rng.normal(size=n), "wpa": rng.normal(size=n) * 0.03,
+        "success": (rng.random(n) < 0.45).astype(float), "yards_gained": rng.integers(-5, 20, size=n).astype(float),
+        "first_down": (rng.random(n) < 0.3).astype(float), "touchdown": (rng.random(n) < 0.05).astype(float),
+        "field_goal_result": np.where(fga, np.where(rng.random(n) < 0.8, "made", "missed"), None),
+        "kick_distance": np.where(fga | (pt == "punt"), rng.integers(18, 66, size=n), np.nan),
+        "punt_inside_twenty": 0.0, "punt_out_of_bounds": 0.0, "punt_downed": 0.0, "punt_fair_catch": 0.0,
+        "return_yards": 0.0, "penalty": (rng.random(n) < 0.05).astype(float), "aborted_play": 0.0,
+        "play_deleted": 0.0, "goal_to_go": 0.0, "timeout": 0.0, "timeout_team": None,
+    })
+    return df[RAW_COLS]
+
+
+def synthetic_ope(n: int, K: int = 3, seed: int = 0):
+    """(P_beh, MU, r, a_idx) with a softmax behavior policy and rewards around MU."""
+    rng = np.random.default_rng(seed)
+    MU = rng.normal(0, 0.05, size=(n, K))
+    logits = rng.normal(size=(n, K))
+    P_beh = np.exp(logits) / np.exp(logits).sum(axis=1, keepdims=True)
+    a_idx = (P_beh.cumsum(axis=1) < rng.random((n, 1))).sum(axis=1)
+    r = MU[np.arange(n), a_idx] + rng.normal(0, 0.05, size=n)
+    return P_beh, MU, r, a_idx
+
+
+# --- timing ---
+def timeit(fn, repeat: int = 5, number: int = 1, setup=None) -> dict:
+    """Median / min / max seconds per call of fn() over `repeat` rounds of `number` calls."""
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        gc.collect()
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        times.append((time.perf_counter() - t0) / number)
+    return {"median_s": float(np.median(times)), "min_s": float(min(times)), "max_s": float(max(times)),
+            "repeat": repeat, "number": number}
+
+
+def _backends(art_dir=None) -> list:
+    out = ["joblib"] if (Path(art_dir or ART) / "preprocessor.joblib").exists() else []
+    if (Path(art_dir or ART) / ARRAY_DIR).is_dir():
+        out.append("arrays")
+    return out
+
+
+def bench_load_cold(art_dir=None, repeat: int = 3) -> dict:
+    ctx = synthetic_decisions(1, meta=get_bundle(art_dir).meta).iloc[0].to_dict()
+    out = {}
+    for backend in _backends(art_dir):
+        out[f"load_cold[{backend}]"] = timeit(
+            lambda: ModelBundle(art_dir, backend).score_batch([ctx]), repeat)
+    return out
+
+
+def bench_single(art_dir=None, calls: int = 300) -> dict:
+    out = {}
+    for backend in _backends(art_dir):
+        b = get_bundle(art_dir, backend)
+        ctxs = synthetic_decisions(calls, seed=1, meta=b.meta)[b.feature_cols].to_dict("records")
+        fns = {"score_context": lambda c: score_context(c, bundle=b),
+               "score_context_fast": lambda c: score_context_fast(c, bundle=b)}
+        for name, fn in fns.items():
+            fn(ctxs[0])                                       # warm-up
+            lat = []
+            for c in ctxs:
+                t0 = time.perf_counter()
+                fn(c)
+                lat.append(time.perf_counter() - t0)
+            lat = np.asarray(lat)
+            out[f"single[{name},{backend}]"] = {
+                "median_s": float(np.median(lat)), "min_s": float(lat.min()), "max_s": float(lat.max()),
+                "p99_s": float(np.percentile(lat, 99)), "repeat": calls, "number": 1}
+    return out
+
+
+def bench_batch(art_dir=None, sizes=BATCH_SIZES) -> dict:
+    out = {}
+    backends = _backends(art_dir)
+    for backend in backends:
+        b = get_bundle(art_dir, backend)
+        frame = synthetic_decisions(max(sizes), seed=2, meta=b.meta)[b.feature_cols]
+        for n in sizes:
+            if n >= 1_000_000 and backend != backends[-1]:
+                continue                                      # 1M rows: the fastest backend only
+            df = frame.iloc[:n]
+            repeat = 3 if n >= 100_000 else 5 if n >= 10_000 else 20
+            r = timeit(lambda: score_batch(df, bundle=b), repeat)
+            out[f"batch[{n},{backend}]"] = {**r, "rows_per_s": n / r["median_s"]}
+        del frame
+    return out
+
+
+def bench_features(seasons=(2023, 2024), games: int = 16, plays: int = 150) -> dict:
+    pbp = synthetic_pbp(seasons, games=games, plays=plays)
+    r = timeit(lambda: clean_pbp(pbp), repeat=3)
+    return {f"features[clean_pbp,{len(pbp)}]": {**r, "rows_per_s": len(pbp) / r["median_s"]}}
+
+
+def bench_ope(n: int = 50_000) -> dict:
+    P_beh, MU, r, a_idx = synthetic_ope(n)
+    P = policy_greedy(MU)
+    t = timeit(lambda: estimators(P, P_beh, MU, r, a_idx), repeat=10)
+    return {f"ope[estimators,{n}]": {**t, "rows_per_s": n / t["median_s"]}}
+
+
+def bench_bootstrap(n: int = 20_000, Bs=BOOTSTRAP_B) -> dict:
+    P_beh, MU, r, a_idx = synthetic_ope(n)
+    P = policy_greedy(MU)[None]
+    out = {}
+    for B in Bs:
+        t = timeit(lambda: bootstrap_ci(P, P_beh, MU, r, a_idx, B=B), repeat=3 if B >= 1000 else 5)
+        out[f"bootstrap[B={B},{n}]"] = {**t, "replicates_per_s": B / t["median_s"]}
+    return out
+
+
+def peak_bytes(fn) -> int:
+    """Peak traced allocation while running fn() (NumPy and SciPy buffers included)."""
+    import tracemalloc
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def bench_sparse(sizes=SPARSE_ROWS) -> dict:
+    from scipy.linalg import cholesky
+    try:
+        from .retrain import CATEGORICAL, NUMERIC, make_preprocessor
+    except ImportError:
+        from retrain import CATEGORICAL, NUMERIC, make_preprocessor
+
+    out = {}
+    for n in sizes:
+        df = synthetic_decisions(n, seed=4)
+        cols = [c for c in NUMERIC if c in df.columns] + CATEGORICAL
+        y, r = df["action"].to_numpy(), df["epa"].to_numpy()
+        actions = sorted(set(y))
+        chol = None
+        for mode in ("dense", "sparse"):
+            pre = make_preprocessor([c for c in NUMERIC if c in df.columns], CATEGORICAL, mode == "sparse")
+            pre.fit(df[cols])
+            X = pre.transform(df[cols])
+            stats = arm_stats(X, y, r, actions)
+            if chol is None:
+                chol = np.stack([cholesky(A, lower=True) for A in grams_from_stats(stats)])
+            nbytes = (X.data.nbytes + X.indices.nbytes + X.indptr.nbytes) if mode == "sparse" else X.nbytes
+            stages = {"transform": lambda: pre.transform(df[cols]),
+                      "gram": lambda: arm_stats(X, y, r, actions),
+                      "widths": lambda: confidence_widths(X, chol)}
+            for stage, fn in stages.items():
+                t = timeit(fn, repeat=3)
+                out[f"sparse[{stage},{n},{mode}]"] = {**t, "rows_per_s": n / t["median_s"],
+                                                      "peak_bytes": peak_bytes(fn), "design_bytes": nbytes}
+            del X, stats
+    return out
+
+
+def environment(art_dir=None) -> dict:
+    import sklearn
+    art = Path(art_dir or ART)
+    stamp = {p.name: int(p.stat().st_mtime) for p in sorted(art.glob("*.joblib")) + [art / "metadata.json"]
+             if p.exists()}
+    return {"python": platform.python_version(), "numpy": np.__version__, "pandas": pd.__version__,
+            "sklearn": sklearn.__version__, "platform": platform.platform(), "cpus": os.cpu_count(),
+            "artifacts": stamp, "time": time.strftime("%Y-%m-%dT%H:%M:%S")}
+
+
+def run_suite(only=None, quick: bool = False, art_dir=None) -> dict:
+    """{"environment": ..., "results": {case: timings}} for the selected cases."""
+    only = CASES if only is None else list(only)
+    unknown = set(only) - set(CASES)
+    if unknown:
+        raise ValueError(f"Unknown benchmark case(s) {sorted(unknown)} (expected some of {CASES})")
+    runs = {
+        "load_cold": lambda: bench_load_cold(art_dir),
+        "single": lambda: bench_single(art_dir, 100 if quick else 300),
+        "batch": lambda: bench_batch(art_dir, QUICK_BATCH_SIZES if quick else BATCH_SIZES),
+        "features": lambda: bench_features(games=4, plays=60) if quick else bench_features(),
+        "ope": lambda: bench_ope(5_000 if quick else 50_000),
+        "bootstrap": lambda: bench_bootstrap(2_000 if quick else 20_000),
+        "sparse": lambda: bench_sparse([5_000] if quick else SPARSE_ROWS),
+    }
+    results = {}
+    for case in CASES:
+        if case in only:
+            results.update(runs[case]())
+    return {"environment": environment(art_dir), "quick": quick, "results": results}
+
+
+def compare(current: dict, baseline: dict, tolerance: float = DEFAULT_TOLERANCE) -> pd.DataFrame:
+    """
+    One row per case in both runs: baseline and current median seconds, their ratio, and
+    `regression` when the current run is slower by more than `tolerance` (0.25 = 25%).
+    """
+    cur, base = current["results"], baseline["results"]
+    rows = [{"case": k, "baseline_s": base[k]["median_s"], "current_s": cur[k]["median_s"],
+             "ratio": cur[k]["median_s"] / base[k]["median_s"]} for k in cur if k in base]
+    df = pd.DataFrame(rows, columns=["case", "baseline_s", "current_s", "ratio"])
+    df["regression"] = df["ratio"] > 1 + tolerance
+    return df
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Benchmark the inference, feature-build and OPE hot paths.")
+    ap.add_argument("--only", default=None, help=f"comma-separated cases out of {','.join(CASES)}")
+    ap.add_argument("--quick", action="store_true", help="small sizes (no 1M-row batch), for CI")
+    ap.add_argument("--art-dir", default=None)
+    ap.add_argument("--out", default=None, help="write the results JSON here (default: stdout)")
+    ap.add_argument("--baseline", default=None, help="results JSON to compare against")
+    ap.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                    help="allowed slowdown per case before it counts as a regression")
+    ap.add_argument("--save-baseline", default=None, help="also write the results as the new baseline")
+    args = ap.parse_args()
+
+    res = run_suite(args.only.split(",") if args.only else None, args.quick, args.art_dir)
+    text = json.dumps(res, indent=2)
+    for path in filter(None, [args.out, args.save_baseline]):
+        Path(path).write_text(text)
+    if not args.out:
+        print(text)
+    if args.baseline:
+        cmp = compare(res, json.loads(Path(args.baseline).read_text()), args.tolerance)
+        print(cmp.to_string(index=False), file=sys.stderr)
+        if cmp["regression"].any():
+            print(f"{int(cmp['regression'].sum())} case(s) slower than the baseline by more than "
+                  f"{args.tolerance:.0%}", file=sys.stderr)
+            sys.exit(1)
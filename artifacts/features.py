@@ -0,0 +1,561 @@
+"""
+Feature build for the cleaned play-by-play and 4th-down decisions tables.
+
+The same transforms as data_clean_2016_2024.ipynb, as functions:
+
+    off_epa_4w / def_epa_4w   mean of the team's previous <=4 weekly EPA/play (0 if none)
+    fg_pct_{short,mid,long}   mean made rate over the previous 16 week slots, >= 3 with kicks
+    punt_net_4w               mean of the team's previous <=4 weekly net punts
+    fatigue / drive columns   per-game shifts and cumulative sums
+
+The group-wise shifts, cumsums and shifted rolling means run as NumPy kernels over sorted
+group runs (rolling.py) rather than a Python lambda per team-season group.
+
+plus an incremental path for in-season updates. The rolling features only look back within
+a season, so FeatureState keeps the tail they need (last 4 weekly EPA means per team and
+side, the season's FG weeks per distance bin, last 4 weekly punt nets) and the per-team sums
+used to fill missing FG% / punt net. Given one new week of play-by-play from a local file,
+`append_week` computes that week's rows, appends them to the stored CSVs (and Parquet
+copies), rebuilds the team-week store (team_store.py) and saves the state;
+`check_consistency` compares stored rows against a full rebuild from raw play-by-play.
+
+    python artifacts/features.py append --pbp play_by_play_2025.parquet --week 5 [--check]
+    python artifacts/features.py build play_by_play_{2016..2024}.parquet     # streaming rebuild
+
+The first run builds the state from data/pbp_clean_2016_2024.csv (no download needed).
+"""
+import json
+import os
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+try:
+    from .rolling import Groups
+    from .storage import load_table, parquet_path, read_parquet, write_parquet
+    from .team_store import refresh_store
+except ImportError:  # run as a script from artifacts/
+    from rolling import Groups
+    from storage import load_table, parquet_path, read_parquet, write_parquet
+    from team_store import refresh_store
+
+ID_COLS = ["season", "week", "game_id", "game_date", "play_id"]
+TEAM_COLS = ["posteam", "defteam", "home_team", "away_team", "posteam_type"]
+GAME_ST_COLS = ["qtr", "game_seconds_remaining", "half_seconds_remaining", "quarter_seconds_remaining",
+                "down", "ydstogo", "yardline_100", "score_differential"]
+TIMEOUT_COLS = ["home_timeouts_remaining", "away_timeouts_remaining",
+                "posteam_timeouts_remaining", "defteam_timeouts_remaining"]
+CONDITION_COLS = ["roof", "surface", "temp", "wind"]
+ARM_COLS = ["play_type", "punt_attempt", "field_goal_attempt", "rush_attempt", "pass_attempt"]
+REWARD_COLS = ["epa", "wpa", "success", "yards_gained", "first_down", "touchdown"]
+FG_COLS = ["field_goal_result", "kick_distance"]
+PUNT_COLS = ["punt_inside_twenty", "punt_out_of_bounds", "punt_downed", "punt_fair_catch", "return_yards"]
+MISC_COLS = ["penalty", "aborted_play", "play_deleted", "goal_to_go", "timeout", "timeout_team"]
+DRIVE_COLS = ["plays_in_drive_so_far"]
+FATIGUE_COLS = ["play_elapsed_s", "game_time_elapsed", "def_time_on_field_cum", "def_time_on_field_share",
+                "is_q4_or_later"]
+FINAL_COLS = (ID_COLS + TEAM_COLS + GAME_ST_COLS + TIMEOUT_COLS + CONDITION_COLS + ARM_COLS + REWARD_COLS
+              + FG_COLS + PUNT_COLS + MISC_COLS + ["off_epa_4w", "def_epa_4w"] + DRIVE_COLS + FATIGUE_COLS)
+NUM_COLS = [
+    "qtr", "game_seconds_remaining", "half_seconds_remaining", "quarter_seconds_remaining",
+    "down", "ydstogo", "yardline_100", "score_differential", "temp", "wind",
+    "epa", "wpa", "yards_gained", "kick_distance", "return_yards",
+    "off_epa_4w", "def_epa_4w", "def_time_on_field_cum", "def_time_on_field_share", "plays_in_drive_so_far",
+]
+FG_BINS = ["short", "mid", "long"]
+FG_PCT_COLS = [f"fg_pct_{b}" for b in FG_BINS]
+FILL_COLS = FG_PCT_COLS + ["punt_net_4w"]
+KEY = ["game_id", "play_id"]
+# raw nflverse columns the build reads (of ~370)
+RAW_COLS = [c for c in FINAL_COLS if c not in ["off_epa_4w", "def_epa_4w"] + DRIVE_COLS + FATIGUE_COLS] + [
+    "drive", "season_type"]
+
+EPA_WINDOW, FG_WINDOW, FG_MIN_PERIODS, PUNT_WINDOW = 4, 16, 3, 4
+STATE_FORMAT = 1
+
+
+def load_pbp(path, seasons=None, weeks=None, columns=RAW_COLS) -> pd.DataFrame:
+    """Regular-season plays from a local nflverse play-by-play file (.csv or .parquet)."""
+    path = Path(path)
+    if path.suffix == ".parquet":
+        import pyarrow.parquet as pq
+        have = pq.read_schema(path).names
+        pbp = pd.read_parquet(path, columns=[c for c in columns if c in have] if columns else None)
+    else:
+        keep = set(columns) if columns else None
+        pbp = pd.read_csv(path, low_memory=False, usecols=(lambda c: c in keep) if keep else None)
+    if "season_type" in pbp.columns:
+        pbp = pbp.loc[pbp["season_type"] == "REG"]
+    pbp = pbp.copy()
+    pbp["week"] = pd.to_numeric(pbp["week"], errors="coerce")
+    for key, vals in (("season", seasons), ("week", weeks)):
+        if vals is not None:
+            pbp = pbp.loc[pbp[key].isin(np.atleast_1d(vals))]
+    return pbp.reset_index(drop=True)
+
+
+# --- rolling team-week features ---
+def prev_rolling_mean(weekly, keys, col, window, min_periods=1):
+    """Per group (frame sorted by keys + week): mean of the previous `window` values."""
+    g = Groups(*(weekly[k] for k in keys))
+    return pd.Series(g.prev_rolling_mean(weekly[col], window, min_periods), index=weekly.index)
+
+
+def team_week_epa(pbp, team: str = "posteam") -> pd.DataFrame:
+    """Mean EPA/play per (season, team, week) for the offense (posteam) or defense (defteam)."""
+    return (pbp[["season", team, "week", "epa"]].dropna(subset=[team, "epa"])
+               .groupby(["season", team, "week"], as_index=False)["epa"].mean()
+               .sort_values(["season", team, "week"]))
+
+
+def _epa_4w(weekly, team, out):
+    weekly = weekly.sort_values(["season", team, "week"]).reset_index(drop=True)
+    weekly[out] = prev_rolling_mean(weekly, ["season", team], "epa", EPA_WINDOW)
+    return weekly[["season", team, "week", out]]
+
+
+def add_epa_features(pbp, off_hist=None, def_hist=None) -> pd.DataFrame:
+    """Merge off/def_epa_4w onto pbp; *_hist are earlier weeks' team_week_epa rows (incremental)."""
+    off = pd.concat([off_hist, team_week_epa(pbp, "posteam")], ignore_index=True)
+    dfn = pd.concat([def_hist, team_week_epa(pbp, "defteam")], ignore_index=True)
+    pbp["off_epa_4w"] = lookup(pbp, _epa_4w(off, "posteam", "off_epa_4w"), ["season", "posteam", "week"])
+    pbp["def_epa_4w"] = lookup(pbp, _epa_4w(dfn, "defteam", "def_epa_4w"), ["season", "defteam", "week"])
+    for c in ["off_epa_4w", "def_epa_4w"]:
+        pbp[c] = pbp[c].fillna(0.0)
+    return pbp
+
+
+def lookup(rows, table, keys):
+    """Left join of table's last column onto rows by keys, without copying rows' other columns."""
+    idx = pd.MultiIndex.from_frame(rows[keys])
+    return table.set_index(keys).iloc[:, -1].reindex(idx).to_numpy()
+
+
+def add_fatigue_features(pbp) -> pd.DataFrame:
+    """Clock, time-on-field and drive features; all per game, in play order."""
+    game = Groups(pbp["game_id"])
+    gsr = pbp["game_seconds_remaining"].to_numpy(dtype=float)
+    elapsed = np.nan_to_num(np.clip(game.shift(gsr) - gsr, 0, None), nan=0.0)
+    # each elapsed interval is attributed to the previous defensive team
+    defteam = pbp["defteam"].to_numpy(dtype=object)
+    same_def = pd.Series(game.shift(defteam)).eq(pd.Series(defteam)).to_numpy()
+    cum = Groups(pbp["game_id"], pbp["defteam"]).cumsum(np.where(same_def, elapsed, 0.0))
+    total = game.cumsum(elapsed)
+
+    pbp["play_elapsed_s"] = elapsed
+    pbp["game_time_elapsed"] = total
+    pbp["def_time_on_field_cum"] = cum
+    share = np.divide(cum, total, out=np.zeros_like(cum), where=total > 0)
+    pbp["def_time_on_field_share"] = np.nan_to_num(share, nan=0.0)
+    pbp["plays_in_drive_so_far"] = Groups(pbp["game_id"], pbp["drive"]).cumcount() + 1
+    pbp["is_q4_or_later"] = (pbp["qtr"] >= 4).astype(int)
+    return pbp
+
+
+def clean_pbp(pbp, off_hist=None, def_hist=None) -> pd.DataFrame:
+    """Raw regular-season play-by-play -> the pbp_clean table (FINAL_COLS)."""
+    # only the columns the build reads (nflverse pbp has ~370)
+    pbp = pbp[[c for c in dict.fromkeys(FINAL_COLS + ["drive"]) if c in pbp.columns]].copy()
+    pbp["week"] = pd.to_numeric(pbp["week"], errors="coerce")
+    pbp = add_fatigue_features(add_epa_features(pbp, off_hist, def_hist))
+    df = pbp[FINAL_COLS].copy()
+    for c in NUM_COLS:
+        df[c] = pd.to_numeric(df[c], errors="coerce")
+    return df
+
+
+def decision_rows(df) -> pd.DataFrame:
+    """Valid 4th-down go / punt / fg plays with an `action` column."""
+    def col_safe(name):
+        return df[name] if name in df.columns else pd.Series(0, index=df.index)
+
+    mask = (
+        (df["down"] == 4) &
+        df["play_type"].isin(["run", "pass", "punt", "field_goal"]) &
+        col_safe("penalty").fillna(0).eq(0) &
+        col_safe("aborted_play").fillna(0).eq(0) &
+        col_safe("qb_kneel").fillna(0).eq(0) &
+        col_safe("qb_spike").fillna(0).eq(0) &
+        df["yardline_100"].notna() &
+        df["ydstogo"].notna()
+    )
+    dec = df.loc[mask].copy()
+    dec["action"] = np.select(
+        [dec["play_type"].isin(["run", "pass"]), dec["play_type"] == "punt", dec["play_type"] == "field_goal"],
+        ["go", "punt", "fg"], default="")
+    return dec
+
+
+def fg_week_rates(df) -> pd.DataFrame:
+    """Observed FG make rate per (season, posteam, week, dist_bin)."""
+    fg = df.loc[df["field_goal_attempt"] == 1, ["season", "week", "posteam", "kick_distance", "field_goal_result"]].copy()
+    fg["fg_made"] = (fg["field_goal_result"] == "made").astype(int)
+    fg["dist_bin"] = pd.cut(fg["kick_distance"], bins=[0, 39, 49, 70], labels=FG_BINS, include_lowest=True)
+    return (fg.groupby(["season", "posteam", "week", "dist_bin"], observed=True)["fg_made"]
+              .mean().reset_index())
+
+
+def fg_pct_wide(rates, weeks=None) -> pd.DataFrame:
+    """
+    fg_pct_{bin} per (season, posteam, week). The rolling window runs over every week slot
+    (all seasons x teams x weeks x bins, as the notebook's categorical groupby lays them
+    out), so a bye or a week without a kick in that bin still takes one of the 16 slots.
+    """
+    weeks = sorted(set(rates["week"]) if weeks is None else weeks)
+    grid = pd.MultiIndex.from_product(
+        [sorted(rates["season"].unique()), sorted(rates["posteam"].unique()), weeks, FG_BINS],
+        names=["season", "posteam", "week", "dist_bin"]).to_frame(index=False)
+    rates = rates.astype({"dist_bin": str})
+    fg_week = grid.merge(rates, on=["season", "posteam", "week", "dist_bin"], how="left")
+    fg_week["fg_pct"] = prev_rolling_mean(fg_week, ["season", "posteam", "dist_bin"], "fg_made",
+                                          FG_WINDOW, FG_MIN_PERIODS)
+    wide = (fg_week.pivot(index=["season", "posteam", "week"], columns="dist_bin", values="fg_pct")
+                   .reindex(columns=FG_BINS).add_prefix("fg_pct_"))
+    wide = wide.loc[wide.notna().any(axis=1)].reset_index()
+    wide.columns.name = None
+    return wide
+
+
+def punt_week_nets(df) -> pd.DataFrame:
+    """
+    Mean net punt per (season, posteam, week): punt yardline + the receiving team's yardline
+    on the game's next punt - 100, clipped to [0, 80].
+    """
+    punts = df.loc[df["punt_attempt"] == 1, ["game_id", "play_id", "season", "week", "posteam", "defteam",
+                                             "yardline_100"]].sort_values(["game_id", "play_id"])
+    nxt = punts.groupby("game_id")[["posteam", "yardline_100"]].shift(-1)
+    recv = (nxt["posteam"] == punts["defteam"]) & nxt["yardline_100"].notna()
+    punts = punts.loc[recv].copy()
+    punts["punt_net"] = (punts["yardline_100"].astype(float) + nxt.loc[recv, "yardline_100"].astype(float)
+                         - 100.0).clip(lower=0, upper=80)
+    return (punts.groupby(["season", "posteam", "week"], as_index=False)["punt_net"].mean()
+                 .sort_values(["season", "posteam", "week"]))
+
+
+def _punt_4w(p_week):
+    p_week = p_week.sort_values(["season", "posteam", "week"]).reset_index(drop=True)
+    p_week["punt_net_4w"] = prev_rolling_mean(p_week, ["season", "posteam"], "punt_net", PUNT_WINDOW)
+    return p_week[["season", "posteam", "week", "punt_net_4w"]]
+
+
+def decision_features(df, fg_hist=None, weeks=None, punt_hist=None) -> pd.DataFrame:
+    """Decisions with FG% / punt net (unfilled); *_hist and weeks carry earlier weeks (incremental)."""
+    dec = decision_rows(df)
+    rates = pd.concat([fg_hist, fg_week_rates(df).astype({"dist_bin": str})], ignore_index=True)
+    weeks = set(weeks or []) | set(rates["week"])
+    wide = fg_pct_wide(rates, weeks)
+    for c in FG_PCT_COLS:
+        dec[c] = lookup(dec, wide[["season", "posteam", "week", c]], ["season", "posteam", "week"])
+    p_week = pd.concat([punt_hist, punt_week_nets(df)], ignore_index=True)
+    dec["punt_net_4w"] = lookup(dec, _punt_4w(p_week), ["season", "posteam", "week"])
+    return dec
+
+
+def fill_team_means(dec, sums=None) -> pd.DataFrame:
+    """
+    Fill missing FG% / punt net with the team's mean over all decisions. `sums` maps
+    col -> {team: [sum, count]} of the observed values (incremental: all weeks so far).
+    """
+    for c in FILL_COLS:
+        if sums is None:
+            dec[c] = dec.groupby("posteam")[c].transform(lambda s: s.fillna(s.mean()))
+        else:
+            mean = {t: (s / n if n else np.nan) for t, (s, n) in sums[c].items()}
+            dec[c] = dec[c].fillna(dec["posteam"].map(mean))
+    return dec
+
+
+def build_features(pbp, fill: bool = True):
+    """Full rebuild: raw regular-season pbp -> (pbp_clean, decisions)."""
+    df = clean_pbp(pbp)
+    dec = decision_features(df)
+    return df, (fill_team_means(dec) if fill else dec)
+
+
+def _team_sums(dec, sums=None) -> dict:
+    sums = {c: dict(v) for c, v in (sums or {c: {} for c in FILL_COLS}).items()}
+    for c in FILL_COLS:
+        g = dec.dropna(subset=["posteam"]).groupby("posteam")[c]
+        for team, s, n in zip(g.sum().index, g.sum().to_numpy(), g.count().to_numpy()):
+            old = sums[c].get(team, [0.0, 0])
+            sums[c][team] = [old[0] + float(s), old[1] + int(n)]
+    return sums
+
+
+# --- incremental state ---
+class FeatureState:
+    """Rolling inputs for the current season, enough to build the next week's features."""
+
+    TABLES = ("off", "def", "fg", "punt")
+
+    def __init__(self, off, def_, fg, punt, weeks, sums, last=None):
+        self.off, self.def_, self.fg, self.punt = off, def_, fg, punt
+        self.weeks = sorted(int(w) for w in weeks)
+        self.sums = sums
+        self.last = last or {}          # season -> last week folded in
+
+    @classmethod
+    def empty(cls):
+        """State before the first week (a from-scratch build)."""
+        cols = {"off": ["season", "posteam", "week", "epa"], "def": ["season", "defteam", "week", "epa"],
+                "fg": ["season", "posteam", "week", "dist_bin", "fg_made"],
+                "punt": ["season", "posteam", "week", "punt_net"]}
+        t = {k: pd.DataFrame(columns=v) for k, v in cols.items()}
+        return cls(t["off"], t["def"], t["fg"], t["punt"], weeks=[], sums={c: {} for c in FILL_COLS})
+
+    @classmethod
+    def from_clean(cls, df):
+        """State after every week in a cleaned pbp table (e.g. data/pbp_clean_2016_2024.csv)."""
+        df = df.copy()
+        for c in df.select_dtypes("category").columns:     # Parquet copies load team codes as categories
+            df[c] = df[c].astype(object)
+        dec = decision_features(df)
+        rates = fg_week_rates(df).astype({"dist_bin": str})
+        state = cls(team_week_epa(df, "posteam"), team_week_epa(df, "defteam"), rates, punt_week_nets(df),
+                    weeks=set(rates["week"]), sums=_team_sums(dec))
+        state.last = {str(int(s)): int(w) for s, w in df.groupby("season")["week"].max().items()}
+        state._trim()
+        return state
+
+    def _trim(self):
+        """Keep only what the next week can look back on: the latest season's tails."""
+        season = max(int(s) for s in self.last) if self.last else None
+        def tail(frame, team, n):
+            frame = frame.loc[frame["season"] == season].sort_values(["season", team, "week"])
+            return frame.groupby(["season", team]).tail(n).reset_index(drop=True)
+        self.off = tail(self.off, "posteam", EPA_WINDOW)
+        self.def_ = tail(self.def_, "defteam", EPA_WINDOW)
+        self.punt = tail(self.punt, "posteam", PUNT_WINDOW)
+        recent = [w for w in self.weeks if w <= self.last.get(str(season), 0)][-FG_WINDOW:]
+        self.fg = self.fg.loc[(self.fg["season"] == season) & self.fg["week"].isin(recent)].reset_index(drop=True)
+
+    def update(self, pbp, fill: bool = True):
+        """
+        Fold in raw pbp for weeks after the state's last week; returns their (pbp_clean,
+        decisions) rows. All weeks of the chunk are built in one pass (each week only looks
+        back, so this equals folding them in one at a time). Gaps in FG% / punt net are filled
+        with the team means as of the end of the chunk, or left for a final pass (fill=False,
+        then fill_team_means(dec, state.sums)).
+        """
+        def hist(t):
+            return t if len(t) else None
+
+        if pbp.empty:
+            return pd.DataFrame(columns=FINAL_COLS), pd.DataFrame()
+        pbp = pbp.reset_index(drop=True)
+        latest = max((int(s) for s in self.last), default=None)
+        for season, weeks in pbp.groupby("season")["week"]:
+            last = self.last.get(str(int(season)))
+            if latest is not None and int(season) < latest:
+                raise ValueError(f"Season {season} is older than the state's season ({latest})")
+            if last is not None and weeks.min() <= last:
+                raise ValueError(f"Week {season}/{int(weeks.min())} is not after the last week folded in ({last})")
+
+        df = clean_pbp(pbp, hist(self.off), hist(self.def_))
+        dec = decision_features(df, hist(self.fg), self.weeks, hist(self.punt))
+        self.sums = _team_sums(dec, self.sums)
+        if fill:
+            dec = fill_team_means(dec, self.sums)
+
+        rates = fg_week_rates(df).astype({"dist_bin": str})
+        self.off = pd.concat([hist(self.off), team_week_epa(df, "posteam")], ignore_index=True)
+        self.def_ = pd.concat([hist(self.def_), team_week_epa(df, "defteam")], ignore_index=True)
+        self.fg = pd.concat([hist(self.fg), rates], ignore_index=True)
+        self.punt = pd.concat([hist(self.punt), punt_week_nets(df)], ignore_index=True)
+        self.weeks = sorted(set(self.weeks) | set(int(w) for w in rates["week"]))
+        self.last.update({str(int(s)): int(w) for s, w in df.groupby("season")["week"].max().items()})
+        self._trim()
+        return df, dec
+
+    def to_dict(self) -> dict:
+        tables = dict(zip(self.TABLES, (self.off, self.def_, self.fg, self.punt)))
+        return {"format": STATE_FORMAT, "weeks": self.weeks, "last": self.last, "sums": self.sums,
+                **{k: t.to_dict(orient="split", index=False) for k, t in tables.items()}}
+
+    @classmethod
+    def from_dict(cls, d):
+        if d.get("format") != STATE_FORMAT:
+            raise ValueError(f"Unsupported feature state format {d.get('format')!r}")
+        t = {k: pd.DataFrame(d[k]["data"], columns=d[k]["columns"]) for k in cls.TABLES}
+        return cls(t["off"], t["def"], t["fg"], t["punt"], d["weeks"], d["sums"], d["last"])
+
+    def save(self, path) -> Path:
+        path = Path(path)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(json.dumps(self.to_dict()))
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        return cls.from_dict(json.loads(Path(path).read_text()))
+
+
+# --- stored tables ---
+def data_paths(data_dir="data") -> dict:
+    d = Path(data_dir)
+    return {"pbp": d / "pbp_clean_2016_2024.csv", "decisions": d / "decisions_2016_2024.csv",
+            "state": d / "feature_state.json", "team_store": d / "team_week.npz"}
+
+
+def _append_rows(csv_path: Path, rows) -> int:
+    """
+    Append rows of (season, week)s the CSV doesn't have yet, and put them in the Parquet copy
+    (if any) replacing the same weeks, so re-running a week after a crash is harmless.
+    """
+    if rows.empty:
+        return 0
+    stored = pd.read_csv(csv_path, usecols=["season", "week"])
+    have = set(zip(stored["season"].astype(int), stored["week"].astype(int)))
+    is_new = [(int(s), int(w)) not in have for s, w in zip(rows["season"], rows["week"])]
+    header = list(pd.read_csv(csv_path, nrows=0).columns)
+    rows = rows.reindex(columns=header)
+    rows.loc[is_new].to_csv(csv_path, mode="a", header=False, index=False)
+
+    root = parquet_path(csv_path)
+    if root.is_dir():
+        if any(next(root.glob("season=*"), root).glob("week=*")):
+            write_parquet(rows, root, by_week=True)
+        else:
+            for season, part in rows.groupby("season"):
+                old = read_parquet(root, seasons=int(season))
+                old = old.loc[~old["week"].isin(part["week"].unique())]
+                write_parquet(pd.concat([old, part], ignore_index=True), root)
+    return int(sum(is_new))
+
+
+def append_week(pbp_path, weeks, season=None, data_dir="data", state_path=None):
+    """Build `weeks` from a local raw pbp file, append to the stored tables, save the state."""
+    paths = data_paths(data_dir)
+    state_path = Path(state_path or paths["state"])
+    if state_path.exists():
+        state = FeatureState.load(state_path)
+    else:
+        state = FeatureState.from_clean(load_table(paths["pbp"], compact=False))
+    df, dec = state.update(load_pbp(pbp_path, seasons=season, weeks=weeks))
+    n_pbp = _append_rows(paths["pbp"], df)
+    n_dec = _append_rows(paths["decisions"], dec)
+    refresh_store(paths["decisions"])
+    state.save(state_path)
+    return n_pbp, n_dec
+
+
+def stream_build(sources, data_dir="data", state_path=None, parquet: bool = True):
+    """
+    From-scratch build that holds one chunk of raw play-by-play at a time. `sources` are, in
+    season/week order, local pbp files (one per season, as nflverse ships them), DataFrames,
+    or seasons (int) to download one at a time. Each chunk is folded through a FeatureState
+    week by week and its rows are appended to the CSVs; a season's Parquet partition is
+    written once the season is complete. The FG% / punt net gaps are filled at the end with
+    the all-time team means, which needs only the decisions table (~1% of the plays).
+    Returns (plays, decisions) written.
+    """
+    import shutil
+
+    paths = data_paths(data_dir)
+    Path(data_dir).mkdir(parents=True, exist_ok=True)
+    for name in ("pbp", "decisions"):
+        paths[name].unlink(missing_ok=True)
+        if parquet:
+            shutil.rmtree(parquet_path(paths[name]), ignore_errors=True)
+
+    state = FeatureState.empty()
+    season_rows, n_pbp = [], 0
+    for src in sources:
+        if isinstance(src, pd.DataFrame):
+            pbp = src
+        elif isinstance(src, (int, np.integer)):
+            from nfl_data_py import import_pbp_data
+            pbp = import_pbp_data([int(src)], columns=RAW_COLS, downcast=True)
+            pbp = pbp.loc[pbp["season_type"] == "REG"]
+        else:
+            pbp = load_pbp(src)
+        df, dec = state.update(pbp, fill=False)
+        del pbp
+        for name, rows in (("pbp", df), ("decisions", dec)):
+            if len(rows):
+                rows.to_csv(paths[name], mode="a", header=not paths[name].exists(), index=False)
+        n_pbp += len(df)
+        if parquet and len(df):
+            # flush seasons that are complete (a later season has started)
+            season_rows.append(df)
+            done = pd.concat(season_rows, ignore_index=True)
+            latest = done["season"].max()
+            if (done["season"] < latest).any():
+                write_parquet(done.loc[done["season"] < latest], parquet_path(paths["pbp"]))
+            season_rows = [done.loc[done["season"] == latest]]
+    if parquet and season_rows:
+        write_parquet(pd.concat(season_rows, ignore_index=True), parquet_path(paths["pbp"]))
+
+    dec = fill_team_means(pd.read_csv(paths["decisions"], low_memory=False), state.sums)
+    dec.to_csv(paths["decisions"], index=False)
+    if parquet:
+        write_parquet(dec, parquet_path(paths["decisions"]))
+    refresh_store(paths["decisions"])
+    state.save(state_path or paths["state"])
+    return n_pbp, len(dec)
+
+
+def check_consistency(pbp, data_dir="data", rtol=1e-6, atol=1e-9) -> pd.DataFrame:
+    """
+    Rebuild the seasons in raw `pbp` from scratch and compare with the stored rows of the same
+    weeks: per table and column, the max abs difference and number of mismatching rows. The
+    fill columns are compared where the rebuild has a value (gap fills use all-time team means).
+    """
+    paths = data_paths(data_dir)
+    df, dec = build_features(pbp, fill=False)
+    report = []
+    for name, built in (("pbp", df), ("decisions", dec)):
+        stored = load_table(paths[name], seasons=sorted(built["season"].unique()),
+                            weeks=sorted(built["week"].unique()), compact=False)
+        m = built.merge(stored, on=KEY, how="left", suffixes=("", "_stored"), indicator=True)
+        report.append({"table": name, "column": "_rows", "max_abs_diff": np.nan,
+                       "mismatches": int((m["_merge"] != "both").sum())})
+        for c in built.columns:
+            if c in KEY or f"{c}_stored" not in m.columns:
+                continue
+            a, b = m[c], m[f"{c}_stored"]
+            if pd.api.types.is_numeric_dtype(a) and pd.api.types.is_numeric_dtype(b):
+                a, b = a.to_numpy(dtype=float), b.to_numpy(dtype=float)
+                both = ~np.isnan(a) & ~np.isnan(b)
+                diff = np.abs(a - b)
+                # rtol covers the float32 Parquet columns
+                bad = (both & ~np.isclose(a, b, rtol=rtol, atol=atol)) | (np.isnan(a) != np.isnan(b))
+                if c in FILL_COLS:
+                    bad &= ~np.isnan(a)
+                mx = float(diff[both].max()) if both.any() else 0.0
+            else:
+                bad = ((a.astype(str) != b.astype(str)) & ~(a.isna() & b.isna())).to_numpy()
+                mx = np.nan
+            report.append({"table": name, "column": c, "max_abs_diff": mx, "mismatches": int(bad.sum())})
+    return pd.DataFrame(report)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Feature build from local play-by-play files.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    ap_add = sub.add_parser("append", help="append new weeks to the stored tables")
+    ap_add.add_argument("--pbp", required=True, help="nflverse play_by_play_<season> .parquet or .csv")
+    ap_add.add_argument("--week", type=int, nargs="+", required=True)
+    ap_add.add_argument("--season", type=int, default=None)
+    ap_add.add_argument("--check", action="store_true",
+                        help="rebuild the file's season(s) from scratch and compare with the stored rows")
+    ap_build = sub.add_parser("build", help="streaming from-scratch build, one file (or season) at a time")
+    ap_build.add_argument("sources", nargs="+", help="pbp files in season order, or seasons to download")
+    for p in (ap_add, ap_build):
+        p.add_argument("--data-dir", default="data")
+    args = ap.parse_args()
+
+    if args.cmd == "build":
+        sources = [int(s) if s.isdigit() else s for s in args.sources]
+        n_pbp, n_dec = stream_build(sources, args.data_dir)
+        print(f"Wrote {n_pbp} plays and {n_dec} decisions")
+    else:
+        n_pbp, n_dec = append_week(args.pbp, args.week, args.season, args.data_dir)
+        print(f"Appended {n_pbp} plays and {n_dec} decisions")
+        if args.check:
+            rep = check_consistency(load_pbp(args.pbp, seasons=args.season), args.data_dir)
+            bad = rep.loc[rep["mismatches"] > 0]
+            print("Consistent with a full rebuild" if bad.empty else bad.to_string(index=False))
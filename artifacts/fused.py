@@ -0,0 +1,263 @@
+"""
+Fused linear scorer for serving.
+
+The preprocessor is median-impute + standard-scale (numeric) and most-frequent-impute +
+one-hot (categorical), and every arm is a Ridge or a ("const", mu) tuple, so each μ̂ is
+linear in the raw numeric inputs plus one weight per category level. We fold all of it
+into one stacked weight matrix W with one column per (metric, action):
+
+    row 0                  -> bias (intercept minus the scaler's mean shift)
+    rows 1..n_num          -> coef / scale for each numeric feature
+    next rows              -> one row per one-hot level, column by column
+    last row               -> zeros (unknown level, like handle_unknown="ignore")
+
+Scoring is then a matmul over the imputed numeric block plus integer row lookups for
+the categories; no DataFrame and no sklearn at request time.
+
+Export:  python artifacts/fused.py   (writes artifacts/fused_weights.npz)
+"""
+import json
+import numpy as np
+from pathlib import Path
+
+METRICS = ["epa", "wpa"]
+
+
+def preprocessor_params(pre) -> dict:
+    """Plain arrays from the fitted ColumnTransformer (num: median + scale, cat: fill + one-hot)."""
+    names = [t[0] for t in pre.transformers_ if t[0] != "remainder"]
+    if names != ["num", "cat"]:
+        raise ValueError(f"Unexpected preprocessor layout: {names} (expected num + cat)")
+    _, num_tf, num_cols = pre.transformers_[0]
+    _, cat_tf, cat_cols = pre.transformers_[1]
+
+    num_imp = num_tf.named_steps["simpleimputer"]
+    scaler = num_tf.named_steps["standardscaler"]
+    cat_imp = cat_tf.named_steps["simpleimputer"]
+    ohe = cat_tf.named_steps["onehotencoder"]
+    if ohe.drop is not None:
+        raise ValueError("OneHotEncoder(drop=...) is not supported by the fused scorer")
+
+    n_num = len(num_cols)
+    mean = scaler.mean_ if scaler.with_mean else np.zeros(n_num)
+    scale = scaler.scale_ if scaler.with_std else np.ones(n_num)
+    return {
+        "num_cols": list(num_cols),
+        "num_median": np.asarray(num_imp.statistics_, dtype=float),
+        "num_mean": np.asarray(mean, dtype=float),
+        "num_scale": np.asarray(scale, dtype=float),
+        "cat_cols": list(cat_cols),
+        "cat_fill": [str(v) for v in cat_imp.statistics_],
+        "cat_vocab": [[str(v) for v in c] for c in ohe.categories_],
+    }
+
+
+def extract_params(pre, arm_models: dict, actions) -> dict:
+    """
+    Pull plain arrays out of the fitted ColumnTransformer and per-arm models.
+    arm_models: {"epa": {action: model}, "wpa": {action: model}}
+    """
+    params = {"actions": list(actions), **preprocessor_params(pre)}
+    d = len(params["num_cols"]) + sum(len(v) for v in params["cat_vocab"])
+    for metric in METRICS:
+        coef = np.zeros((len(actions), d))
+        intercept = np.zeros(len(actions))
+        for j, a in enumerate(actions):
+            m = arm_models[metric][a]
+            if isinstance(m, tuple) and m[0] == "const":
+                intercept[j] = float(m[1])
+            else:
+                coef[j] = np.asarray(m.coef_, dtype=float).reshape(-1)
+                intercept[j] = float(m.intercept_)
+        params[f"arm_{metric}_coef"] = coef
+        params[f"arm_{metric}_intercept"] = intercept
+    return params
+
+
+def fold_weights(params: dict) -> np.ndarray:
+    """Fold scaler stats and arm coefficients into W of shape (1 + n_num + n_levels + 1, 2K)."""
+    n_num = len(params["num_cols"])
+    mean, scale = params["num_mean"], params["num_scale"]
+    cols = []
+    for metric in METRICS:
+        coef = params[f"arm_{metric}_coef"]              # (K, d) in preprocessed space
+        intercept = params[f"arm_{metric}_intercept"]    # (K,)
+        c_num = coef[:, :n_num] / scale                  # per raw unit
+        bias = intercept - c_num @ mean
+        cols.append(np.vstack([bias[None, :], c_num.T, coef[:, n_num:].T,
+                               np.zeros((1, coef.shape[0]))]))
+    return np.hstack(cols)
+
+
+class FusedScorer:
+    """Pure-NumPy μ̂ for every (metric, action) from the folded weight matrix."""
+
+    def __init__(self, W, actions, num_cols, num_median, cat_cols, cat_fill, cat_vocab,
+                 num_mean=None, num_scale=None):
+        self.W = np.ascontiguousarray(W, dtype=float)
+        self.actions = list(actions)
+        self.num_cols = list(num_cols)
+        self.num_median = np.asarray(num_median, dtype=float)
+        # scaler stats are only needed to rebuild the preprocessed design (see design())
+        self.num_mean = None if num_mean is None else np.asarray(num_mean, dtype=float)
+        self.num_scale = None if num_scale is None else np.asarray(num_scale, dtype=float)
+        self.cat_cols = list(cat_cols)
+        self.cat_fill = [str(v) for v in cat_fill]
+        self.cat_vocab = [[str(v) for v in c] for c in cat_vocab]
+        self.K = len(self.actions)
+
+        n_num = len(self.num_cols)
+        self.W_bias = self.W[0]
+        self.W_num = self.W[1:1 + n_num]
+        self.unknown_row = self.W.shape[0] - 1
+        self.d = self.W.shape[0] - 2          # width of the preprocessed design
+
+        # value -> row of W, per categorical column; missing values use the imputer's fill
+        self.lookup, self.fill_row = [], []
+        row = 1 + n_num
+        for vocab, fill in zip(self.cat_vocab, self.cat_fill):
+            table = {v: row + i for i, v in enumerate(vocab)}
+            self.lookup.append(table)
+            self.fill_row.append(table.get(fill, self.unknown_row))
+            row += len(vocab)
+
+    @classmethod
+    def from_params(cls, params: dict) -> "FusedScorer":
+        return cls(fold_weights(params), params["actions"], params["num_cols"],
+                   params["num_median"], params["cat_cols"], params["cat_fill"],
+                   params["cat_vocab"], params["num_mean"], params["num_scale"])
+
+    @classmethod
+    def from_sklearn(cls, pre, arm_epa: dict, arm_wpa: dict, actions) -> "FusedScorer":
+        return cls.from_params(extract_params(pre, {"epa": arm_epa, "wpa": arm_wpa}, actions))
+
+    # --- persistence (plain arrays, no pickle) ---
+    def save(self, path) -> None:
+        extra = {}
+        if self.num_mean is not None:
+            extra = {"num_mean": self.num_mean, "num_scale": self.num_scale}
+        np.savez(path, W=self.W, actions=np.array(self.actions), num_cols=np.array(self.num_cols),
+                 num_median=self.num_median, cat_cols=np.array(self.cat_cols),
+                 cat_fill=np.array(self.cat_fill),
+                 cat_vocab=np.array([v for vocab in self.cat_vocab for v in vocab]),
+                 cat_vocab_sizes=np.array([len(v) for v in self.cat_vocab], dtype=np.int64),
+                 **extra)
+
+    @classmethod
+    def load(cls, path) -> "FusedScorer":
+        z = np.load(path, allow_pickle=False)
+        flat = [str(v) for v in z["cat_vocab"]]
+        vocab, i = [], 0
+        for n in z["cat_vocab_sizes"]:
+            vocab.append(flat[i:i + n])
+            i += n
+        return cls(z["W"], [str(a) for a in z["actions"]], [str(c) for c in z["num_cols"]],
+                   z["num_median"], [str(c) for c in z["cat_cols"]],
+                   [str(v) for v in z["cat_fill"]], vocab,
+                   z["num_mean"] if "num_mean" in z else None,
+                   z["num_scale"] if "num_scale" in z else None)
+
+    # --- encoding ---
+    def _cat_row(self, j: int, v) -> int:
+        if isinstance(v, str):
+            return self.lookup[j].get(v.strip(), self.unknown_row)
+        if isinstance(v, float) and v != v:      # NaN is imputed with the most frequent level
+            return self.fill_row[j]
+        # None is not treated as missing by SimpleImputer on object columns; it falls
+        # through OneHotEncoder(handle_unknown="ignore") as all zeros
+        return self.lookup[j].get(v, self.unknown_row)
+
+    def _cat_rows(self, j: int, values) -> np.ndarray:
+        """Vectorized _cat_row over one column (each distinct value is resolved once)."""
+        import pandas as pd
+        values = np.asarray(values, dtype=object)
+        codes, uniques = pd.factorize(values)                      # missing -> -1
+        table = np.array([self._cat_row(j, u) for u in uniques] + [self.unknown_row], dtype=np.intp)
+        rows = table[codes]
+        na = np.flatnonzero(codes == -1)
+        if na.size:                                                # None vs NaN matter, see _cat_row
+            rows[na] = [self._cat_row(j, v) for v in values[na]]
+        return rows
+
+    def encode(self, contexts):
+        """
+        List of context dicts or a DataFrame ->
+          X_num (N, n_num) raw numerics with medians filled, R (N, n_cat) int rows of W.
+        """
+        n = len(contexts)
+        is_frame = hasattr(contexts, "columns")
+        X = np.empty((n, len(self.num_cols)))
+        for k, c in enumerate(self.num_cols):
+            if is_frame:
+                X[:, k] = (contexts[c].to_numpy(dtype=float, na_value=np.nan)
+                           if c in contexts.columns else np.nan)
+            else:
+                X[:, k] = np.array([ctx.get(c) for ctx in contexts], dtype=float)
+        X = np.where(np.isnan(X), self.num_median, X)
+
+        R = np.empty((n, len(self.cat_cols)), dtype=np.intp)
+        for j, c in enumerate(self.cat_cols):
+            if is_frame:
+                vals = contexts[c].to_numpy(dtype=object) if c in contexts.columns else [None] * n
+            else:
+                vals = [ctx.get(c) for ctx in contexts]
+            R[:, j] = self._cat_rows(j, vals)
+        return X, R
+
+    def design(self, X, R, sparse: bool = False):
+        """
+        Rebuild the preprocessed design (what PRE.transform returns) from encoded inputs;
+        with sparse=True as a scipy CSR matrix (one-hot levels never materialized densely).
+        """
+        if self.num_mean is None:
+            raise ValueError("design() needs scaler stats; rebuild the scorer from params")
+        n, n_num = X.shape
+        if sparse:
+            from scipy import sparse as sp
+            known = R != self.unknown_row
+            ii = np.concatenate([np.repeat(np.arange(n), n_num), np.nonzero(known)[0]])
+            jj = np.concatenate([np.tile(np.arange(n_num), n), R[known] - 1])
+            vals = np.concatenate([((X - self.num_mean) / self.num_scale).ravel(), np.ones(known.sum())])
+            return sp.csr_matrix((vals, (ii, jj)), shape=(n, self.d))
+        Z = np.zeros((n, self.d))
+        Z[:, :n_num] = (X - self.num_mean) / self.num_scale
+        ii, jj = np.nonzero(R != self.unknown_row)
+        Z[ii, R[ii, jj] - 1] = 1.0
+        return Z
+
+    # --- scoring ---
+    def score_encoded(self, X, R) -> np.ndarray:
+        """(N, 2K) μ̂: EPA actions in columns [0, K), WPA actions in [K, 2K)."""
+        return X @ self.W_num + self.W_bias + self.W[R].sum(axis=1)
+
+    def score(self, contexts):
+        """Return (MU_epa (N,K), MU_wpa (N,K)) for context dicts or a DataFrame (no constraints)."""
+        MU = self.score_encoded(*self.encode(contexts))
+        return MU[:, :self.K], MU[:, self.K:]
+
+    def score_one(self, context: dict):
+        """Single-context fast path: returns (mu_epa (K,), mu_wpa (K,))."""
+        x = np.empty(len(self.num_cols))
+        for k, c in enumerate(self.num_cols):
+            v = context.get(c)
+            x[k] = np.nan if v is None else float(v)
+        x = np.where(x != x, self.num_median, x)
+        mu = x @ self.W_num + self.W_bias
+        for j, c in enumerate(self.cat_cols):
+            mu += self.W[self._cat_row(j, context.get(c))]
+        return mu[:self.K], mu[self.K:]
+
+
+if __name__ == "__main__":
+    import joblib
+
+    art = Path(__file__).parent
+    meta_actions = json.load(open(art / "metadata.json"))["actions"]
+    scorer = FusedScorer.from_sklearn(
+        joblib.load(art / "preprocessor.joblib"),
+        joblib.load(art / "arm_models_epa.joblib"),
+        joblib.load(art / "arm_models_wpa.joblib"),
+        meta_actions,
+    )
+    scorer.save(art / "fused_weights.npz")
+    print("Fused weights saved:", art / "fused_weights.npz", scorer.W.shape)
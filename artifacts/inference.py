@@ -1,18 +1,258 @@
-import json, joblib, numpy as np, pandas as pd
+import json, os, threading, time
+import numpy as np
+from collections import OrderedDict
 from pathlib import Path
 
-ART = Path("artifacts")
+try:
+    from .fused import FusedScorer
+    from .instrument import entry, stage
+    from .array_store import load_arrays, params_from_arrays
+    from .linucb import DEFAULT_ALPHA, POSTERIOR_KEYS, confidence_widths
+    from .online import arm_models, load_checkpoint
+except ImportError:  # run as a script from artifacts/
+    from fused import FusedScorer
+    from instrument import entry, stage
+    from array_store import load_arrays, params_from_arrays
+    from linucb import DEFAULT_ALPHA, POSTERIOR_KEYS, confidence_widths
+    from online import arm_models, load_checkpoint
 
-# load shared artifcacts
-META = json.load(open(ART / "metadata.json"))
-ACTIONS = META["actions"]                              # order must match training
-NUMERIC_FEATURES = META["numeric_features"]
-CATEGORICAL_FEATURES = META["categorical_features"]
-FEATURE_COLS = META["feature_cols"]
+# artifacts live next to this file unless NFL4TH_ARTIFACTS points elsewhere.
+# pandas / sklearn / joblib are only imported when a model is first used.
+ART = Path(os.environ.get("NFL4TH_ARTIFACTS") or Path(__file__).resolve().parent)
 
-PRE = joblib.load(ART / "preprocessor.joblib")
-ARM_EPA = joblib.load(ART / "arm_models_epa.joblib")
-ARM_WPA = joblib.load(ART / "arm_models_wpa.joblib")
+
+class ModelBundle:
+    """
+    Artifacts from one directory. Metadata and each model are loaded on first use,
+    so constructing a bundle is cheap. Use get_bundle() to share loaded bundles
+    across a process.
+
+    backend: "joblib" serves from the pickled sklearn objects; "arrays" serves entirely
+    from the pickle-free arrays/ format (see array_store.py), memory-mapped read-only;
+    "auto" (default, or NFL4TH_BACKEND) uses joblib when preprocessor.joblib exists.
+
+    Online checkpoints (online_{epa,wpa}.npz, see online.py) override the trained arms
+    and LinUCB factors of their metric on either backend.
+    """
+    FILES = {
+        "meta": "metadata.json",
+        "pre": "preprocessor.joblib",
+        "arm_epa": "arm_models_epa.joblib",
+        "arm_wpa": "arm_models_wpa.joblib",
+        "behavior": "behavior_policy.joblib",
+        "fused": "fused_weights.npz",
+        "arrays": "arrays",
+        "online_epa": "online_epa.npz",
+        "online_wpa": "online_wpa.npz",
+    }
+
+    def __init__(self, art_dir=None, backend: str = None):
+        self.dir = Path(art_dir or ART).resolve()
+        backend = backend or os.environ.get("NFL4TH_BACKEND") or "auto"
+        if backend == "auto":
+            backend = "joblib" if self.path("pre").exists() else "arrays"
+        if backend not in ("joblib", "arrays"):
+            raise ValueError(f"Unknown backend {backend!r} (expected 'joblib', 'arrays' or 'auto')")
+        self.backend = backend
+        self._loaded = {}
+        self._lock = threading.RLock()
+
+    def __repr__(self):
+        return f"ModelBundle({str(self.dir)!r}, backend={self.backend!r}, loaded={sorted(self._loaded)})"
+
+    def path(self, name: str) -> Path:
+        return self.dir / self.FILES[name]
+
+    def _get(self, name: str, loader):
+        try:
+            return self._loaded[name]
+        except KeyError:
+            pass
+        with self._lock:
+            if name not in self._loaded:
+                with stage(f"load:{name}"):
+                    self._loaded[name] = loader(self.path(name))
+            return self._loaded[name]
+
+    @staticmethod
+    def _joblib(path):
+        import joblib
+        return joblib.load(path)
+
+    # shared metadata (order of actions must match training)
+    @property
+    def meta(self) -> dict:
+        return self._get("meta", lambda p: json.load(open(p)))
+
+    @property
+    def actions(self) -> list:
+        return self.meta["actions"]
+
+    @property
+    def numeric_features(self) -> list:
+        return self.meta["numeric_features"]
+
+    @property
+    def categorical_features(self) -> list:
+        return self.meta["categorical_features"]
+
+    @property
+    def feature_cols(self) -> list:
+        return self.meta["feature_cols"]
+
+    # models
+    @property
+    def pre(self):
+        return self._get("pre", self._joblib)
+
+    def online(self, metric: str):
+        """Online checkpoint arrays for a metric, or None if online.py hasn't written one."""
+        name = f"online_{metric.lower()}"
+        return self._get(name, lambda p: load_checkpoint(p, self.actions) if p.exists() else None)
+
+    def _arms(self, metric: str) -> dict:
+        ck = self.online(metric)
+        if ck is not None:
+            return arm_models(ck, self.actions)
+        return self._joblib(self.path(f"arm_{metric}"))
+
+    @property
+    def arm_epa(self) -> dict:
+        return self._get("arm_epa", lambda p: self._arms("epa"))
+
+    @property
+    def arm_wpa(self) -> dict:
+        return self._get("arm_wpa", lambda p: self._arms("wpa"))
+
+    @property
+    def behavior(self):
+        return self._get("behavior", self._joblib)
+
+    @property
+    def arrays(self) -> dict:
+        """Pickle-free parameters, memory-mapped read-only (shared across forked workers)."""
+        return self._get("arrays", lambda p: load_arrays(self.dir))
+
+    @property
+    def fused(self) -> FusedScorer:
+        """
+        Folded weights: built from arrays/ on the arrays backend, else read from
+        fused_weights.npz, or folded in-process if that export is missing or an
+        online checkpoint overrides the arms.
+        """
+        def load(path):
+            online = {m: self.online(m) for m in ("epa", "wpa")}
+            if self.backend == "arrays":
+                params = params_from_arrays(self.arrays, self.meta)
+                for m, ck in online.items():
+                    if ck is not None:
+                        params[f"arm_{m}_coef"] = ck["arm_coef"]
+                        params[f"arm_{m}_intercept"] = ck["arm_intercept"]
+                return FusedScorer.from_params(params)
+            if path.exists() and not any(ck is not None for ck in online.values()):
+                return FusedScorer.load(path)
+            return FusedScorer.from_sklearn(self.pre, self.arm_epa, self.arm_wpa, self.actions)
+        return self._get("fused", load)
+
+    def linucb_chol(self, metric: str) -> np.ndarray:
+        """(K, d, d) per-arm Cholesky factors of X_a^T X_a + λI (online checkpoint, else training)."""
+        ck = self.online(metric)
+        if ck is not None:
+            return ck["chol"]
+        name = f"linucb_{metric.lower()}_chol"
+        try:
+            arrays = self.arrays
+        except FileNotFoundError:
+            arrays = {}
+        if name not in arrays:
+            raise FileNotFoundError(f"{name} not found under {self.path('arrays')}; "
+                                    "run the save_linucb cell of the behavior notebooks")
+        return arrays[name]
+
+    def posterior(self, metric: str) -> dict:
+        """Ridge-arm posterior arrays {factor, xbar, sigma2, n} for a metric (see posterior.py)."""
+        names = {k: f"posterior_{metric.lower()}_{k}" for k in POSTERIOR_KEYS}
+        try:
+            arrays = self.arrays
+        except FileNotFoundError:
+            arrays = {}
+        if not all(n in arrays for n in names.values()):
+            raise FileNotFoundError(f"posterior_{metric.lower()}_* not found under {self.path('arrays')}; "
+                                    "export them with array_store.save_posterior (retrain.py does)")
+        return {k: arrays[n] for k, n in names.items()}
+
+    # scoring against this bundle
+    def score_batch(self, contexts, metric: str = "wpa", policy: str = "greedy",
+                    alpha: float = DEFAULT_ALPHA):
+        return score_batch(contexts, metric, policy, alpha, bundle=self)
+
+    def score_context(self, context: dict, metric: str = "wpa", policy: str = "greedy",
+                      alpha: float = DEFAULT_ALPHA):
+        return score_context(context, metric, policy, alpha, bundle=self)
+
+    def linucb_batch(self, contexts, metric: str = "wpa", alpha: float = DEFAULT_ALPHA):
+        return linucb_batch(contexts, metric, alpha, bundle=self)
+
+    def score_context_fast(self, context: dict, metric: str = "wpa"):
+        return score_context_fast(context, metric, bundle=self)
+
+    def behavior_proba(self, contexts):
+        return behavior_proba(contexts, bundle=self)
+
+
+def _mtimes(art_dir: Path) -> tuple:
+    out = []
+    for f in ModelBundle.FILES.values():
+        try:
+            out.append(os.stat(art_dir / f).st_mtime_ns)
+        except FileNotFoundError:
+            out.append(None)
+    return tuple(out)
+
+# process-level cache: (artifact dir, file mtimes) -> bundle
+_BUNDLES = OrderedDict()
+_BUNDLES_MAX = 8
+_BUNDLES_LOCK = threading.Lock()
+_LAST_CHECK = {}            # (artifact dir, backend) -> (monotonic time of last stat, cache key)
+RELOAD_CHECK_S = 1.0        # how often get_bundle() re-stats a directory
+
+def get_bundle(art_dir=None, backend: str = None) -> ModelBundle:
+    """
+    Shared bundle for an artifact directory (default: ART). The cache is keyed by
+    directory and file mtimes, so re-exported artifacts get a fresh bundle while
+    bundles for other directories / versions keep serving side by side.
+    """
+    d = Path(art_dir or ART).resolve()
+    backend = backend or os.environ.get("NFL4TH_BACKEND") or "auto"
+    now = time.monotonic()
+    last = _LAST_CHECK.get((d, backend))
+    if last is not None and now - last[0] < RELOAD_CHECK_S:
+        b = _BUNDLES.get(last[1])
+        if b is not None:
+            return b
+    with _BUNDLES_LOCK:
+        key = (d, backend, _mtimes(d))
+        b = _BUNDLES.get(key)
+        if b is None:
+            b = _BUNDLES[key] = ModelBundle(d, backend)
+            while len(_BUNDLES) > _BUNDLES_MAX:
+                _BUNDLES.popitem(last=False)
+        else:
+            _BUNDLES.move_to_end(key)
+        _LAST_CHECK[(d, backend)] = (now, key)
+        return b
+
+# module-level names kept for existing callers (app.py, notebooks); resolved lazily
+_LEGACY = {
+    "META": "meta", "ACTIONS": "actions", "NUMERIC_FEATURES": "numeric_features",
+    "CATEGORICAL_FEATURES": "categorical_features", "FEATURE_COLS": "feature_cols",
+    "PRE": "pre", "ARM_EPA": "arm_epa", "ARM_WPA": "arm_wpa",
+}
+
+def __getattr__(name):
+    if name in _LEGACY:
+        return getattr(get_bundle(), _LEGACY[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def _kick_distance_yards(yardline_100: float) -> float:
     # distance to posts + 17-yards snap/placement
@@ -65,32 +305,110 @@ def _punt_infeasible(context: dict) -> tuple[bool, str]:
     return False, ""
 
 
-def _apply_action_constraints(context: dict, mu_epa, mu_wpa, actions):
+# --- Vectorized versions of the rules above (one value per row) ---
+# defaults mirror the `context.get(key, default) or default` lookups in the scalar rules
+_CONSTRAINT_DEFAULTS = {
+    "yardline_100": 99, "qtr": 1, "game_seconds_remaining": 3600,
+    "score_differential": 0, "ydstogo": 10, "roof": "outdoors", "wind": 0, "temp": 60,
+}
+
+def _constraint_cols(contexts) -> dict:
+    """Pull the raw columns the constraint rules need from a dict, list of dicts or DataFrame."""
+    import pandas as pd
+    if isinstance(contexts, dict):
+        contexts = [contexts]
+    if isinstance(contexts, pd.DataFrame):
+        n = len(contexts)
+        return {k: (contexts[k].reset_index(drop=True) if k in contexts.columns
+                    else pd.Series([d] * n, dtype=object))
+                for k, d in _CONSTRAINT_DEFAULTS.items()}
+    # object dtype keeps None distinct from NaN, like the scalar rules see it
+    return {k: pd.Series([c.get(k, d) for c in contexts], dtype=object)
+            for k, d in _CONSTRAINT_DEFAULTS.items()}
+
+def _num_or(s, default: float) -> np.ndarray:
+    """Vectorized `float(v or default)`: None/0/"" fall back to default, NaN passes through."""
+    import pandas as pd
+    if s.dtype == object:
+        s = s.map(lambda v: v if v else default)
+    v = pd.to_numeric(s, errors="coerce").to_numpy(dtype=float)
+    return np.where(v == 0, float(default), v)
+
+def _fg_max_range_cols(cols: dict) -> np.ndarray:
+    """Column version of _fg_max_range."""
+    roof = cols["roof"].astype(str).str.lower().to_numpy()
+    wind = _num_or(cols["wind"], 0)
+    temp = _num_or(cols["temp"], 60)
+
+    dome = roof == "dome"
+    outdoors = roof == "outdoors"
+    max_fg = np.full(len(roof), 65.0)
+    max_fg[dome] += 3.0
+    max_fg[outdoors & (wind >= 15)] -= 3.0
+    max_fg[outdoors & (temp <= 20)] -= 2.0
+    return np.clip(max_fg, 55.0, 70.0)
+
+def _punt_infeasible_cols(cols: dict) -> np.ndarray:
+    """Column version of _punt_infeasible (flags only; reasons stay with the scalar rule)."""
+    yd100 = _num_or(cols["yardline_100"], 99)
+    qtr   = np.trunc(_num_or(cols["qtr"], 1))
+    gsr   = np.trunc(_num_or(cols["game_seconds_remaining"], 3600))
+    sd    = _num_or(cols["score_differential"], 0)
+    ytg   = _num_or(cols["ydstogo"], 10)
+
+    r1 = yd100 <= 35
+    r2 = (qtr == 4) & (gsr <= 300) & (sd <= 0) & (yd100 <= 50) & (ytg <= 5)
+    return r1 | r2
+
+
+def _apply_action_constraints(context, mu_epa, mu_wpa, actions):
     """
     In-place masks on MU arrays for impossible/implausible actions.
-    Currently: mask FG attempts beyond max range.
+    `context` is a single dict (MU shape (1,K)) or a list of dicts / DataFrame (MU shape (N,K)).
+    Currently: mask FG attempts beyond max range and punts ruled out by _punt_infeasible.
     """
+    if isinstance(context, dict):
+        _apply_action_constraints_one(context, mu_epa, mu_wpa, actions)
+        return
+
+    cols = _constraint_cols(context)
+
+    if "fg" in actions:
+        j_fg = actions.index("fg")
+        kick_dist = _num_or(cols["yardline_100"], 99) + 17.0   # see _kick_distance_yards
+        too_far = kick_dist > _fg_max_range_cols(cols)
+        # make fg unpickable
+        mu_epa[too_far, j_fg] = -1e9
+        mu_wpa[too_far, j_fg] = -1e9
+
+    if "punt" in actions:
+        j_p = actions.index("punt")
+        bad = _punt_infeasible_cols(cols)
+        mu_epa[bad, j_p] = -1e9
+        mu_wpa[bad, j_p] = -1e9
+
+
+def _apply_action_constraints_one(context: dict, mu_epa, mu_wpa, actions):
+    """Scalar path of _apply_action_constraints for one dict (no pandas)."""
     if "fg" in actions:
         j_fg = actions.index("fg")
         yd100 = float(context.get("yardline_100", 99) or 99)
-        kick_dist = _kick_distance_yards(yd100)
-        max_fg = _fg_max_range(context)
-        if kick_dist > max_fg:
-            # make fg unpickable
-            mu_epa[:, j_fg] = -1e9
-            mu_wpa[:, j_fg] = -1e9
+        if _kick_distance_yards(yd100) > _fg_max_range(context):
+            mu_epa[..., j_fg] = -1e9
+            mu_wpa[..., j_fg] = -1e9
 
     if "punt" in actions:
         j_p = actions.index("punt")
         bad, _ = _punt_infeasible(context)
         if bad:
-            mu_epa[:, j_p] = -1e9
-            mu_wpa[:, j_p] = -1e9
+            mu_epa[..., j_p] = -1e9
+            mu_wpa[..., j_p] = -1e9
 
 
-def _predict_per_arm(Xd, arm_models):
-    mu = np.zeros((Xd.shape[0], len(ACTIONS)), dtype=float)
-    for j, a in enumerate(ACTIONS):
+def _predict_per_arm(Xd, arm_models, actions=None):
+    actions = actions or get_bundle().actions
+    mu = np.zeros((Xd.shape[0], len(actions)), dtype=float)
+    for j, a in enumerate(actions):
         m = arm_models[a]
         if isinstance(m, tuple) and m[0] == "const":
             mu[:, j] = m[1]
@@ -98,35 +416,186 @@ def _predict_per_arm(Xd, arm_models):
             mu[:, j] = m.predict(Xd)
     return mu
 
-def _to_df(context_dict: dict) -> pd.DataFrame:
+_CAT_KEYS = ["posteam","defteam","home_team","away_team","posteam_type","roof","surface"]
+
+def _to_df(context_dict: dict, feature_cols=None) -> "pd.DataFrame":
+    import pandas as pd
+    feature_cols = feature_cols or get_bundle().feature_cols
     # ensure all expected columns exist; preprocessor will impute/encode.
-    row = {c: context_dict.get(c, None) for c in FEATURE_COLS}
+    row = {c: context_dict.get(c, None) for c in feature_cols}
     # optional: normalize a few categorical inputs
-    for key in ["posteam","defteam","home_team","away_team","posteam_type","roof","surface"]:
+    for key in _CAT_KEYS:
         if key in row and isinstance(row[key], str):
             row[key] = row[key].strip()
     return pd.DataFrame([row])
 
-def score_context(context: dict, metric: str = "wpa"):
+def _to_frame(contexts, feature_cols=None) -> "pd.DataFrame":
+    """Many-row _to_df: accepts a list of context dicts or a DataFrame."""
+    import pandas as pd
+    feature_cols = feature_cols or get_bundle().feature_cols
+    if isinstance(contexts, pd.DataFrame):
+        df = contexts.reset_index(drop=True).reindex(columns=feature_cols)
+        # missing columns behave like missing dict keys (None, not NaN)
+        for c in feature_cols:
+            if c not in contexts.columns:
+                df[c] = pd.Series([None] * len(df), dtype=object)
+    else:
+        df = pd.DataFrame([{c: ctx.get(c, None) for c in feature_cols} for ctx in contexts],
+                          columns=feature_cols)
+    for key in _CAT_KEYS:
+        if key in df.columns and (df[key].dtype == object or pd.api.types.is_string_dtype(df[key])):
+            try:
+                stripped = df[key].str.strip()
+            except AttributeError:   # no string values in this column
+                continue
+            df[key] = stripped.where(stripped.notna(), df[key])   # non-strings stay as they were
+    return df
+
+POLICIES = ("greedy", "linucb")
+
+def _mu_and_design(contexts, b, need_design: bool):
+    """(MU_epa, MU_wpa, Xd) before constraints; Xd is the dense preprocessed design or None."""
+    actions = b.actions
+    if b.backend == "arrays":
+        f = b.fused                                      # no sklearn on this backend
+        with stage("fused.encode"):
+            X, R = f.encode(contexts)
+        with stage("fused.score"):
+            MU = f.score_encoded(X, R)
+        return MU[:, :f.K], MU[:, f.K:], (f.design(X, R) if need_design else None)
+
+    pre, feature_cols = b.pre, b.feature_cols
+    with stage("to_frame"):
+        df = _to_frame(contexts, feature_cols)
+    with stage("pre.transform"):
+        Xd = pre.transform(df)
+    arm_epa, arm_wpa = b.arm_epa, b.arm_wpa
+    with stage("predict_arms"):
+        MU_epa = _predict_per_arm(Xd, arm_epa, actions)   # shape (N,K)
+        MU_wpa = _predict_per_arm(Xd, arm_wpa, actions)   # shape (N,K)
+    return MU_epa, MU_wpa, (Xd if need_design else None)
+
+def _with_team_feats(contexts, team_store):
+    """Contexts with the team metrics taken from a TeamWeekStore (by season / week / posteam)."""
+    import pandas as pd
+    df = contexts if isinstance(contexts, pd.DataFrame) else pd.DataFrame(list(contexts))
+    return team_store.attach(df)
+
+def _score(contexts, metric: str, policy: str, alpha: float, b, team_store=None):
+    """Shared body of score_batch / linucb_batch: (MU_epa, MU_wpa, rec, linucb parts or None)."""
+    if policy not in POLICIES:
+        raise ValueError(f"Unknown policy {policy!r} (expected one of {POLICIES})")
+    if team_store is not None and len(contexts):
+        with stage("team_feats"):
+            contexts = _with_team_feats(contexts, team_store)
+    actions = b.actions
+    n = len(contexts)
+    if n == 0:
+        empty = np.zeros((0, len(actions)), dtype=float)
+        ucb = None
+        if policy == "linucb":
+            ucb = {"mu": empty.copy(), "bonus": empty.copy(), "ucb": empty.copy()}
+        return empty, empty.copy(), np.array([], dtype=object), ucb
+
+    chol = b.linucb_chol(metric) if policy == "linucb" else None
+    MU_epa, MU_wpa, Xd = _mu_and_design(contexts, b, chol is not None)
+    with stage("constraints"):
+        _apply_action_constraints(contexts, MU_epa, MU_wpa, actions)
+
+    pick = MU_wpa if metric.lower() == "wpa" else MU_epa
+    if chol is None:
+        rec = np.asarray(actions, dtype=object)[np.argmax(pick, axis=1)]
+        return MU_epa, MU_wpa, rec, None
+
+    # UCB_a = μ̂_a + α ||L_a^(-1) x||; masked actions keep their -1e9 score
+    with stage("linucb.bonus"):
+        bonus = alpha * confidence_widths(Xd, chol)
+    bonus[pick <= -1e9] = 0.0
+    ucb = pick + bonus
+    rec = np.asarray(actions, dtype=object)[np.argmax(ucb, axis=1)]
+    return MU_epa, MU_wpa, rec, {"mu": pick, "bonus": bonus, "ucb": ucb}
+
+def score_batch(contexts, metric: str = "wpa", policy: str = "greedy",
+                alpha: float = DEFAULT_ALPHA, bundle=None, team_store=None):
+    """
+    Score many contexts in one pass and return:
+      MU_epa: (N,K) array of μ̂_EPA (columns in ACTIONS order)
+      MU_wpa: (N,K) array of μ̂_WPA
+      recommended: (N,) array of action names (argmax of chosen metric, or of its
+                   upper confidence bound when policy="linucb")
+    `contexts` is a list of context dicts or a DataFrame with FEATURE_COLS columns.
+    `bundle` defaults to get_bundle(). With a `team_store` (team_store.TeamWeekStore) the
+    team metrics come from the store by season / week / posteam instead of the contexts.
+    """
+    with entry("score_batch"):
+        MU_epa, MU_wpa, rec, _ = _score(contexts, metric, policy, alpha, bundle or get_bundle(),
+                                        team_store)
+    return MU_epa, MU_wpa, rec
+
+def linucb_batch(contexts, metric: str = "wpa", alpha: float = DEFAULT_ALPHA, bundle=None) -> dict:
+    """
+    LinUCB over many contexts, from the Cholesky factors persisted at training time:
+      mu, bonus, ucb: (N,K) arrays for the chosen metric (ucb = mu + bonus)
+      recommended:    (N,) array of action names (argmax of ucb)
+    """
+    with entry("linucb_batch"):
+        _, _, rec, out = _score(contexts, metric, "linucb", alpha, bundle or get_bundle())
+    return {**out, "recommended": rec}
+
+def score_context(context: dict, metric: str = "wpa", policy: str = "greedy",
+                  alpha: float = DEFAULT_ALPHA, bundle=None):
     """
     Score one context and return:
       epa_scores: dict(action -> μ̂_EPA)
       wpa_scores: dict(action -> μ̂_WPA)
-      recommended_action: str (argmax of chosen metric)
-      details: {"epa": epa_scores, "wpa": wpa_scores}
+      recommended_action: str (argmax of chosen metric, or of its UCB for policy="linucb")
+      details: {"epa": epa_scores, "wpa": wpa_scores}, plus for policy="linucb"
+               "linucb": {"alpha", "mu", "bonus", "ucb"} with one value per action
     """
-    df1 = _to_df(context)
-    Xd = PRE.transform(df1)
+    b = bundle or get_bundle()
+    with entry("score_context"):
+        MU_epa, MU_wpa, rec, ucb = _score([context], metric, policy, alpha, b)
 
-    MU_epa = _predict_per_arm(Xd, ARM_EPA)   # shape (1,K)
-    MU_wpa = _predict_per_arm(Xd, ARM_WPA)   # shape (1,K)
+    epa_scores = {a: float(MU_epa[0, i]) for i, a in enumerate(b.actions)}
+    wpa_scores = {a: float(MU_wpa[0, i]) for i, a in enumerate(b.actions)}
+    details = {"epa": epa_scores, "wpa": wpa_scores}
+    if ucb is not None:
+        details["linucb"] = {"alpha": float(alpha),
+                             **{k: {a: float(ucb[k][0, i]) for i, a in enumerate(b.actions)}
+                                for k in ("mu", "bonus", "ucb")}}
+    return epa_scores, wpa_scores, str(rec[0]), details
 
-    _apply_action_constraints(context, MU_epa, MU_wpa, ACTIONS)
+def score_context_fast(context: dict, metric: str = "wpa", bundle=None):
+    """
+    Same contract as score_context, served from the fused weight matrix
+    (no DataFrame, no sklearn). Agrees with score_context up to float rounding.
+    """
+    b = bundle or get_bundle()
+    actions = b.actions
+    with entry("score_context_fast"):     # no inner stages: the whole call is ~20µs
+        mu_epa, mu_wpa = b.fused.score_one(context)
+        _apply_action_constraints(context, mu_epa, mu_wpa, actions)
 
-    pick = MU_wpa if metric.lower() == "wpa" else MU_epa
-    j = int(np.argmax(pick[0]))
-    rec = ACTIONS[j]
+    pick = mu_wpa if metric.lower() == "wpa" else mu_epa
+    rec = actions[int(np.argmax(pick))]
 
-    epa_scores = {a: float(MU_epa[0, i]) for i, a in enumerate(ACTIONS)}
-    wpa_scores = {a: float(MU_wpa[0, i]) for i, a in enumerate(ACTIONS)}
+    epa_scores = {a: float(mu_epa[i]) for i, a in enumerate(actions)}
+    wpa_scores = {a: float(mu_wpa[i]) for i, a in enumerate(actions)}
     return epa_scores, wpa_scores, rec, {"epa": epa_scores, "wpa": wpa_scores}
+
+def behavior_proba(contexts, bundle=None) -> np.ndarray:
+    """π_b(a|x) from the behavior policy, shape (N,K) with columns in ACTIONS order."""
+    with entry("behavior_proba"):
+        return _behavior_proba(contexts, bundle or get_bundle())
+
+def _behavior_proba(contexts, b) -> np.ndarray:
+    if b.backend == "arrays":
+        f = b.fused
+        Z = f.design(*f.encode(contexts))
+        logits = Z @ np.asarray(b.arrays["behavior_coef"]).T + b.arrays["behavior_intercept"]
+        logits -= logits.max(axis=1, keepdims=True)
+        P = np.exp(logits)
+        return P / P.sum(axis=1, keepdims=True)
+    P_raw = b.behavior.predict_proba(_to_frame(contexts, b.feature_cols))
+    classes = [str(c) for c in b.behavior.classes_]
+    return P_raw[:, [classes.index(a) for a in b.actions]]
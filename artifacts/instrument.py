@@ -0,0 +1,196 @@
+"""
+Opt-in timing for the inference hot path: per-stage wall times and call counts kept in
+fixed-bucket histograms in this process, plus sampled cProfile dumps of whole calls.
+
+    NFL4TH_PROFILE=1                 record stage timings from import time
+    NFL4TH_PROFILE_SAMPLE=0.01       also cProfile ~1% of top-level scoring calls
+    NFL4TH_PROFILE_DIR=profiles      where the .prof dumps go (default: ./profiles)
+
+or from code:
+
+    from artifacts import instrument
+    instrument.enable(sample=0.01)
+    ...
+    instrument.snapshot()            # {stage: {count, sum_s, mean_s, p50_s, p99_s, max_s}}
+    instrument.prometheus_text()     # histograms in the Prometheus text format
+
+Stages recorded by inference.py: the entry points (score_batch, score_context,
+score_context_fast, linucb_batch, behavior_proba) and, inside them, load:<artifact>,
+to_frame, pre.transform, predict_arms, fused.encode, fused.score, constraints,
+linucb.bonus and team_feats. Stages nest, so entry-point time includes its stages.
+
+When disabled (the default) a stage costs one flag test and a shared no-op context.
+"""
+import os
+import random
+import threading
+import time
+from bisect import bisect_left
+from pathlib import Path
+
+# histogram upper bounds in seconds (Prometheus `le`), ~2.5x apart from 1µs to 10s
+BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3,
+           1e-2, 2.5e-2, 5e-2, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Count, sum, max and per-bucket counts of observed durations."""
+    __slots__ = ("count", "total", "max", "counts")
+
+    def __init__(self):
+        self.count, self.total, self.max = 0, 0.0, 0.0
+        self.counts = [0] * (len(BUCKETS) + 1)          # last bucket: > BUCKETS[-1]
+
+    def observe(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile (capped at the observed max)."""
+        if not self.count:
+            return 0.0
+        rank, seen = q * self.count, 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank and c:
+                return min(BUCKETS[i] if i < len(BUCKETS) else self.max, self.max)
+        return self.max
+
+
+class _State:
+    on = False
+    sample = 0.0
+    profile_dir = Path("profiles")
+
+
+_STAGES = {}
+_LOCK = threading.Lock()
+_LOCAL = threading.local()              # per thread: a cProfile run is in progress
+_DUMPS = [0]
+
+
+class _Noop:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _Noop()
+
+
+class _Stage:
+    __slots__ = ("name", "t0", "prof")
+
+    def __init__(self, name: str, prof=None):
+        self.name, self.prof = name, prof
+
+    def __enter__(self):
+        if self.prof is not None:
+            try:
+                self.prof.enable()
+            except ValueError:              # another profiler is active (e.g. a coverage run)
+                self.prof = _LOCAL.profiling = None
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        dt = time.perf_counter() - self.t0
+        if self.prof is not None:
+            self.prof.disable()
+            _dump(self.name, self.prof)
+        with _LOCK:
+            h = _STAGES.get(self.name)
+            if h is None:
+                h = _STAGES[self.name] = Histogram()
+            h.observe(dt)
+        return False
+
+
+def _dump(name: str, prof) -> None:
+    _LOCAL.profiling = False
+    _State.profile_dir.mkdir(parents=True, exist_ok=True)
+    with _LOCK:
+        _DUMPS[0] += 1
+        n = _DUMPS[0]
+    prof.dump_stats(_State.profile_dir / f"{name}-{os.getpid()}-{n:05d}.prof")
+
+
+def enable(on: bool = True, sample: float = None, profile_dir=None) -> None:
+    """Turn stage timing on/off; `sample` is the fraction of entry-point calls to cProfile."""
+    _State.on = bool(on)
+    if sample is not None:
+        _State.sample = float(sample)
+    if profile_dir is not None:
+        _State.profile_dir = Path(profile_dir)
+
+
+def disable() -> None:
+    _State.on = False
+
+
+def is_enabled() -> bool:
+    return _State.on
+
+
+def stage(name: str):
+    """Context manager timing one stage (a no-op unless enabled)."""
+    if not _State.on:
+        return _NOOP
+    return _Stage(name)
+
+
+def entry(name: str):
+    """Like stage(), for a top-level call: a sampled fraction of these runs under cProfile."""
+    if not _State.on:
+        return _NOOP
+    if _State.sample and not getattr(_LOCAL, "profiling", False) and random.random() < _State.sample:
+        import cProfile
+        _LOCAL.profiling = True
+        return _Stage(name, cProfile.Profile())
+    return _Stage(name)
+
+
+def reset() -> None:
+    with _LOCK:
+        _STAGES.clear()
+
+
+def snapshot() -> dict:
+    """Stage -> {count, sum_s, mean_s, p50_s, p99_s, max_s} (quantiles at bucket resolution)."""
+    with _LOCK:
+        items = [(k, h.count, h.total, h.max, list(h.counts)) for k, h in _STAGES.items()]
+    out = {}
+    for name, count, total, mx, counts in sorted(items):
+        h = Histogram()
+        h.count, h.total, h.max, h.counts = count, total, mx, counts
+        out[name] = {"count": count, "sum_s": total, "mean_s": total / count if count else 0.0,
+                     "p50_s": h.quantile(0.5), "p99_s": h.quantile(0.99), "max_s": mx}
+    return out
+
+
+def prometheus_text(metric: str = "nfl4th_inference_stage_seconds") -> str:
+    """All stage histograms in the Prometheus text exposition format."""
+    with _LOCK:
+        items = sorted((k, h.count, h.total, list(h.counts)) for k, h in _STAGES.items())
+    lines = [f"# HELP {metric} Wall time per inference stage.", f"# TYPE {metric} histogram"]
+    for name, count, total, counts in items:
+        cum = 0
+        for le, c in zip(BUCKETS, counts):
+            cum += c
+            lines.append(f'{metric}_bucket{{stage="{name}",le="{le:g}"}} {cum}')
+        lines.append(f'{metric}_bucket{{stage="{name}",le="+Inf"}} {count}')
+        lines.append(f'{metric}_sum{{stage="{name}"}} {total:.9g}')
+        lines.append(f'{metric}_count{{stage="{name}"}} {count}')
+    return "\n".join(lines) + "\n"
+
+
+if os.environ.get("NFL4TH_PROFILE", "").lower() not in ("", "0", "false", "no"):
+    enable(True, float(os.environ.get("NFL4TH_PROFILE_SAMPLE") or 0.0),
+           os.environ.get("NFL4TH_PROFILE_DIR") or None)
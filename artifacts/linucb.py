@@ -0,0 +1,222 @@
+"""
+LinUCB state for serving.
+
+Each arm keeps A_a = X_a^T X_a + λI over the preprocessed design (same rule as the behavior
+notebooks: arms with fewer than d+1 rows fall back to λI). At training time we persist A_a^(-1)
+and the lower Cholesky factor L_a (A_a = L_a L_a^T). At request time the confidence width is
+
+    sqrt(x^T A_a^(-1) x) = || L_a^(-1) x ||
+
+computed for a whole batch with one triangular solve per arm, so nothing is inverted per request.
+
+Sparse designs (scipy CSR, e.g. a OneHotEncoder(sparse_output=True) preprocessor) are never
+densified whole: gram() splits the mostly-filled columns (the scaled numerics) from the
+one-hot levels and only the dense block goes through BLAS. confidence_widths() densifies a
+small sparse batch for the same triangular solves as a dense design, and forms x^T A_a^(-1) x
+from the sparse rows of a bulk design in bounded chunks.
+
+arm_posteriors() reads the same per-arm statistics as the Ridge arms' Bayesian posterior
+(coefficient covariance and residual variance) that posterior.py samples from.
+
+scipy is imported where it is used, so `import inference` stays cheap on the greedy path.
+"""
+import numpy as np
+
+DEFAULT_ALPHA = 0.8        # behavior notebooks' exploration weight
+DEFAULT_LAMBDA = 5.0       # behavior notebooks' lambda_ucb
+WIDTH_CHUNK = 32768        # rows per block of a sparse design in confidence_widths
+SOLVE_MAX_ROWS = 2048      # sparse batches up to this size use triangular solves (no inverse)
+POSTERIOR_KEYS = ("factor", "xbar", "sigma2", "n")
+
+
+def _is_sparse(X) -> bool:
+    return hasattr(X, "tocsr")
+
+
+def gram(X) -> np.ndarray:
+    """Dense X^T X for a dense or sparse design."""
+    if not _is_sparse(X):
+        return X.T @ X
+    X = X.tocsr()
+    n, d = X.shape
+    dense = np.bincount(X.indices, minlength=d) > n // 2       # columns set on most rows
+    if not dense.any() or dense.all():
+        return (X.T @ X).toarray()
+    di, si = np.flatnonzero(dense), np.flatnonzero(~dense)
+    D, S = X[:, di].toarray(), X[:, si]
+    G = np.empty((d, d))
+    G[np.ix_(di, di)] = D.T @ D
+    SD = np.asarray(S.T @ D)
+    G[np.ix_(si, di)] = SD
+    G[np.ix_(di, si)] = SD.T
+    G[np.ix_(si, si)] = (S.T @ S).toarray()
+    return G
+
+
+def arm_grams(X, y, actions, lam: float = DEFAULT_LAMBDA) -> np.ndarray:
+    """(K, d, d) stack of X_a^T X_a + λI, one per action in `actions` order."""
+    y = np.asarray(y)
+    d = X.shape[1]
+    A = np.empty((len(actions), d, d))
+    for j, a in enumerate(actions):
+        Xa = X[y == a]
+        if Xa.shape[0] < d + 1:
+            A[j] = lam * np.eye(d)
+        else:
+            A[j] = gram(Xa) + lam * np.eye(d)
+    return A
+
+
+def arm_stats(X, y, r, actions) -> dict:
+    """
+    Per-arm sufficient statistics of the Ridge arms and LinUCB state (see online.py):
+    gram = X_a^T X_a (K,d,d), xty = X_a^T r_a (K,d), xsum (K,d), rsum (K,), n (K,).
+    """
+    y, r = np.asarray(y), np.asarray(r, dtype=float)
+    K, d = len(actions), X.shape[1]
+    out = {"gram": np.zeros((K, d, d)), "xty": np.zeros((K, d)), "xsum": np.zeros((K, d)),
+           "rsum": np.zeros(K), "n": np.zeros(K, dtype=np.int64)}
+    for j, a in enumerate(actions):
+        m = y == a
+        Xa = X[m]
+        out["gram"][j] = gram(Xa)
+        out["xty"][j] = np.asarray(Xa.T @ r[m]).ravel()
+        out["xsum"][j] = np.asarray(Xa.sum(axis=0)).ravel()
+        out["rsum"][j] = r[m].sum()
+        out["n"][j] = int(m.sum())
+    return out
+
+
+def grams_from_stats(stats: dict, lam: float = DEFAULT_LAMBDA) -> np.ndarray:
+    """arm_grams() from arm_stats(): X_a^T X_a + λI, or λI for arms with fewer than d+1 rows."""
+    gram, n = stats["gram"], stats["n"]
+    d = gram.shape[1]
+    A = gram + lam * np.eye(d)
+    A[np.asarray(n) < d + 1] = lam * np.eye(d)
+    return A
+
+
+def ridge_arms(stats: dict, l2: float = 5.0, min_n: int = 50):
+    """
+    Ridge(alpha=l2, fit_intercept=True) per arm from arm_stats(), centred like sklearn;
+    arms with fewer than min_n rows are ("const", mean) as in the behavior notebooks.
+    Returns coef (K,d), intercept (K,), const (K,) bool.
+    """
+    from scipy.linalg import cho_solve, cholesky
+
+    gram, xty, xsum, rsum = stats["gram"], stats["xty"], stats["xsum"], stats["rsum"]
+    K, d = xsum.shape
+    coef, intercept, const = np.zeros((K, d)), np.zeros(K), np.zeros(K, dtype=bool)
+    for j in range(K):
+        n = int(stats["n"][j])
+        if n < min_n:
+            const[j] = True
+            intercept[j] = rsum[j] / n if n else 0.0
+            continue
+        xbar, rbar = xsum[j] / n, rsum[j] / n
+        M = gram[j] - n * np.outer(xbar, xbar) + l2 * np.eye(d)
+        coef[j] = cho_solve((cholesky(M, lower=True), True), xty[j] - n * xbar * rbar)
+        intercept[j] = rbar - xbar @ coef[j]
+    return coef, intercept, const
+
+
+def arm_posteriors(stats: dict, rsq, l2: float = 5.0, min_n: int = 50) -> dict:
+    """
+    Posterior of each Ridge arm from arm_stats() and the per-arm sums of squared rewards
+    `rsq`: factor (K,d,d), xbar (K,d), sigma2 (K,), n (K,), same fit rule as ridge_arms().
+    """
+    from scipy.linalg import cho_solve, cholesky, solve_triangular
+
+    gram, xty, xsum, rsum = stats["gram"], stats["xty"], stats["xsum"], stats["rsum"]
+    K, d = xsum.shape
+    out = {"factor": np.zeros((K, d, d)), "xbar": np.zeros((K, d)), "sigma2": np.zeros(K),
+           "n": np.asarray(stats["n"], dtype=np.int64).copy()}
+    eye = np.eye(d)
+    for j in range(K):
+        n = int(stats["n"][j])
+        if n == 0:
+            continue
+        rbar = rsum[j] / n
+        syy = rsq[j] - n * rbar * rbar
+        if n < min_n:                                   # ("const", mean) arm
+            out["sigma2"][j] = max(syy, 0.0) / max(n - 1, 1)
+            continue
+        xbar = xsum[j] / n
+        sxx = gram[j] - n * np.outer(xbar, xbar)
+        sxy = xty[j] - n * xbar * rbar
+        L = cholesky(sxx + l2 * eye, lower=True)
+        beta = cho_solve((L, True), sxy)
+        rss = syy - 2 * beta @ sxy + beta @ sxx @ beta
+        Linv = solve_triangular(L, eye, lower=True)     # M^(-1) = Linvᵀ Linv
+        dof = d - l2 * np.sum(Linv * Linv)              # tr(Sxx M^(-1))
+        sigma2 = max(rss, 0.0) / max(n - 1 - dof, 1.0)
+        out["factor"][j] = np.sqrt(sigma2) * Linv.T
+        out["xbar"][j], out["sigma2"][j] = xbar, sigma2
+    return out
+
+
+def posterior_arrays(metric: str, X, y, rewards, actions, l2: float = 5.0, min_n: int = 50) -> dict:
+    """Arrays persisted per reward (see posterior.py): posterior_{metric}_{factor,xbar,sigma2,n}."""
+    y, r = np.asarray(y), np.asarray(rewards, dtype=float)
+    rsq = np.array([np.sum(r[y == a] ** 2) for a in actions])
+    post = arm_posteriors(arm_stats(X, y, r, actions), rsq, l2, min_n)
+    return {f"posterior_{metric}_{k}": post[k] for k in POSTERIOR_KEYS}
+
+
+def linucb_arrays(metric: str, X, y, actions, lam: float = DEFAULT_LAMBDA, rewards=None) -> dict:
+    """
+    Arrays persisted per reward: linucb_{metric}_A_inv / _chol / _lambda, plus the
+    arm_stats() as linucb_{metric}_{gram,xty,xsum,rsum,n} when `rewards` is given.
+    """
+    from scipy.linalg import cho_solve, cholesky
+
+    A = arm_grams(X, y, actions, lam)
+    L = np.stack([cholesky(A_a, lower=True) for A_a in A])
+    eye = np.eye(A.shape[1])
+    A_inv = np.stack([cho_solve((L_a, True), eye) for L_a in L])
+    out = {f"linucb_{metric}_A_inv": A_inv,
+           f"linucb_{metric}_chol": L,
+           f"linucb_{metric}_lambda": np.array(float(lam))}
+    if rewards is not None:
+        out.update({f"linucb_{metric}_{k}": v for k, v in arm_stats(X, y, rewards, actions).items()})
+    return out
+
+
+def confidence_widths(Xd, chol) -> np.ndarray:
+    """(N, K) sqrt(x^T A_a^(-1) x) for every row of the preprocessed design and every arm."""
+    if _is_sparse(Xd):
+        return _sparse_widths(Xd.tocsr(), chol)
+    from scipy.linalg import solve_triangular
+
+    Xt = np.ascontiguousarray(np.asarray(Xd, dtype=float).T)     # (d, N)
+    out = np.empty((Xt.shape[1], len(chol)))
+    for j, L_a in enumerate(chol):
+        Y = solve_triangular(L_a, Xt, lower=True, check_finite=False)
+        out[:, j] = np.sqrt(np.einsum("ij,ij->j", Y, Y))
+    return out
+
+
+def _sparse_widths(X, chol, chunk: int = WIDTH_CHUNK) -> np.ndarray:
+    """
+    confidence_widths for CSR rows, a block of rows at a time. Small batches (serving) densify
+    the rows for the dense path's triangular solves; bulk designs (sweeps, retraining) invert
+    A_a once per call and take rowsum(X ∘ (X A^(-1))) on the sparse rows, which is cheaper
+    past SOLVE_MAX_ROWS rows.
+    """
+    from scipy.linalg import cho_solve, solve_triangular
+
+    out = np.empty((X.shape[0], len(chol)))
+    if X.shape[0] <= SOLVE_MAX_ROWS:
+        Xt = np.ascontiguousarray(X.toarray().T)                  # (d, rows)
+        for j, L_a in enumerate(chol):
+            Y = solve_triangular(L_a, Xt, lower=True, check_finite=False)
+            out[:, j] = np.sqrt(np.einsum("ij,ij->j", Y, Y))
+        return out
+    eye = np.eye(X.shape[1])
+    A_inv = [cho_solve((L_a, True), eye) for L_a in chol]
+    for i in range(0, X.shape[0], chunk):
+        Xc = X[i:i + chunk]
+        for j, M in enumerate(A_inv):
+            q = np.asarray(Xc.multiply(Xc @ M).sum(axis=1)).ravel()
+            out[i:i + chunk, j] = np.sqrt(np.maximum(q, 0.0))
+    return out
@@ -0,0 +1,98 @@
+"""
+Load generator for service.py: keep-alive connections firing /score (or /score_batch)
+requests with random 4th-down situations, then report latency percentiles and throughput.
+
+    python artifacts/service.py --port 8080 &
+    python artifacts/loadgen.py --port 8080 --connections 64 --requests 20000
+"""
+import asyncio
+import json
+import time
+import numpy as np
+
+TEAMS = ["ARI", "BUF", "DAL", "GB", "KC", "NE", "PHI", "SF"]
+
+
+def random_contexts(n: int, seed: int = 0) -> list:
+    """Plausible 4th-down contexts (numeric features plus teams and venue)."""
+    rng = np.random.default_rng(seed)
+    out = []
+    for _ in range(n):
+        pos, de = rng.choice(TEAMS, 2, replace=False)
+        qtr = int(rng.integers(1, 5))
+        yd = int(rng.integers(1, 100))
+        ytg = int(min(yd, rng.integers(1, 16)))
+        out.append({
+            "yardline_100": yd, "ydstogo": ytg, "score_differential": int(rng.integers(-21, 22)),
+            "qtr": qtr, "game_seconds_remaining": (4 - qtr) * 900 + int(rng.integers(0, 901)),
+            "off_epa_4w": float(rng.normal(0, 0.1)), "def_epa_4w": float(rng.normal(0, 0.1)),
+            "posteam": str(pos), "defteam": str(de), "home_team": str(pos), "away_team": str(de),
+            "posteam_type": "home", "roof": str(rng.choice(["outdoors", "dome"])), "surface": "grass",
+            "temp": float(rng.integers(20, 90)), "wind": float(rng.integers(0, 20)),
+            "goal_to_go": int(yd <= 10 and ytg >= yd),
+        })
+    return out
+
+
+async def request(reader, writer, method: str, path: str, payload=None):
+    """One HTTP/1.1 request on an open keep-alive connection -> (status, decoded JSON)."""
+    body = json.dumps(payload).encode() if payload is not None else b""
+    writer.write((f"{method} {path} HTTP/1.1\r\nHost: localhost\r\n"
+                  f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n").encode() + body)
+    await writer.drain()
+    head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+    status = int(head[0].split(" ", 2)[1])
+    length = next(int(h.split(":", 1)[1]) for h in head[1:] if h.lower().startswith("content-length"))
+    return status, json.loads(await reader.readexactly(length))
+
+
+async def run_load(host: str = "127.0.0.1", port: int = 8080, connections: int = 64,
+                   requests: int = 10000, batch: int = 1, metric: str = "wpa", seed: int = 0) -> dict:
+    """Fire `requests` requests over `connections` connections; returns the latency / throughput report."""
+    pool = random_contexts(1024, seed)
+    per_conn = [requests // connections + (i < requests % connections) for i in range(connections)]
+    latencies, statuses = [], {}
+
+    async def client(k: int, n: int):
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            for i in range(n):
+                j = (k * 7919 + i * batch) % len(pool)
+                if batch == 1:
+                    path, payload = "/score", {"context": pool[j], "metric": metric}
+                else:
+                    ctxs = [pool[(j + m) % len(pool)] for m in range(batch)]
+                    path, payload = "/score_batch", {"contexts": ctxs, "metric": metric}
+                t0 = time.perf_counter()
+                status, _ = await request(reader, writer, "POST", path, payload)
+                latencies.append(time.perf_counter() - t0)
+                statuses[status] = statuses.get(status, 0) + 1
+        finally:
+            writer.close()
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(client(k, n) for k, n in enumerate(per_conn) if n))
+    wall = time.perf_counter() - t0
+    lat = np.asarray(latencies) * 1000
+    return {"requests": len(lat), "contexts": len(lat) * batch, "seconds": wall,
+            "req_per_s": len(lat) / wall, "contexts_per_s": len(lat) * batch / wall,
+            "p50_ms": float(np.percentile(lat, 50)), "p99_ms": float(np.percentile(lat, 99)),
+            "max_ms": float(lat.max()), "status": statuses}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Load test for the scoring service.")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8080)
+    ap.add_argument("--connections", type=int, default=64)
+    ap.add_argument("--requests", type=int, default=10000)
+    ap.add_argument("--batch", type=int, default=1, help="contexts per request (>1 uses /score_batch)")
+    ap.add_argument("--metric", default="wpa")
+    args = ap.parse_args()
+    rep = asyncio.run(run_load(args.host, args.port, args.connections, args.requests, args.batch, args.metric))
+    print(f"{rep['requests']} requests ({rep['contexts']} contexts) in {rep['seconds']:.2f}s: "
+          f"{rep['req_per_s']:.0f} req/s, {rep['contexts_per_s']:.0f} contexts/s")
+    print(f"latency p50 {rep['p50_ms']:.2f} ms, p99 {rep['p99_ms']:.2f} ms, max {rep['max_ms']:.2f} ms; "
+          f"status {rep['status']}")
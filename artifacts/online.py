@@ -0,0 +1,215 @@
+"""
+Online LinUCB / Ridge-arm updates.
+
+Per arm we keep the LinUCB inverse A_a^(-1), A_a = X_a^T X_a + λI, and the sufficient
+statistics of the Ridge arms (gram = X_a^T X_a, xty = X_a^T r_a, xsum, rsum, n). Each new
+(context, action, reward) is a rank-one Sherman–Morrison update of A_a^(-1),
+
+    A^(-1) <- A^(-1) - (A^(-1) x)(A^(-1) x)^T / (1 + x^T A^(-1) x)
+
+plus O(d²) bumps of the statistics, so a week of plays folds in without a retrain. Every
+`refactor_every` updates of an arm (and on every checkpoint) A_a^(-1) is rebuilt exactly
+from its Cholesky factor to stop rounding drift. The Ridge arms are re-solved from the
+statistics (same centring as sklearn's Ridge(fit_intercept=True)), and arms with fewer than
+`min_n` plays stay ("const", mean) as in the behavior notebooks.
+
+Checkpoints go to artifacts/online_{metric}.npz (written to a temp file, then os.replace),
+which inference.get_bundle() picks up on its next mtime check.
+
+    python artifacts/online.py --metric wpa --plays week13.csv
+"""
+import json
+import os
+import numpy as np
+from pathlib import Path
+
+try:
+    from .fused import FusedScorer
+    from .array_store import load_arrays, params_from_arrays
+    from .linucb import ridge_arms
+except ImportError:  # run as a script from artifacts/
+    from fused import FusedScorer
+    from array_store import load_arrays, params_from_arrays
+    from linucb import ridge_arms
+
+CHECKPOINT_FORMAT = 1
+STATS = ("gram", "xty", "xsum", "rsum", "n")
+
+
+def checkpoint_path(art_dir, metric: str) -> Path:
+    return Path(art_dir) / f"online_{metric.lower()}.npz"
+
+
+class LinearArm:
+    """Ridge-like arm rebuilt from a checkpoint (predict / coef_ / intercept_ like sklearn)."""
+
+    def __init__(self, coef, intercept: float):
+        self.coef_ = np.asarray(coef, dtype=float)
+        self.intercept_ = float(intercept)
+
+    def predict(self, Xd) -> np.ndarray:
+        return np.asarray(Xd @ self.coef_).ravel() + self.intercept_
+
+
+def arm_models(ck: dict, actions) -> dict:
+    """{action: LinearArm or ("const", mu)} from a loaded checkpoint."""
+    return {a: ("const", float(ck["arm_intercept"][j])) if ck["arm_const"][j]
+            else LinearArm(ck["arm_coef"][j], ck["arm_intercept"][j])
+            for j, a in enumerate(actions)}
+
+
+def load_checkpoint(path, actions=None) -> dict:
+    """name -> array from online_{metric}.npz (fully read; the file may be replaced later)."""
+    with np.load(path, allow_pickle=False) as z:
+        ck = {k: z[k] for k in z.files}
+    if int(ck["format"]) != CHECKPOINT_FORMAT:
+        raise ValueError(f"Unsupported online checkpoint format {int(ck['format'])} in {path}")
+    if actions is not None and [str(a) for a in ck["actions"]] != list(actions):
+        raise ValueError(f"{path} was written for actions {list(ck['actions'])}, expected {list(actions)}")
+    return ck
+
+
+class OnlineLinUCB:
+    """Incremental per-arm LinUCB + Ridge state for one reward metric."""
+
+    def __init__(self, metric, actions, A_inv, gram, xty, xsum, rsum, n, lam,
+                 l2: float = 5.0, min_n: int = 50, refactor_every: int = 500, scorer=None):
+        self.metric = metric.lower()
+        self.actions = list(actions)
+        self.A_inv = np.array(A_inv, dtype=float)          # (K,d,d), private copies
+        self.gram = np.array(gram, dtype=float)
+        self.xty = np.array(xty, dtype=float)
+        self.xsum = np.array(xsum, dtype=float)
+        self.rsum = np.array(rsum, dtype=float)
+        self.n = np.array(n, dtype=np.int64)
+        self.lam, self.l2, self.min_n = float(lam), float(l2), int(min_n)
+        self.refactor_every = int(refactor_every)
+        self.scorer = scorer                               # FusedScorer, for observe()
+        self.d = self.gram.shape[1]
+        self._since = np.zeros(len(self.actions), dtype=np.int64)
+
+    @classmethod
+    def from_arrays(cls, arrays: dict, metric: str, actions, **kw) -> "OnlineLinUCB":
+        """Start from the linucb_{metric}_* arrays saved by the behavior notebooks."""
+        m = metric.lower()
+        missing = [k for k in ("A_inv", "lambda") + STATS if f"linucb_{m}_{k}" not in arrays]
+        if missing:
+            raise FileNotFoundError(f"linucb_{m}_{{{','.join(missing)}}} not in arrays/; re-run the "
+                                    "behavior notebooks' save_linucb cell with rewards")
+        return cls(m, actions, arrays[f"linucb_{m}_A_inv"],
+                   *(arrays[f"linucb_{m}_{k}"] for k in STATS),
+                   arrays[f"linucb_{m}_lambda"].item(), **kw)
+
+    @classmethod
+    def from_checkpoint(cls, ck: dict, **kw) -> "OnlineLinUCB":
+        kw = {"l2": float(ck["l2"]), "min_n": int(ck["min_n"]), **kw}
+        return cls(str(ck["metric"]), [str(a) for a in ck["actions"]], ck["A_inv"],
+                   *(ck[k] for k in STATS), float(ck["lam"]), **kw)
+
+    @classmethod
+    def load(cls, art_dir, metric: str, **kw) -> "OnlineLinUCB":
+        """Resume from online_{metric}.npz if present, else from the training arrays."""
+        art_dir = Path(art_dir)
+        meta = json.load(open(art_dir / "metadata.json"))
+        arrays = load_arrays(art_dir)
+        kw.setdefault("scorer", FusedScorer.from_params(params_from_arrays(arrays, meta)))
+        path = checkpoint_path(art_dir, metric)
+        if path.exists():
+            return cls.from_checkpoint(load_checkpoint(path, meta["actions"]), **kw)
+        return cls.from_arrays(arrays, metric, meta["actions"], **kw)
+
+    # --- updates ---
+    def _gram_reg(self, j: int) -> np.ndarray:
+        # behavior notebooks: arms with fewer than d+1 rows use λI
+        if self.n[j] < self.d + 1:
+            return self.lam * np.eye(self.d)
+        return self.gram[j] + self.lam * np.eye(self.d)
+
+    def refactor(self, arms=None) -> None:
+        """Exact A_a^(-1) from the Cholesky factor of A_a (all arms by default)."""
+        from scipy.linalg import cho_solve, cholesky     # not at import: inference loads this module
+
+        eye = np.eye(self.d)
+        for j in (range(len(self.actions)) if arms is None else arms):
+            self.A_inv[j] = cho_solve((cholesky(self._gram_reg(j), lower=True), True), eye)
+            self._since[j] = 0
+
+    def update(self, Xd, actions, rewards) -> None:
+        """Absorb design rows Xd (N,d) with logged actions and rewards, one rank-one step each."""
+        Xd = np.asarray(Xd.toarray() if hasattr(Xd, "toarray") else Xd, dtype=float)
+        rewards = np.asarray(rewards, dtype=float)
+        idx = {a: j for j, a in enumerate(self.actions)}
+        for x, a, r in zip(Xd, actions, rewards):
+            j = idx[a]
+            self.gram[j] += np.outer(x, x)
+            self.xty[j] += r * x
+            self.xsum[j] += x
+            self.rsum[j] += r
+            self.n[j] += 1
+            if self.n[j] < self.d + 1:
+                continue                                   # still λI
+            if self.n[j] == self.d + 1:
+                self.refactor([j])                         # leaves the λI fallback
+                continue
+            Ax = self.A_inv[j] @ x
+            self.A_inv[j] -= np.outer(Ax, Ax) / (1.0 + x @ Ax)
+            self._since[j] += 1
+            if self._since[j] >= self.refactor_every:
+                self.refactor([j])
+
+    def observe(self, contexts, actions, rewards) -> None:
+        """update() from raw context dicts / a DataFrame (encoded like the serving path)."""
+        if self.scorer is None:
+            raise ValueError("observe() needs a FusedScorer; use OnlineLinUCB.load() or update()")
+        self.update(self.scorer.design(*self.scorer.encode(contexts)), actions, rewards)
+
+    # --- derived serving state ---
+    def arms(self):
+        """(coef (K,d), intercept (K,), const (K,) bool) of the refreshed Ridge arms."""
+        stats = {"gram": self.gram, "xty": self.xty, "xsum": self.xsum, "rsum": self.rsum, "n": self.n}
+        return ridge_arms(stats, self.l2, self.min_n)
+
+    def widths(self, Xd) -> np.ndarray:
+        """(N,K) sqrt(x^T A_a^(-1) x) from the current in-memory state."""
+        Xd = np.asarray(Xd, dtype=float)
+        return np.sqrt(np.maximum(np.einsum("ni,kij,nj->nk", Xd, self.A_inv, Xd), 0.0))
+
+    # --- checkpoint ---
+    def save(self, art_dir) -> Path:
+        """Refactor, then atomically write online_{metric}.npz for the serving side."""
+        from scipy.linalg import cholesky
+
+        self.refactor()
+        coef, intercept, const = self.arms()
+        chol = np.stack([cholesky(self._gram_reg(j), lower=True) for j in range(len(self.actions))])
+        path = checkpoint_path(art_dir, self.metric)
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            np.savez(f, format=np.array(CHECKPOINT_FORMAT), metric=np.array(self.metric),
+                     actions=np.array(self.actions), lam=np.array(self.lam), l2=np.array(self.l2),
+                     min_n=np.array(self.min_n), A_inv=self.A_inv, chol=chol,
+                     arm_coef=coef, arm_intercept=intercept, arm_const=const,
+                     gram=self.gram, xty=self.xty, xsum=self.xsum, rsum=self.rsum, n=self.n)
+        os.replace(tmp, path)
+        return path
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+    import pandas as pd
+
+    ap = argparse.ArgumentParser(description="Fold new plays into the LinUCB / Ridge arms and checkpoint.")
+    ap.add_argument("--metric", choices=["epa", "wpa"], required=True)
+    ap.add_argument("--plays", required=True, help="CSV with feature columns, 'action' and the reward column")
+    ap.add_argument("--art-dir", default=str(Path(__file__).parent))
+    args = ap.parse_args()
+
+    plays = pd.read_csv(args.plays)
+    plays = plays[plays["action"].isin(["fg", "go", "punt"]) & plays[args.metric].notna()]
+    t0 = time.perf_counter()
+    learner = OnlineLinUCB.load(args.art_dir, args.metric)
+    learner.observe(plays, plays["action"].to_numpy(), plays[args.metric].to_numpy())
+    path = learner.save(args.art_dir)
+    print(f"Folded {len(plays)} plays into {path} in {time.perf_counter() - t0:.2f}s; n per arm:",
+          dict(zip(learner.actions, learner.n.tolist())))
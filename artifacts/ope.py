@@ -0,0 +1,161 @@
+"""
+Off-policy evaluation: DM / IPS / SNIPS / DR with bootstrap confidence intervals.
+
+`estimators` is the per-dataset computation from model_evaluation.ipynb. The bootstrap
+engine rewrites every replicate as a weighted sum over rows: a resample is a vector of
+counts c (how often each row was drawn), and each estimator is a ratio of c-weighted sums
+of per-row terms. With the counts of B replicates stacked in C (B, N) and the per-row
+terms of M candidate policies stacked in T (N, 4M), all replicates, estimators and
+policies are one matrix product C @ T, done in chunks of replicates to bound memory.
+
+    method="multinomial"  C ~ Multinomial(N, 1/N): the classic resample-with-replacement
+    method="poisson"      C ~ Poisson(1): independent row weights (normalized per replicate)
+
+Results depend only on (seed, method, B), not on the chunk size (up to float rounding).
+"""
+import numpy as np
+
+ESTIMATORS = ["DM", "IPS", "SNIPS", "DR"]
+_EPS = 1e-6
+
+
+# --- candidate policies π_new(a|x), rows sum to 1 ---
+def policy_greedy(MU):
+    N, K = MU.shape
+    P = np.zeros_like(MU, dtype=float)
+    P[np.arange(N), MU.argmax(axis=1)] = 1.0
+    return P
+
+def policy_eps_greedy(MU, eps=0.05):
+    N, K = MU.shape
+    P = np.full((N, K), eps / float(K))
+    P[np.arange(N), MU.argmax(axis=1)] += 1.0 - eps
+    return P
+
+def policy_thompson(MU, dev):
+    """Thompson sampling: π(a|x) = share of the posterior draws MU + dev (dev: (N,K,S)) where a is best."""
+    N, K = MU.shape
+    # running max over the K arms (argmax's first-wins ties), ~2x an argmax along axis 1
+    top = dev[:, 0] + MU[:, :1]
+    best = np.zeros(top.shape, dtype=np.int8)                   # (N,S)
+    for k in range(1, K):
+        draw = dev[:, k] + MU[:, k:k + 1]
+        best[draw > top] = k
+        np.maximum(top, draw, out=top)
+    return np.stack([(best == k).mean(axis=1) for k in range(K)], axis=1)
+
+def policy_from_actions(a_star_idx, K):
+    """Deterministic policy from chosen action indices (e.g. LinUCB's argmax)."""
+    a_star_idx = np.asarray(a_star_idx)
+    P = np.zeros((len(a_star_idx), K))
+    P[np.arange(len(a_star_idx)), a_star_idx] = 1.0
+    return P
+
+
+def estimators(P_eval, P_beh, MU, r, a_idx, clip=None):
+    """(DM, IPS, SNIPS, DR, ESS, w) for one evaluation policy; w is unclipped."""
+    N = len(r)
+    pi_e_logged = P_eval[np.arange(N), a_idx]
+    pi_b_logged = P_beh[np.arange(N), a_idx]
+    w = pi_e_logged / np.clip(pi_b_logged, _EPS, None)
+    w_eff = np.clip(w, 0, float(clip)) if clip is not None else w
+
+    mu_logged = MU[np.arange(N), a_idx]
+    mu_target = np.sum(P_eval * MU, axis=1)
+
+    DM = mu_target.mean()
+    IPS = np.mean(w_eff * r)
+    SNIPS = (w_eff * r).sum() / (w_eff.sum() + _EPS)
+    DR = np.mean(w_eff * (r - mu_logged) + mu_target)
+
+    # effective sample size on rows where the eval policy puts positive mass
+    w_pos = w[pi_e_logged > 0]
+    ESS = (w_pos.sum() ** 2) / (np.sum(w_pos ** 2) + _EPS) if w_pos.size else 0.0
+    return DM, IPS, SNIPS, DR, ESS, w
+
+
+def row_terms(P_evals, P_beh, MU, r, a_idx, clip=None) -> np.ndarray:
+    """
+    Per-row terms for M policies, shape (N, 4, M):
+    [:, 0] μ̂ under the policy (DM), [:, 1] w·r (IPS), [:, 2] w (SNIPS denominator),
+    [:, 3] w·(r - μ̂_logged) + μ̂_target (DR); w clipped at `clip` if given.
+    """
+    P = np.asarray(P_evals, dtype=float)
+    if P.ndim == 2:
+        P = P[None]
+    N = len(r)
+    rows = np.arange(N)
+    r = np.asarray(r, dtype=float)
+    w = P[:, rows, a_idx] / np.clip(P_beh[rows, a_idx], _EPS, None)      # (M, N)
+    if clip is not None:
+        w = np.clip(w, 0, float(clip))
+    mu_target = np.einsum("mnk,nk->mn", P, MU)
+    dr = w * (r - MU[rows, a_idx]) + mu_target
+    return np.stack([mu_target, w * r, w, dr], axis=1).transpose(2, 1, 0)
+
+
+def resample_counts(n: int, B: int, seed=123, method: str = "multinomial", chunk: int = None):
+    """Yield (b, n) count matrices for B replicates in order; same draws for any chunk size."""
+    rng = np.random.default_rng(seed)
+    chunk = chunk or B
+    done = 0
+    while done < B:
+        b = min(chunk, B - done)
+        if method == "multinomial":
+            # n row draws per replicate, counted per row (a Multinomial(n, 1/n) sample)
+            flat = (np.arange(b)[:, None] * n + rng.integers(0, n, size=(b, n))).ravel()
+            C = np.bincount(flat, minlength=b * n).reshape(b, n)
+        elif method == "poisson":
+            C = rng.poisson(1.0, size=(b, n))
+        else:
+            raise ValueError(f"Unknown bootstrap method {method!r} (expected 'multinomial' or 'poisson')")
+        done += b
+        yield C.astype(float)
+
+
+def replicates_from_counts(C, T) -> dict:
+    """Estimator -> (b, M) replicate values from counts C (b, N) and row_terms T (N, 4, M)."""
+    N, _, M = T.shape
+    S = C @ T.reshape(N, 4 * M)                                         # (b, 4M)
+    S = S.reshape(len(C), 4, M)
+    tot = C.sum(axis=1)[:, None]
+    return {"DM": S[:, 0] / tot, "IPS": S[:, 1] / tot,
+            "SNIPS": S[:, 1] / (S[:, 2] + _EPS), "DR": S[:, 3] / tot}
+
+
+def bootstrap_replicates(P_evals, P_beh, MU, r, a_idx, B=1000, seed=123, clip=None,
+                         method="multinomial", max_bytes=64 * 2**20) -> dict:
+    """Estimator -> (B, M) bootstrap replicates for every policy in P_evals (M, N, K)."""
+    T = row_terms(P_evals, P_beh, MU, r, a_idx, clip)
+    chunk = max(1, int(max_bytes // (8 * len(r))))
+    parts = [replicates_from_counts(C, T) for C in resample_counts(len(r), B, seed, method, chunk)]
+    return {k: np.concatenate([p[k] for p in parts]) for k in ESTIMATORS}
+
+
+def bootstrap_ci(P_evals, P_beh, MU, r, a_idx, B=1000, alpha=0.05, seed=123, clip=None,
+                 method="multinomial", max_bytes=64 * 2**20) -> dict:
+    """Estimator -> (M, 2) percentile CIs [alpha/2, 1 - alpha/2] per policy."""
+    reps = bootstrap_replicates(P_evals, P_beh, MU, r, a_idx, B, seed, clip, method, max_bytes)
+    return {k: np.quantile(v, [alpha / 2, 1 - alpha / 2], axis=0).T for k, v in reps.items()}
+
+
+def evaluate(policies: dict, P_beh, MU, r, a_idx, B=1000, alpha=0.05, seed=123, clip=None,
+             method="multinomial", max_bytes=64 * 2**20):
+    """
+    Tidy table, one row per named policy: point estimates, ESS and bootstrap CIs
+    (columns DM, DM_lo, DM_hi, ..., ESS, n).
+    """
+    import pandas as pd
+    names = list(policies)
+    P = np.stack([policies[k] for k in names])
+    ci = bootstrap_ci(P, P_beh, MU, r, a_idx, B, alpha, seed, clip, method, max_bytes) if B else None
+    rows = []
+    for m, name in enumerate(names):
+        vals = estimators(P[m], P_beh, MU, r, a_idx, clip=clip)
+        row = {"policy": name, **dict(zip(ESTIMATORS, map(float, vals[:4]))),
+               "ESS": float(vals[4]), "n": len(r)}
+        if ci is not None:
+            for k in ESTIMATORS:
+                row[f"{k}_lo"], row[f"{k}_hi"] = map(float, ci[k][m])
+        rows.append(row)
+    return pd.DataFrame(rows)
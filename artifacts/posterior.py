@@ -0,0 +1,185 @@
+"""
+Posterior uncertainty of the Ridge arms, and Thompson sampling over it.
+
+A Ridge arm (alpha=l2, fit_intercept=True) is the posterior mean of a Bayesian linear model
+with a N(0, σ²/l2 I) prior on the coefficients and a flat prior on the intercept. With the
+centred, regularized Gram M_a = X_aᶜᵀ X_aᶜ + l2 I and the arm's residual variance σ_a²
+(RSS over n_a - 1 - tr(H_a) residual degrees of freedom), the served μ̂_a(x) has posterior
+
+    μ_a(x) ~ N(μ̂_a(x), σ_a² [(x - x̄_a)ᵀ M_a^(-1) (x - x̄_a) + 1/n_a])
+
+and constant arms (fewer than min_n rows) are N(mean, σ_a²/n_a). Training exports, per
+metric, posterior_{metric}_{factor,xbar,sigma2,n} with factor_a factorᵀ_a = σ_a² M_a^(-1)
+(linucb.arm_posteriors, saved by array_store.save_posterior from the behavior notebooks'
+save cell, and by retrain.py for every split).
+
+At serving time PosteriorSampler draws S coefficient deviations per arm once and keeps them
+as one (d, K·S) matrix (cached per bundle), so N contexts × S draws is a single product
+Xd @ B added to the served μ̂, action constraints included: a masked action is never best.
+
+    posterior_batch(contexts, metric)   mean, sd, P(best) per action and credible intervals
+                                        of the pairwise deltas
+    thompson_policy(contexts, metric)   π(a|x) = P(a is best), for ope.evaluate (DR / IPS)
+    thompson_actions(contexts, metric)  one posterior draw per context -> sampled action
+
+The posterior is that of the training fit; an online checkpoint moves the served μ̂ (and so
+the centre of the draws) but not their spread.
+"""
+import threading
+import weakref
+import numpy as np
+
+try:
+    from .inference import _apply_action_constraints, _mu_and_design, _with_team_feats, get_bundle
+    from .instrument import entry, stage
+    from .ope import policy_thompson
+except ImportError:  # run as a script from artifacts/
+    from inference import _apply_action_constraints, _mu_and_design, _with_team_feats, get_bundle
+    from instrument import entry, stage
+    from ope import policy_thompson
+
+SAMPLES = 4000             # posterior draws per arm
+LEVEL = 0.9                # credible-interval mass
+MAX_BYTES = 64 * 2**20     # bound on the (rows, K, S) draws held at once
+_MASK = -1e9
+
+
+class PosteriorSampler:
+    """S draws per arm of μ_a(x) - μ̂_a(x): deviations(Xd) = Xd @ B + c, B (d, K·S), c (K, S)."""
+
+    def __init__(self, factor, xbar, sigma2, n, samples: int = SAMPLES, seed: int = 0):
+        factor, xbar = np.asarray(factor, dtype=float), np.asarray(xbar, dtype=float)
+        K, d, _ = factor.shape
+        rng = np.random.default_rng(seed)
+        D = factor @ rng.standard_normal((K, d, samples))                 # (K, d, S)
+        self.K, self.d, self.samples = K, d, samples
+        self.B = np.ascontiguousarray(D.transpose(1, 0, 2).reshape(d, K * samples))
+        noise = np.sqrt(np.asarray(sigma2, dtype=float) / np.maximum(np.asarray(n), 1))
+        self.c = -np.einsum("kd,kds->ks", xbar, D) + noise[:, None] * rng.standard_normal((K, samples))
+
+    @classmethod
+    def from_bundle(cls, bundle, metric: str, samples: int = SAMPLES, seed: int = 0):
+        return cls(**bundle.posterior(metric), samples=samples, seed=seed)
+
+    def deviations(self, Xd) -> np.ndarray:
+        """(N, K, S) posterior draws of μ - μ̂ for the rows of the preprocessed design."""
+        out = np.asarray(Xd @ self.B).reshape(Xd.shape[0], self.K, self.samples)
+        out += self.c
+        return out
+
+    def draw(self, Xd, rng, chunk: int = 4096) -> np.ndarray:
+        """(N, K) one draw per row (a random column of the cached ones)."""
+        N = Xd.shape[0]
+        s = rng.integers(0, self.samples, size=N)
+        out = np.empty((N, self.K))
+        for i in range(0, N, chunk):
+            Xc, sc = Xd[i:i + chunk], s[i:i + chunk]
+            for k in range(self.K):
+                Bk = self.B[:, k * self.samples + sc].T                   # (rows, d)
+                dot = Xc.multiply(Bk).sum(axis=1) if hasattr(Xc, "tocsr") else np.einsum("nd,nd->n", Xc, Bk)
+                out[i:i + chunk, k] = np.asarray(dot).ravel() + self.c[k, sc]
+        return out
+
+
+_SAMPLERS = weakref.WeakKeyDictionary()    # bundle -> {(metric, samples, seed): sampler}
+_SAMPLERS_LOCK = threading.Lock()
+
+
+def sampler(bundle, metric: str = "wpa", samples: int = SAMPLES, seed: int = 0) -> PosteriorSampler:
+    """The bundle's cached sampler (drawn on first use; a reloaded bundle draws afresh)."""
+    key = (metric.lower(), int(samples), seed)
+    with _SAMPLERS_LOCK:
+        cache = _SAMPLERS.setdefault(bundle, {})
+        if key not in cache:
+            with stage(f"load:posterior_{key[0]}"):
+                cache[key] = PosteriorSampler.from_bundle(bundle, key[0], samples, seed)
+        return cache[key]
+
+
+def _inputs(contexts, metric: str, b, team_store=None):
+    """(μ̂ of the metric after constraints (N,K), preprocessed design)."""
+    if team_store is not None and len(contexts):
+        contexts = _with_team_feats(contexts, team_store)
+    MU_epa, MU_wpa, Xd = _mu_and_design(contexts, b, True)
+    _apply_action_constraints(contexts, MU_epa, MU_wpa, b.actions)
+    return (MU_wpa if metric.lower() == "wpa" else MU_epa), Xd
+
+
+def _chunks(N: int, K: int, samples: int, max_bytes: int = MAX_BYTES):
+    step = max(1, max_bytes // (8 * K * samples))
+    return range(0, N, step), step
+
+
+def posterior_batch(contexts, metric: str = "wpa", bundle=None, samples: int = SAMPLES,
+                    level: float = LEVEL, seed: int = 0, team_store=None) -> dict:
+    """
+    Posterior summary of the chosen metric for many contexts (columns in actions order):
+      mean, sd, p_best:   (N,K) μ̂, posterior sd of μ, P(action is best); masked actions
+                          have sd 0 and p_best 0
+      pairs:              [(a, b), ...] every pair of actions, a before b in actions order
+      delta, delta_lo, delta_hi: (N,P) μ̂_a - μ̂_b and its `level` credible interval
+                          (NaN when either action is masked)
+    """
+    b = bundle or get_bundle()
+    actions = b.actions
+    K = len(actions)
+    pairs = [(i, j) for i in range(K) for j in range(i + 1, K)]
+    with entry("posterior_batch"):
+        mean, Xd = _inputs(contexts, metric, b, team_store)
+        N = len(mean)
+        sd, p_best = np.zeros((N, K)), np.zeros((N, K))
+        lo, hi = np.full((N, len(pairs)), np.nan), np.full((N, len(pairs)), np.nan)
+        if N:
+            post = sampler(b, metric, samples, seed)
+            q = [(1 - level) / 2, (1 + level) / 2]
+            starts, step = _chunks(N, K, samples)
+            for i in starts:
+                sl = slice(i, i + step)
+                with stage("posterior.draws"):
+                    dev = post.deviations(Xd[sl])
+                masked = mean[sl] <= _MASK
+                dev[masked] = 0.0
+                sd[sl] = dev.std(axis=2)
+                p_best[sl] = policy_thompson(mean[sl], dev)
+                for p, (a, c) in enumerate(pairs):
+                    ok = ~(masked[:, a] | masked[:, c])
+                    if ok.any():
+                        d = (mean[sl][ok, a] - mean[sl][ok, c])[:, None] + dev[ok, a] - dev[ok, c]
+                        lo[np.flatnonzero(ok) + i, p], hi[np.flatnonzero(ok) + i, p] = np.quantile(d, q, axis=1)
+        delta = np.stack([mean[:, a] - mean[:, c] for a, c in pairs], axis=1) if N else lo.copy()
+        delta[np.isnan(lo)] = np.nan
+    return {"actions": list(actions), "level": level, "mean": mean, "sd": sd, "p_best": p_best,
+            "pairs": [(actions[a], actions[c]) for a, c in pairs],
+            "delta": delta, "delta_lo": lo, "delta_hi": hi}
+
+
+def posterior_context(context: dict, metric: str = "wpa", bundle=None, samples: int = SAMPLES,
+                      level: float = LEVEL) -> dict:
+    """posterior_batch for one context, as {"p_best": {a: p}, "sd": {a: sd}, "delta": {"a-b": (mean, lo, hi)}}."""
+    out = posterior_batch([context], metric, bundle, samples, level)
+    acts = out["actions"]
+    return {"level": level,
+            "p_best": {a: float(out["p_best"][0, k]) for k, a in enumerate(acts)},
+            "sd": {a: float(out["sd"][0, k]) for k, a in enumerate(acts)},
+            "delta": {f"{a}-{c}": (float(out["delta"][0, p]), float(out["delta_lo"][0, p]),
+                                   float(out["delta_hi"][0, p]))
+                      for p, (a, c) in enumerate(out["pairs"])}}
+
+
+def thompson_policy(contexts, metric: str = "wpa", bundle=None, samples: int = SAMPLES,
+                    seed: int = 0, team_store=None) -> np.ndarray:
+    """(N,K) Thompson sampling's action probabilities, P(a is best), for ope.estimators / evaluate."""
+    return posterior_batch(contexts, metric, bundle, samples, seed=seed, team_store=team_store)["p_best"]
+
+
+def thompson_actions(contexts, metric: str = "wpa", bundle=None, seed=None, samples: int = SAMPLES,
+                     team_store=None) -> np.ndarray:
+    """(N,) action names, each the argmax of one posterior draw (fresh randomness unless `seed`)."""
+    b = bundle or get_bundle()
+    with entry("thompson_actions"):
+        mean, Xd = _inputs(contexts, metric, b, team_store)
+        if not len(mean):
+            return np.array([], dtype=object)
+        draw = mean + sampler(b, metric, samples).draw(Xd, np.random.default_rng(seed))
+        draw[mean <= _MASK] = _MASK
+    return np.asarray(b.actions, dtype=object)[np.argmax(draw, axis=1)]
@@ -0,0 +1,231 @@
+"""
+Season replay: score every logged 4th down and aggregate what each team left on the table.
+
+Each season is read on its own (the Parquet copy is pruned to that partition, see
+storage.py) and scored with one score_batch call per policy, action constraints included.
+For every play and metric (EPA, WPA) the replay records the recommended action and the
+model-estimated gain forgone,
+
+    gain = μ̂(recommended) - μ̂(logged action)
+
+which is >= 0 for the greedy policy. A logged action the constraints rule out (a 70-yard
+field goal, say) has no usable μ̂; its gain is NaN and the play is flagged `logged_masked`.
+LinUCB columns are added when the bundle has LinUCB factors (exported or an online
+checkpoint). The realized `epa` / `wpa` of the logged play are carried along.
+
+Seasons run in a process pool; the parent appends each finished season to the per-play
+CSV in season order and keeps only the team-week aggregates in memory.
+
+    python artifacts/replay.py --data data/decisions_2016_2024.csv --out replay/ [--workers N]
+"""
+import os
+import warnings
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+try:
+    from .array_store import ARRAY_DIR
+    from .inference import ART, get_bundle, score_batch
+    from .linucb import DEFAULT_ALPHA
+    from .storage import load_decisions, parquet_path
+    from .sweep import ACTION_ALIASES
+    from .team_store import TeamWeekStore
+except ImportError:  # run as a script from artifacts/
+    from array_store import ARRAY_DIR
+    from inference import ART, get_bundle, score_batch
+    from linucb import DEFAULT_ALPHA
+    from storage import load_decisions, parquet_path
+    from sweep import ACTION_ALIASES
+    from team_store import TeamWeekStore
+
+METRICS = ("epa", "wpa")
+PLAY_KEYS = ["season", "week", "game_id", "play_id", "posteam", "defteam", "qtr",
+             "yardline_100", "ydstogo", "score_differential", "game_seconds_remaining"]
+TEAM_WEEK = ["season", "week", "posteam"]
+
+
+def default_backend(art_dir=None) -> str:
+    """arrays/ when exported (much faster to load in every worker), else whatever is there."""
+    if os.environ.get("NFL4TH_BACKEND"):
+        return None
+    return "arrays" if (Path(art_dir or ART) / ARRAY_DIR).is_dir() else "auto"
+
+
+def has_linucb(bundle) -> bool:
+    try:
+        for m in METRICS:
+            bundle.linucb_chol(m)
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def data_seasons(data_path) -> list:
+    """Seasons present in the decisions table (from the partition names when there is a Parquet copy)."""
+    pq_root = parquet_path(data_path)
+    if pq_root.is_dir():
+        return sorted(int(p.name.split("=", 1)[1]) for p in pq_root.glob("season=*"))
+    return sorted(pd.read_csv(data_path, usecols=["season"])["season"].dropna().astype(int).unique().tolist())
+
+
+def _gain(MU, a_idx, rec_idx):
+    """μ̂(rec) - μ̂(logged) per row; NaN where the logged action is masked."""
+    rows = np.arange(len(a_idx))
+    logged = MU[rows, a_idx]
+    return np.where(logged <= -1e9, np.nan, MU[rows, rec_idx] - logged)
+
+
+def replay_frame(df, bundle=None, policies=("greedy", "linucb"), alpha: float = DEFAULT_ALPHA,
+                 team_store=None) -> pd.DataFrame:
+    """
+    Per-play replay of a decisions frame (one row per play with a known logged action).
+    `policies` is any of "greedy" / "linucb"; LinUCB is skipped (with a warning) when the
+    bundle has no factors for it.
+    """
+    b = bundle or get_bundle()
+    actions = b.actions
+    a = df["action"].astype(str).str.strip().str.lower().replace(ACTION_ALIASES)
+    keep = a.isin(actions).to_numpy()
+    df = df.loc[keep].reset_index(drop=True)
+    a_idx = pd.Categorical(a[keep], categories=actions).codes.astype(np.int64)
+    if team_store is not None:
+        df = team_store.attach(df)
+
+    out = df[[c for c in PLAY_KEYS if c in df.columns]].copy()
+    out["action"] = np.asarray(actions, dtype=object)[a_idx]
+    for m in METRICS:
+        out[m] = pd.to_numeric(df[m], errors="coerce").to_numpy(dtype=float) if m in df.columns else np.nan
+
+    MU_epa, MU_wpa, _ = score_batch(df, bundle=b)
+    MU = {"epa": MU_epa, "wpa": MU_wpa}
+    out["logged_masked"] = MU_epa[np.arange(len(df)), a_idx] <= -1e9
+    for m in METRICS:
+        rec_idx = MU[m].argmax(axis=1)
+        out[f"mu_{m}_logged"] = np.where(out["logged_masked"], np.nan, MU[m][np.arange(len(df)), a_idx])
+        out[f"rec_{m}"] = np.asarray(actions, dtype=object)[rec_idx]
+        out[f"agree_{m}"] = rec_idx == a_idx
+        out[f"gain_{m}"] = _gain(MU[m], a_idx, rec_idx)
+
+    if "linucb" in policies and len(df):
+        if not has_linucb(b):
+            warnings.warn("no LinUCB factors in this bundle; replaying the greedy policy only")
+        else:
+            for m in METRICS:
+                _, _, rec = score_batch(df, metric=m, policy="linucb", alpha=alpha, bundle=b)
+                rec_idx = pd.Categorical(rec, categories=actions).codes.astype(np.int64)
+                out[f"rec_linucb_{m}"] = rec
+                out[f"agree_linucb_{m}"] = rec_idx == a_idx
+                out[f"gain_linucb_{m}"] = _gain(MU[m], a_idx, rec_idx)
+    return out
+
+
+def team_week_summary(plays: pd.DataFrame) -> pd.DataFrame:
+    """Per (season, week, posteam): plays, agreement rates, summed gain forgone and realized rewards."""
+    agree = [c for c in plays.columns if c.startswith("agree_")]
+    gain = [c for c in plays.columns if c.startswith("gain_")]
+    g = plays.groupby(TEAM_WEEK, observed=True, sort=True)
+    out = g.size().rename("plays").to_frame()
+    out = out.join(g["logged_masked"].sum().astype(int))
+    out = out.join(g[agree].mean())
+    out = out.join(g[gain + list(METRICS)].sum(min_count=1))
+    return out.reset_index()
+
+
+# --- per-season work, run in the pool ---
+def replay_season(data_path, season: int, art_dir=None, backend: str = None,
+                  policies=("greedy", "linucb"), alpha: float = DEFAULT_ALPHA, team_store=None):
+    """(per-play frame, team-week frame) for one season of the decisions table."""
+    b = get_bundle(art_dir, backend)
+    if team_store is not None and not isinstance(team_store, TeamWeekStore):
+        team_store = TeamWeekStore.load(team_store)
+    df = load_decisions(data_path, seasons=[season])
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")      # the parent warns once about missing LinUCB factors
+        plays = replay_frame(df, b, policies, alpha, team_store)
+    return plays, team_week_summary(plays)
+
+
+def replay(data_path, out_dir=None, seasons=None, workers: int = None, art_dir=None,
+           backend: str = None, policies=("greedy", "linucb"), alpha: float = DEFAULT_ALPHA,
+           team_store=None) -> pd.DataFrame:
+    """
+    Replay every season (or `seasons`) of the decisions table; returns the team-week table.
+    With `out_dir`, writes replay_plays.csv (season by season, as they finish in order) and
+    replay_team_week.csv there.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    seasons = data_seasons(data_path) if seasons is None else [int(s) for s in np.atleast_1d(seasons)]
+    if backend is None:
+        backend = default_backend(art_dir)
+    if "linucb" in policies and not has_linucb(get_bundle(art_dir, backend)):
+        warnings.warn("no LinUCB factors in this bundle; replaying the greedy policy only")
+
+    plays_csv = None
+    if out_dir is not None:
+        out_dir = Path(out_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        plays_csv = out_dir / "replay_plays.csv"
+        plays_csv.unlink(missing_ok=True)
+
+    args = (art_dir, backend, tuple(policies), alpha, team_store)
+    workers = min(workers or os.cpu_count() or 1, len(seasons) or 1)
+    weekly = []
+
+    def collect(plays, tw):
+        if plays_csv is not None:
+            plays.to_csv(plays_csv, mode="a", header=not plays_csv.exists(), index=False)
+        weekly.append(tw)
+
+    if workers == 1:
+        for s in seasons:
+            collect(*replay_season(data_path, s, *args))
+    else:
+        with ProcessPoolExecutor(workers) as ex:
+            futs = [ex.submit(replay_season, data_path, s, *args) for s in seasons]
+            for fut in futs:                 # in season order, whichever finishes first
+                collect(*fut.result())
+
+    table = pd.concat(weekly, ignore_index=True) if weekly else team_week_summary(
+        pd.DataFrame(columns=TEAM_WEEK + ["logged_masked"]))
+    if out_dir is not None:
+        table.to_csv(out_dir / "replay_team_week.csv", index=False)
+    return table
+
+
+def team_totals(team_week: pd.DataFrame, by=("season", "posteam")) -> pd.DataFrame:
+    """Roll the team-week table up (agreement rates weighted by plays)."""
+    agree = [c for c in team_week.columns if c.startswith("agree_")]
+    summed = [c for c in team_week.columns if c.startswith("gain_") or c in METRICS or c == "logged_masked"]
+    t = team_week.assign(**{c: team_week[c] * team_week["plays"] for c in agree})
+    out = t.groupby(list(by), observed=True)[["plays"] + summed + agree].sum(min_count=1)
+    out[agree] = out[agree].div(out["plays"], axis=0)
+    return out.reset_index()
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    ap = argparse.ArgumentParser(description="Replay logged 4th downs against the model's recommendations.")
+    ap.add_argument("--data", default="data/decisions_2016_2024.csv")
+    ap.add_argument("--out", default="replay", help="output directory")
+    ap.add_argument("--seasons", type=int, nargs="*", default=None)
+    ap.add_argument("--workers", type=int, default=None, help="default: all cores")
+    ap.add_argument("--art-dir", default=None)
+    ap.add_argument("--backend", default=None, choices=["joblib", "arrays", "auto"])
+    ap.add_argument("--no-linucb", action="store_true", help="greedy policy only")
+    ap.add_argument("--alpha", type=float, default=DEFAULT_ALPHA)
+    ap.add_argument("--team-store", default=None,
+                    help="team_week.npz to take the team metrics from (see team_store.py)")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    policies = ("greedy",) if args.no_linucb else ("greedy", "linucb")
+    tw = replay(args.data, args.out, args.seasons, args.workers, args.art_dir, args.backend,
+                policies, args.alpha, args.team_store)
+    print(f"{int(tw['plays'].sum())} plays, {len(tw)} team-weeks in {time.perf_counter() - t0:.1f}s "
+          f"-> {args.out}/")
+    print(team_totals(tw, by=("posteam",)).sort_values("gain_wpa", ascending=False).head(10)
+          .to_string(index=False))
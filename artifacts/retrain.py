@@ -0,0 +1,298 @@
+"""
+Rolling-origin retraining: for every season S, fit the models on seasons <= S and evaluate
+them on S + 1, so model_evaluation-style OPE runs on rows the models never saw.
+
+Per split, the preprocessor (the behavior notebooks' median-impute + scale / most-frequent
++ one-hot ColumnTransformer) is fit on the training rows and the design matrix is computed
+once. The behavior LogisticRegression and the six Ridge arms (EPA and WPA x fg / go / punt)
+are all fit on row subsets of that one matrix. Splits run in parallel worker processes.
+With "sparse" in the config the one-hot block stays sparse (CSR design) and the Ridge arms
+are solved from sparse Gram statistics (linucb.arm_stats / ridge_arms) instead of sklearn's
+iterative sparse solvers; the saved arms are still sklearn Ridge objects.
+
+Each split is a complete artifact directory that get_bundle() can load:
+
+    <out>/<version>/manifest.json                 config, data source, splits
+    <out>/<version>/eval_2020/metadata.json       + "split": train seasons, eval season, rows
+                             preprocessor.joblib, behavior_policy.joblib,
+                             arm_models_{epa,wpa}.joblib, arrays/ (incl. LinUCB factors, arm posteriors)
+                             eval.json            held-out behavior log-loss / accuracy,
+                                                  arm RMSE and DM / IPS / SNIPS / DR per metric
+
+`version` hashes the data file (path, size, mtime) and the training config, so a feature
+change writes a new version next to the old ones. eval.json is written last; re-running
+skips the splits that have it.
+
+    python artifacts/retrain.py --data data/decisions_2016_2024.csv --out retrain/ [--workers N]
+"""
+import hashlib
+import json
+import os
+import time
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+try:
+    from .array_store import export_from_joblib, save_linucb, save_posterior
+    from .inference import get_bundle
+    from .linucb import DEFAULT_LAMBDA, arm_stats, ridge_arms
+    from .ope import evaluate, policy_greedy
+    from .storage import load_decisions
+    from .sweep import ACTION_ALIASES, _source
+except ImportError:  # run as a script from artifacts/
+    from array_store import export_from_joblib, save_linucb, save_posterior
+    from inference import get_bundle
+    from linucb import DEFAULT_LAMBDA, arm_stats, ridge_arms
+    from ope import evaluate, policy_greedy
+    from storage import load_decisions
+    from sweep import ACTION_ALIASES, _source
+
+# the behavior notebooks' feature lists (goal_to_go is scaled as a number there)
+NUMERIC = [
+    "yardline_100", "ydstogo", "score_differential", "qtr", "game_seconds_remaining",
+    "off_epa_4w", "def_epa_4w", "fg_pct_short", "fg_pct_mid", "fg_pct_long", "punt_net_4w",
+    "plays_in_drive_so_far", "def_time_on_field_cum", "def_time_on_field_share",
+    "home_timeouts_remaining", "away_timeouts_remaining", "posteam_timeouts_remaining",
+    "defteam_timeouts_remaining", "temp", "wind", "goal_to_go",
+]
+CATEGORICAL = ["posteam", "defteam", "home_team", "away_team", "roof", "surface"]
+METRICS = ("epa", "wpa")
+CONFIG = {"l2": 5.0, "min_n": 50, "C": 1.0, "max_iter": 2000, "lambda_ucb": DEFAULT_LAMBDA,
+          "min_train_seasons": 1, "sparse": False}
+
+
+def rolling_splits(seasons, min_train_seasons: int = 1) -> list:
+    """[(train seasons, eval season)] with train = every season up to the one before eval."""
+    seasons = sorted(int(s) for s in set(seasons))
+    return [(seasons[:i], seasons[i]) for i in range(max(1, min_train_seasons), len(seasons))]
+
+
+def split_name(eval_season: int) -> str:
+    return f"eval_{int(eval_season)}"
+
+
+def version_id(data_path, cfg: dict) -> str:
+    blob = json.dumps({"source": _source(data_path), "config": cfg, "numeric": NUMERIC,
+                       "categorical": CATEGORICAL}, sort_keys=True)
+    return hashlib.sha1(blob.encode()).hexdigest()[:12]
+
+
+def load_training_frame(data_path) -> pd.DataFrame:
+    """Rows with a go / punt / fg action; categoricals as plain objects for sklearn."""
+    df = load_decisions(data_path)
+    a = df["action"].astype(str).str.strip().str.lower().replace(ACTION_ALIASES)
+    keep = a.isin(["fg", "go", "punt"])
+    df = df.loc[keep].assign(action=a[keep])
+    for c in CATEGORICAL:
+        if c in df.columns:
+            df[c] = df[c].astype(object).where(df[c].notna(), np.nan)
+    for c in NUMERIC + list(METRICS):
+        if c in df.columns:
+            df[c] = pd.to_numeric(df[c], errors="coerce").astype(float)
+    return df.reset_index(drop=True)
+
+
+def make_preprocessor(numeric, categorical, sparse: bool = False):
+    from sklearn.compose import ColumnTransformer
+    from sklearn.impute import SimpleImputer
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+    return ColumnTransformer(transformers=[
+        ("num", make_pipeline(SimpleImputer(strategy="median"), StandardScaler()), list(numeric)),
+        ("cat", make_pipeline(SimpleImputer(strategy="most_frequent"),
+                              OneHotEncoder(handle_unknown="ignore", sparse_output=sparse)), list(categorical)),
+    ], sparse_threshold=1.0 if sparse else 0.0)
+
+
+def fit_arms(X, y, r, actions, l2: float, min_n: int) -> dict:
+    """Ridge per action on its rows (as in the notebooks); ("const", mean) below min_n rows."""
+    from sklearn.linear_model import Ridge
+
+    if hasattr(X, "tocsr"):
+        return _arms_from_stats(X, y, r, actions, l2, min_n)
+    arms = {}
+    for a in actions:
+        rows = y == a
+        if rows.sum() < min_n:
+            arms[a] = ("const", float(r[rows].mean()) if rows.any() else 0.0)
+        else:
+            arms[a] = Ridge(alpha=l2, fit_intercept=True).fit(X[rows], r[rows])
+    return arms
+
+
+def _arms_from_stats(X, y, r, actions, l2: float, min_n: int) -> dict:
+    """fit_arms() for a sparse design: closed-form Ridge from per-arm Gram statistics."""
+    from sklearn.linear_model import Ridge
+
+    coef, intercept, const = ridge_arms(arm_stats(X, y, r, actions), l2, min_n)
+    arms = {}
+    for j, a in enumerate(actions):
+        if const[j]:
+            arms[a] = ("const", float(intercept[j]))
+            continue
+        m = Ridge(alpha=l2, fit_intercept=True)
+        m.coef_, m.intercept_, m.n_features_in_ = coef[j], float(intercept[j]), X.shape[1]
+        arms[a] = m
+    return arms
+
+
+def _predict(arms, X, actions) -> np.ndarray:
+    MU = np.zeros((X.shape[0], len(actions)))
+    for j, a in enumerate(actions):
+        m = arms[a]
+        MU[:, j] = m[1] if isinstance(m, tuple) else m.predict(X)
+    return MU
+
+
+def fit_split(df, train_seasons, eval_season: int, out_dir, cfg: dict = None, meta: dict = None) -> dict:
+    """Fit and write one split's artifacts into out_dir; returns its eval.json contents."""
+    import joblib
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.metrics import log_loss
+    from sklearn.pipeline import Pipeline
+
+    cfg = {**CONFIG, **(cfg or {})}
+    meta = meta or {k: v for k, v in get_bundle().meta.items() if k != "arrays"}
+    actions = list(meta["actions"])
+    numeric = [c for c in NUMERIC if c in df.columns]
+    categorical = [c for c in CATEGORICAL if c in df.columns]
+    t0 = time.perf_counter()
+
+    train = df.loc[df["season"].isin(train_seasons)].reset_index(drop=True)
+    test = df.loc[df["season"] == eval_season].reset_index(drop=True)
+    y = train["action"].to_numpy()
+
+    # one design matrix for the behavior model and all six arms
+    pre = make_preprocessor(numeric, categorical, cfg["sparse"])
+    X = pre.fit_transform(train[numeric + categorical])
+    lr = LogisticRegression(solver="lbfgs", max_iter=cfg["max_iter"], C=cfg["C"]).fit(X, y)
+    behavior = Pipeline([("columntransformer", pre), ("logisticregression", lr)])
+    arms, rows = {}, {}
+    for m in METRICS:
+        r = train[m].to_numpy()
+        rows[m] = ~np.isnan(r)
+        arms[m] = fit_arms(X[rows[m]], y[rows[m]], r[rows[m]], actions, cfg["l2"], cfg["min_n"])
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    split = {"train_seasons": [int(s) for s in train_seasons], "eval_season": int(eval_season),
+             "n_train": int(len(train)), "n_eval": int(len(test)), "config": cfg}
+    (out_dir / "metadata.json").write_text(json.dumps({**meta, "split": split}, indent=2))
+    joblib.dump(pre, out_dir / "preprocessor.joblib", compress=3)
+    joblib.dump(behavior, out_dir / "behavior_policy.joblib", compress=3)
+    for m in METRICS:
+        joblib.dump(arms[m], out_dir / f"arm_models_{m}.joblib", compress=3)
+    export_from_joblib(out_dir)
+    for m in METRICS:
+        r = train[m].to_numpy()
+        save_linucb(out_dir, m, actions, X[rows[m]], y[rows[m]], cfg["lambda_ucb"], rewards=r[rows[m]])
+        save_posterior(out_dir, m, actions, X[rows[m]], y[rows[m]], r[rows[m]], cfg["l2"], cfg["min_n"])
+
+    # held-out season, through the same fitted preprocessor (transformed once)
+    report = {**split, "fit_seconds": time.perf_counter() - t0}
+    if len(test):
+        Xe = pre.transform(test[numeric + categorical])
+        classes = [str(c) for c in lr.classes_]
+        P = lr.predict_proba(Xe)[:, [classes.index(a) for a in actions]]
+        a_idx = np.array([actions.index(a) for a in test["action"]])
+        report["behavior"] = {"log_loss": float(log_loss(a_idx, P, labels=range(len(actions)))),
+                              "accuracy": float((P.argmax(axis=1) == a_idx).mean())}
+        for m in METRICS:
+            r = test[m].to_numpy()
+            ok = ~np.isnan(r)
+            MU = _predict(arms[m], Xe[ok], actions)
+            resid = r[ok] - MU[np.arange(ok.sum()), a_idx[ok]]
+            ope = evaluate({"greedy": policy_greedy(MU)}, P[ok], MU, r[ok], a_idx[ok], B=0).iloc[0]
+            report[m] = {"n": int(ok.sum()), "rmse": float(np.sqrt(np.mean(resid ** 2))),
+                         "mean_logged": float(r[ok].mean()),
+                         **{k: float(ope[k]) for k in ("DM", "IPS", "SNIPS", "DR", "ESS")}}
+    tmp = out_dir / "eval.json.tmp"
+    tmp.write_text(json.dumps(report, indent=2))
+    os.replace(tmp, out_dir / "eval.json")
+    return report
+
+
+# --- worker processes ---
+_FRAME = {}
+
+def _init_worker(df, meta, threads):
+    from threadpoolctl import threadpool_limits
+    threadpool_limits(threads)              # split the cores between workers, not BLAS threads
+    _FRAME["df"], _FRAME["meta"] = df, meta
+
+def _run_split(train_seasons, eval_season, out_dir, cfg):
+    return fit_split(_FRAME["df"], train_seasons, eval_season, out_dir, cfg, _FRAME["meta"])
+
+
+def retrain(data_path, out_root="retrain", workers: int = None, cfg: dict = None,
+            seasons=None) -> pd.DataFrame:
+    """
+    Fit every rolling-origin split not already written under out_root/<version>/; returns
+    one row per split (eval season, rows, held-out metrics) in season order.
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    cfg = {**CONFIG, **(cfg or {})}
+    root = Path(out_root) / version_id(data_path, cfg)
+    df = load_training_frame(data_path)
+    splits = rolling_splits(df["season"].dropna().astype(int) if seasons is None else seasons,
+                            cfg["min_train_seasons"])
+    meta = {k: v for k, v in get_bundle().meta.items() if k != "arrays"}
+    root.mkdir(parents=True, exist_ok=True)
+    (root / "manifest.json").write_text(json.dumps({
+        "source": _source(data_path), "config": cfg, "numeric": NUMERIC, "categorical": CATEGORICAL,
+        "splits": [{"train_seasons": t, "eval_season": e, "dir": split_name(e)} for t, e in splits],
+    }, indent=2))
+
+    todo = [(t, e) for t, e in splits if not (root / split_name(e) / "eval.json").exists()]
+    workers = min(workers or os.cpu_count() or 1, len(todo) or 1)
+    if workers == 1:
+        for t, e in todo:
+            fit_split(df, t, e, root / split_name(e), cfg, meta)
+    else:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(df, meta, max(1, (os.cpu_count() or 1) // workers))) as ex:
+            futs = [ex.submit(_run_split, t, e, root / split_name(e), cfg) for t, e in todo]
+            for fut in as_completed(futs):
+                fut.result()
+    return summary(root)
+
+
+def summary(root) -> pd.DataFrame:
+    """Flat table of the eval.json files under one version directory."""
+    rows = []
+    for p in sorted(Path(root).glob("eval_*/eval.json")):
+        rep = json.loads(p.read_text())
+        row = {"eval_season": rep["eval_season"], "train_from": min(rep["train_seasons"]),
+               "n_train": rep["n_train"], "n_eval": rep["n_eval"], "dir": str(p.parent)}
+        for k, v in rep.get("behavior", {}).items():
+            row[f"behavior_{k}"] = v
+        for m in METRICS:
+            for k, v in rep.get(m, {}).items():
+                row[f"{m}_{k}"] = v
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Rolling-origin retraining of the behavior and arm models.")
+    ap.add_argument("--data", default="data/decisions_2016_2024.csv")
+    ap.add_argument("--out", default="retrain")
+    ap.add_argument("--workers", type=int, default=None, help="default: all cores")
+    ap.add_argument("--l2", type=float, default=CONFIG["l2"])
+    ap.add_argument("--min-n", type=int, default=CONFIG["min_n"])
+    ap.add_argument("--C", type=float, default=CONFIG["C"])
+    ap.add_argument("--min-train-seasons", type=int, default=CONFIG["min_train_seasons"])
+    ap.add_argument("--sparse", action="store_true", help="CSR design matrix (see module docstring)")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    res = retrain(args.data, args.out, args.workers,
+                  {"l2": args.l2, "min_n": args.min_n, "C": args.C,
+                   "min_train_seasons": args.min_train_seasons, "sparse": args.sparse})
+    print(f"{len(res)} splits in {time.perf_counter() - t0:.1f}s")
+    cols = ["eval_season", "n_train", "n_eval", "behavior_log_loss", "epa_DR", "wpa_DR", "dir"]
+    print(res[[c for c in cols if c in res.columns]].to_string(index=False))
@@ -0,0 +1,95 @@
+"""
+Group-wise kernels for the feature build (features.py).
+
+pandas' groupby(...).apply(lambda s: s.shift().rolling(w).mean()) calls Python once per
+group, and every groupby shift / cumsum over the full play-by-play re-hashes the keys. Here
+the keys are factorized once into group codes, rows are stably sorted so each group is a
+contiguous run (play order within a group is kept), and each transform is a few NumPy
+passes over that layout:
+
+    shift               v[i-1] where row i-1 is in the same run
+    cumsum / cumcount   one cumsum, minus its value at the run start
+    prev_rolling_mean   window shifted copies of v summed where they stay in the run
+
+Results come back in the original row order. Rows with a missing key get NaN, like pandas
+(dropna=True). Outputs match pandas up to float rounding; the cumsums are exact when the
+values are whole numbers (game clock seconds).
+"""
+import numpy as np
+import pandas as pd
+
+
+class Groups:
+    """Rows grouped by one or more key columns."""
+
+    def __init__(self, *keys):
+        codes = None
+        for k in keys:
+            c, uniq = pd.factorize(k)
+            if codes is None:
+                codes = c.astype(np.int64)
+            else:
+                both = np.where((codes < 0) | (c < 0), -1, codes * len(uniq) + c)
+                codes = np.where(both < 0, -1, pd.factorize(both)[0])   # keep codes compact
+        self.codes = codes
+        self.order = np.argsort(codes, kind="stable")
+        c = codes[self.order]
+        self.n = len(c)
+        self.valid = c >= 0                                    # sorted layout
+        self.start = np.ones(self.n, dtype=bool)
+        self.start[1:] = c[1:] != c[:-1]
+        # index (in the sorted layout) of each row's run start
+        self.first = np.maximum.accumulate(np.where(self.start, np.arange(self.n), 0))
+
+    def _unsort(self, sorted_vals):
+        out = np.empty_like(sorted_vals)
+        out[self.order] = sorted_vals
+        return out
+
+    def _sorted(self, values):
+        return np.asarray(values, dtype=float)[self.order]
+
+    def shift(self, values, periods: int = 1):
+        """Previous row's value in the same group (NaN at the first `periods` rows)."""
+        v = np.asarray(values)[self.order]
+        out = np.full(self.n, np.nan, dtype=float if v.dtype.kind in "biuf" else object)
+        if periods < self.n:
+            pos = np.arange(periods, self.n)
+            same = pos - periods >= self.first[pos]
+            out[pos[same]] = v[pos[same] - periods]
+        out[~self.valid] = np.nan
+        return self._unsort(out)
+
+    def cumsum(self, values):
+        """Running sum within the group; NaN values are skipped (and stay NaN), like pandas."""
+        v = self._sorted(values)
+        miss = np.isnan(v)
+        v = np.where(miss, 0.0, v)
+        cs = np.cumsum(v)
+        out = cs - (cs[self.first] - v[self.first])
+        out[~self.valid | miss] = np.nan
+        return self._unsort(out)
+
+    def cumcount(self):
+        out = (np.arange(self.n) - self.first).astype(float)
+        out[~self.valid] = np.nan
+        return self._unsort(out)
+
+    def prev_rolling_mean(self, values, window: int, min_periods: int = 1):
+        """Mean of the previous `window` rows' non-NaN values (shift().rolling().mean())."""
+        v = self._sorted(values)
+        ok = ~np.isnan(v)
+        s = np.zeros(self.n)
+        cnt = np.zeros(self.n, dtype=np.int64)
+        idx = np.arange(self.n)
+        for k in range(window, 0, -1):         # oldest first, like pandas' running sum
+            pos = idx[k:]
+            src = pos - k
+            use = (src >= self.first[pos]) & ok[src]
+            s[pos[use]] += v[src[use]]
+            cnt[pos[use]] += 1
+        out = np.full(self.n, np.nan)
+        enough = cnt >= max(min_periods, 1)
+        out[enough] = s[enough] / cnt[enough]
+        out[~self.valid] = np.nan
+        return self._unsort(out)
@@ -0,0 +1,204 @@
+"""
+Memoized scoring: a bounded LRU (optionally TTL) cache in front of inference.score_batch.
+
+The key is the context reduced to FEATURE_COLS order: numerics rounded to `decimals` places
+(per-feature overrides allowed), categoricals stripped like the scorer does, and missing
+values kept apart (None vs NaN matter to the action constraints). Extra keys do not enter
+the key; the scorer ignores them. A miss scores the canonical context, so every context
+in the same quantum gets identical values whichever came first.
+
+One greedy entry holds both metrics (masked μ̂_EPA and μ̂_WPA), so switching the objective
+is always a hit; LinUCB entries are keyed by metric and alpha as well. A new bundle (a
+re-export or an online checkpoint picked up by get_bundle) empties the cache.
+
+    cache = get_cache()                       # process-wide default, shared by app / service
+    epa, wpa, rec, details = cache.score_context(ctx, metric="epa")
+    MU_epa, MU_wpa, rec = cache.score_batch(contexts)
+    cache.stats()                             # hits, misses, evictions, expired, size
+"""
+import threading
+import time
+import numpy as np
+from collections import OrderedDict
+
+try:
+    from .inference import POLICIES, get_bundle, linucb_batch, score_batch, score_context
+    from .linucb import DEFAULT_ALPHA
+except ImportError:  # run as a script from artifacts/
+    from inference import POLICIES, get_bundle, linucb_batch, score_batch, score_context
+    from linucb import DEFAULT_ALPHA
+
+DEFAULT_DECIMALS = 6
+_NAN = "\0nan"           # key stand-in for NaN (NaN != NaN would defeat the lookup)
+
+
+class ScoreCache:
+    """Thread-safe LRU/TTL cache of per-context scores."""
+
+    def __init__(self, maxsize: int = 4096, ttl: float = None, decimals=DEFAULT_DECIMALS,
+                 art_dir=None, backend: str = None):
+        self.maxsize = int(maxsize)
+        self.ttl = ttl
+        self.decimals = decimals          # int, or {feature: int} with DEFAULT_DECIMALS for the rest
+        self.art_dir, self.backend = art_dir, backend
+        self._bundle = None
+        self._entries = OrderedDict()     # key -> (expires at, value)
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "evictions": 0, "expired": 0, "invalidations": 0}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.counters["hits"] + self.counters["misses"]
+            return {**self.counters, "size": len(self._entries), "maxsize": self.maxsize,
+                    "hit_rate": self.counters["hits"] / total if total else 0.0}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    # --- keys ---
+    def _resolve(self):
+        """Current bundle; a different one than last time invalidates every entry."""
+        b = get_bundle(self.art_dir, self.backend)
+        if b is not self._bundle:
+            with self._lock:
+                if self._bundle is not None:
+                    self.counters["invalidations"] += 1
+                self._entries.clear()
+                self._bundle = b
+                num = set(b.numeric_features)
+                dec = self.decimals
+                self._cols = [(c, c in num, dec.get(c, DEFAULT_DECIMALS) if isinstance(dec, dict) else dec)
+                              for c in b.feature_cols]
+        return b
+
+    def canonical(self, context: dict):
+        """(key tuple, canonical context dict) for one context."""
+        key, ctx = [], {}
+        for c, numeric, dec in self._cols:
+            v = context.get(c)
+            if v is None:
+                k = None
+            elif isinstance(v, str):
+                v = k = v.strip()
+            elif isinstance(v, float) and v != v:
+                k = _NAN
+            elif numeric:
+                try:
+                    v = k = round(float(v), dec)
+                except (TypeError, ValueError):
+                    k = v
+            else:
+                k = v
+            key.append(k)
+            if c in context:
+                ctx[c] = v
+        return tuple(key), ctx
+
+    # --- storage ---
+    def _get(self, key, now):
+        e = self._entries.get(key)
+        if e is None:
+            return None
+        if e[0] is not None and e[0] <= now:
+            del self._entries[key]
+            self.counters["expired"] += 1
+            return None
+        self._entries.move_to_end(key)
+        return e[1]
+
+    def _put(self, key, value, now) -> None:
+        self._entries[key] = (None if self.ttl is None else now + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.counters["evictions"] += 1
+
+    def _lookup(self, contexts, tag, compute):
+        """Per-row cached values; misses (deduplicated) go to compute(list of canonical contexts)."""
+        keys, canon = zip(*(self.canonical(c) for c in contexts)) if contexts else ((), ())
+        keys = [(tag, k) for k in keys]
+        now = time.monotonic()
+        out, todo = [None] * len(keys), {}
+        with self._lock:
+            for i, k in enumerate(keys):
+                v = self._get(k, now)
+                if v is None:
+                    todo.setdefault(k, []).append(i)
+                    self.counters["misses"] += 1
+                else:
+                    out[i] = v
+                    self.counters["hits"] += 1
+        if todo:
+            first = [rows[0] for rows in todo.values()]
+            values = compute([canon[i] for i in first])
+            with self._lock:
+                for (k, rows), v in zip(todo.items(), values):
+                    self._put(k, v, now)
+                    for i in rows:
+                        out[i] = v
+        return out
+
+    # --- scoring ---
+    def score_batch(self, contexts, metric: str = "wpa", policy: str = "greedy",
+                    alpha: float = DEFAULT_ALPHA):
+        """Same contract as inference.score_batch (list of dicts or a DataFrame)."""
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown policy {policy!r} (expected one of {POLICIES})")
+        b = self._resolve()
+        if hasattr(contexts, "to_dict"):
+            contexts = contexts.to_dict("records")
+        K = len(b.actions)
+        if policy == "greedy":
+            def compute(ctxs):
+                MU_epa, MU_wpa, _ = score_batch(ctxs, bundle=b)
+                return list(np.hstack([MU_epa, MU_wpa]))
+            rows = self._lookup(contexts, ("greedy",), compute)
+            MU = np.array(rows).reshape(len(rows), 2 * K)
+            pick = MU[:, K:] if metric.lower() == "wpa" else MU[:, :K]
+        else:
+            def compute(ctxs):
+                MU_epa, MU_wpa, _ = score_batch(ctxs, bundle=b)
+                ucb = linucb_batch(ctxs, metric=metric, alpha=alpha, bundle=b)["ucb"]
+                return list(np.hstack([MU_epa, MU_wpa, ucb]))
+            rows = self._lookup(contexts, (policy, metric.lower(), float(alpha)), compute)
+            MU = np.array(rows).reshape(len(rows), 3 * K)
+            pick = MU[:, 2 * K:]
+        rec = np.asarray(b.actions, dtype=object)[np.argmax(pick, axis=1)] if len(MU) else np.array([], dtype=object)
+        return MU[:, :K], MU[:, K:2 * K], rec
+
+    def score_context(self, context: dict, metric: str = "wpa", policy: str = "greedy",
+                      alpha: float = DEFAULT_ALPHA):
+        """Same contract as inference.score_context."""
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown policy {policy!r} (expected one of {POLICIES})")
+        b = self._resolve()
+        actions = b.actions
+        if policy == "greedy":
+            MU_epa, MU_wpa, rec = self.score_batch([context], metric, policy, alpha)
+            epa = dict(zip(actions, MU_epa[0].tolist()))
+            wpa = dict(zip(actions, MU_wpa[0].tolist()))
+            return epa, wpa, str(rec[0]), {"epa": epa, "wpa": wpa}
+
+        # LinUCB details (μ̂, bonus, UCB per action) are cached whole, per metric and alpha
+        def compute(ctxs):
+            return [score_context(c, metric=metric, policy=policy, alpha=alpha, bundle=b) for c in ctxs]
+        epa, wpa, rec, details = self._lookup([context], (policy, metric.lower(), float(alpha), "one"),
+                                              compute)[0]
+        epa, wpa = dict(epa), dict(wpa)
+        return epa, wpa, rec, {**details, "epa": epa, "wpa": wpa}
+
+
+_DEFAULT = None
+_DEFAULT_LOCK = threading.Lock()
+
+def get_cache(maxsize: int = 4096, ttl: float = 600.0) -> ScoreCache:
+    """Process-wide cache (created on first use with these settings)."""
+    global _DEFAULT
+    with _DEFAULT_LOCK:
+        if _DEFAULT is None:
+            _DEFAULT = ScoreCache(maxsize, ttl)
+        return _DEFAULT
@@ -0,0 +1,348 @@
+"""
+Local HTTP/JSON scoring service with request micro-batching (stdlib asyncio, no web framework).
+
+    POST /score        {"context": {...}, "metric": "wpa", "policy": "greedy", "alpha": 0.8}
+                       -> {"recommended": "go", "epa": {action: μ̂}, "wpa": {action: μ̂}}
+    POST /score_batch  {"contexts": [{...}, ...], "metric": ..., "policy": ..., "alpha": ...}
+                       -> {"actions": [...], "recommended": [...], "epa": [[...]], "wpa": [[...]]}
+    GET  /healthz      -> {"status": "ok", "backend": ..., "pending": ..., counters}
+
+Requests that arrive within `window_ms` of each other are gathered into one micro-batch (at
+most `max_batch` contexts) and scored with one score_batch call per (metric, policy, alpha)
+in a worker thread, so the event loop keeps reading requests while a batch is scored. Each
+response carries exactly what score_context / score_batch would return for its own contexts.
+
+Backpressure: when more than `max_pending` contexts are waiting, new requests get 503 with
+Retry-After; a single request with more than `max_pending` contexts could never be queued and
+gets 413 instead, as do bodies over `max_body` bytes. Bad input gets 400; policy="linucb"
+without exported LinUCB factors gets 501, and other server-side scoring failures 503 / 500. Artifacts are loaded (and the models
+warmed up) once at startup; batches go through inference.get_bundle(), so re-exported or
+online-updated artifacts are picked up like in the app. Unless a backend is chosen, the
+service serves from the arrays/ format when it exists (same scores, much less overhead per
+batch than the sklearn pipeline).
+
+    python artifacts/service.py --port 8080 [--window-ms 2] [--max-batch 512] [--max-pending 8192]
+"""
+import asyncio
+import json
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from pathlib import Path
+
+try:
+    from .array_store import ARRAY_DIR
+    from .inference import ART, POLICIES, get_bundle, score_batch
+    from .linucb import DEFAULT_ALPHA
+    from .score_cache import ScoreCache
+except ImportError:  # run as a script from artifacts/
+    from array_store import ARRAY_DIR
+    from inference import ART, POLICIES, get_bundle, score_batch
+    from linucb import DEFAULT_ALPHA
+    from score_cache import ScoreCache
+
+MAX_HEADER = 16 * 1024
+
+
+class Overloaded(Exception):
+    pass
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class ScoringService:
+    """Micro-batching scorer plus a minimal HTTP/1.1 (keep-alive) front end."""
+
+    def __init__(self, art_dir=None, backend: str = None, window_ms: float = 2.0,
+                 max_batch: int = 512, max_pending: int = 8192, max_body: int = 1 << 20,
+                 cache_size: int = 0):
+        if backend is None and not os.environ.get("NFL4TH_BACKEND"):
+            # the pickle-free arrays score small batches ~6x faster than the sklearn objects
+            backend = "arrays" if (Path(art_dir or ART) / ARRAY_DIR).is_dir() else "auto"
+        self.art_dir, self.backend = art_dir, backend
+        self.actions = None
+        # optional memo of recent contexts (score_cache.py); values are those of the quantized context
+        self.cache = ScoreCache(cache_size, art_dir=art_dir, backend=backend) if cache_size else None
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        self.max_body = max_body
+        self.queue = deque()             # (key, contexts, future) waiting for a batch
+        self.pending = 0                 # contexts queued or being scored
+        self.counters = {"requests": 0, "contexts": 0, "batches": 0, "rejected": 0, "errors": 0}
+        self._wake = None
+        self._executor = ThreadPoolExecutor(1, thread_name_prefix="score")
+        self._server = None
+        self._batcher = None
+
+    @property
+    def bundle(self):
+        return get_bundle(self.art_dir, self.backend)
+
+    def warm_up(self) -> None:
+        """Load every model the scorer needs before the first request."""
+        b = self.bundle
+        self.actions = b.actions
+        score_batch([{}], bundle=b)
+        for metric in ("epa", "wpa"):
+            try:
+                b.linucb_chol(metric)
+            except FileNotFoundError:     # LinUCB factors not exported: greedy only
+                pass
+
+    # --- batching ---
+    async def submit(self, contexts: list, metric: str = "wpa", policy: str = "greedy",
+                     alpha: float = DEFAULT_ALPHA):
+        """Queue contexts for the next micro-batch; resolves to (MU_epa, MU_wpa, rec)."""
+        if not isinstance(metric, str) or metric.lower() not in ("epa", "wpa"):
+            raise HTTPError(400, f"Unknown metric {metric!r}")
+        try:
+            alpha = float(alpha)
+        except (TypeError, ValueError):
+            raise HTTPError(400, f"Bad alpha {alpha!r}")
+        if policy not in POLICIES:
+            raise HTTPError(400, f"Unknown policy {policy!r} (expected one of {POLICIES})")
+        if policy == "linucb":
+            try:
+                self.bundle.linucb_chol(metric)
+            except FileNotFoundError as e:      # the server's artifacts, not the request
+                raise HTTPError(501, f"LinUCB is not available: {e}")
+        n = len(contexts)
+        if n > self.max_pending:                 # would not fit even in an empty queue
+            raise HTTPError(413, f"{n} contexts in one request; at most {self.max_pending} are accepted")
+        if self.pending + n > self.max_pending:
+            self.counters["rejected"] += 1
+            raise Overloaded()
+        fut = asyncio.get_running_loop().create_future()
+        self.queue.append(((metric.lower(), policy, alpha), contexts, fut))
+        self.pending += n
+        self._wake.set()
+        try:
+            return await fut
+        finally:
+            self.pending -= n
+
+    def _take(self) -> list:
+        """Pop queued requests up to max_batch contexts (a larger single request goes alone)."""
+        items, rows = [], 0
+        while self.queue and (not items or rows + len(self.queue[0][1]) <= self.max_batch):
+            item = self.queue.popleft()
+            items.append(item)
+            rows += len(item[1])
+        return items
+
+    async def _batch_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._wake.wait()
+            self._wake.clear()
+            if not self.queue:
+                continue
+            if sum(len(c) for _, c, _ in self.queue) < self.max_batch:
+                await asyncio.sleep(self.window)             # let concurrent requests join
+            while self.queue:
+                items = self._take()
+                groups = {}
+                for item in items:
+                    groups.setdefault(item[0], []).append(item)
+                for key, group in groups.items():
+                    await self._run(loop, key, group)
+
+    async def _run(self, loop, key, group) -> None:
+        """
+        Score a group of requests in one call. On bad input (ValueError / TypeError) retry them
+        one by one so only the offending request gets 400; any other failure is the server's
+        and fails the whole group with 503 (missing artifact files) or 500.
+        """
+        flat = [ctx for _, contexts, _ in group for ctx in contexts]
+        try:
+            MU_epa, MU_wpa, rec = await loop.run_in_executor(self._executor, self._score, flat, *key)
+        except Exception as e:
+            if not isinstance(e, (ValueError, TypeError)):
+                status = 503 if isinstance(e, FileNotFoundError) else 500
+                self.counters["errors"] += len(group)
+                for _, _, fut in group:
+                    if not fut.done():
+                        fut.set_exception(HTTPError(status, f"Scoring failed on the server: {e}"))
+                return
+            if len(group) > 1:                   # isolate the request(s) with bad input
+                for item in group:
+                    await self._run(loop, key, [item])
+                return
+            self.counters["errors"] += 1
+            fut = group[0][2]
+            if not fut.done():
+                fut.set_exception(HTTPError(400, f"Scoring failed: {e}"))
+            return
+        self.counters["batches"] += 1
+        i = 0
+        for _, contexts, fut in group:
+            j = i + len(contexts)
+            if not fut.done():
+                fut.set_result((MU_epa[i:j], MU_wpa[i:j], rec[i:j]))
+            i = j
+
+    def _score(self, contexts, metric, policy, alpha):
+        if self.cache is not None:
+            return self.cache.score_batch(contexts, metric=metric, policy=policy, alpha=alpha)
+        return score_batch(contexts, metric=metric, policy=policy, alpha=alpha, bundle=self.bundle)
+
+    # --- HTTP ---
+    async def _route(self, method: str, path: str, body: bytes):
+        path = path.split("?", 1)[0]
+        if path == "/healthz" and method == "GET":
+            out = {"status": "ok", "backend": self.bundle.backend, "actions": self.actions,
+                   "pending": self.pending, **self.counters}
+            if self.cache is not None:
+                out["cache"] = self.cache.stats()
+            return 200, out
+        if path not in ("/score", "/score_batch"):
+            raise HTTPError(404, f"No route {path}")
+        if method != "POST":
+            raise HTTPError(405, f"{path} expects POST")
+        try:
+            req = json.loads(body or b"{}")
+        except ValueError as e:
+            raise HTTPError(400, f"Invalid JSON: {e}")
+        if not isinstance(req, dict):
+            raise HTTPError(400, "Request body must be a JSON object")
+        opts = {k: req[k] for k in ("metric", "policy", "alpha") if k in req}
+        actions = self.actions
+
+        if path == "/score":
+            ctx = req.get("context")
+            if not isinstance(ctx, dict):
+                raise HTTPError(400, "'context' must be an object")
+            self.counters["requests"] += 1
+            self.counters["contexts"] += 1
+            MU_epa, MU_wpa, rec = await self.submit([ctx], **opts)
+            return 200, {"recommended": str(rec[0]),
+                         "epa": dict(zip(actions, MU_epa[0].tolist())),
+                         "wpa": dict(zip(actions, MU_wpa[0].tolist()))}
+
+        contexts = req.get("contexts")
+        if not isinstance(contexts, list) or not all(isinstance(c, dict) for c in contexts):
+            raise HTTPError(400, "'contexts' must be a list of objects")
+        self.counters["requests"] += 1
+        self.counters["contexts"] += len(contexts)
+        if not contexts:
+            return 200, {"actions": actions, "recommended": [], "epa": [], "wpa": []}
+        MU_epa, MU_wpa, rec = await self.submit(contexts, **opts)
+        return 200, {"actions": actions, "recommended": [str(r) for r in rec],
+                     "epa": MU_epa.tolist(), "wpa": MU_wpa.tolist()}
+
+    async def _handle(self, reader, writer) -> None:
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    return
+                except asyncio.LimitOverrunError:
+                    await self._respond(writer, 431, {"error": "Headers too large"}, close=True)
+                    return
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, path, version = lines[0].split(" ", 2)
+                except ValueError:
+                    await self._respond(writer, 400, {"error": "Bad request line"}, close=True)
+                    return
+                headers = {}
+                for line in lines[1:]:
+                    if ":" in line:
+                        k, v = line.split(":", 1)
+                        headers[k.strip().lower()] = v.strip()
+                close = (headers.get("connection", "").lower() == "close"
+                         or version.upper() == "HTTP/1.0" and headers.get("connection", "").lower() != "keep-alive")
+                try:
+                    length = int(headers.get("content-length", 0))
+                except ValueError:
+                    await self._respond(writer, 400, {"error": "Bad Content-Length"}, close=True)
+                    return
+                if length > self.max_body:
+                    await self._respond(writer, 413, {"error": f"Body over {self.max_body} bytes"}, close=True)
+                    return
+                body = await reader.readexactly(length) if length else b""
+
+                extra = {}
+                try:
+                    status, payload = await self._route(method.upper(), path, body)
+                except HTTPError as e:
+                    status, payload = e.status, {"error": str(e)}
+                except Overloaded:
+                    status, payload = 503, {"error": "Overloaded, retry shortly"}
+                    extra["Retry-After"] = "1"
+                await self._respond(writer, status, payload, close, extra)
+                if close:
+                    return
+        except (asyncio.IncompleteReadError, ConnectionError):
+            return
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer, status: int, payload: dict, close: bool = False, extra: dict = None):
+        body = json.dumps(payload).encode()
+        head = [f"HTTP/1.1 {status} {HTTPStatus(status).phrase}",
+                "Content-Type: application/json", f"Content-Length: {len(body)}",
+                f"Connection: {'close' if close else 'keep-alive'}"]
+        head += [f"{k}: {v}" for k, v in (extra or {}).items()]
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode() + body)
+        await writer.drain()
+
+    # --- lifecycle ---
+    async def start(self, host: str = "127.0.0.1", port: int = 8080):
+        """Warm up, start the batcher and listen; returns the asyncio server."""
+        await asyncio.get_running_loop().run_in_executor(self._executor, self.warm_up)
+        self._wake = asyncio.Event()
+        self._batcher = asyncio.create_task(self._batch_loop())
+        self._server = await asyncio.start_server(self._handle, host, port, limit=MAX_HEADER)
+        return self._server
+
+    @property
+    def port(self) -> int:
+        return self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._batcher is not None:
+            self._batcher.cancel()
+        self._executor.shutdown(wait=False)
+
+
+async def serve(host: str = "127.0.0.1", port: int = 8080, **kw) -> None:
+    service = ScoringService(**kw)
+    server = await service.start(host, port)
+    print(f"Scoring service on http://{host}:{service.port} (backend={service.bundle.backend}, "
+          f"window={service.window * 1000:g} ms, max_batch={service.max_batch})")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="HTTP/JSON scoring service with micro-batching.")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8080)
+    ap.add_argument("--window-ms", type=float, default=2.0, help="how long a batch waits for company")
+    ap.add_argument("--max-batch", type=int, default=512, help="contexts per scoring call")
+    ap.add_argument("--max-pending", type=int, default=8192, help="queued contexts before 503s")
+    ap.add_argument("--cache-size", type=int, default=0,
+                    help="memoize this many recent contexts (score_cache.py; 0 = off)")
+    ap.add_argument("--art-dir", default=None)
+    ap.add_argument("--backend", default=None, choices=["joblib", "arrays", "auto"])
+    args = ap.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, art_dir=args.art_dir, backend=args.backend,
+                          window_ms=args.window_ms, max_batch=args.max_batch,
+                          max_pending=args.max_pending, cache_size=args.cache_size))
+    except KeyboardInterrupt:
+        pass
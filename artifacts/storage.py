@@ -0,0 +1,169 @@
+"""
+Columnar storage for the cleaned play-by-play and decisions tables.
+
+data_clean_2016_2024.ipynb writes CSVs; this module keeps a Parquet copy next to each one
+(data/decisions_2016_2024.parquet/season=2024/[week=12/]part-0.parquet, hive-partitioned)
+with compact dtypes:
+
+    category   team / venue / play-type codes, game ids
+    int8       down, qtr, timeouts, 0/1 play flags
+    int16      season, week, clock, yardline, distance, score and weather columns
+    float32    rolling rates and fatigue features (off/def EPA, FG%, punt net, time on field)
+    float64    the rewards (epa, wpa), so models train on the same values as from CSV
+
+On disk the integer columns are nullable. On load, a column that has missing values
+comes back as float32 with NaN (like read_csv would give, only narrower).
+
+    python artifacts/storage.py data/decisions_2016_2024.csv data/pbp_clean_2016_2024.csv
+"""
+import numpy as np
+from pathlib import Path
+
+CATEGORY = [
+    "posteam", "defteam", "home_team", "away_team", "posteam_type", "roof", "surface",
+    "play_type", "action", "field_goal_result", "timeout_team", "game_id", "game_date",
+]
+INT8 = [
+    "qtr", "down", "home_timeouts_remaining", "away_timeouts_remaining",
+    "posteam_timeouts_remaining", "defteam_timeouts_remaining", "goal_to_go",
+    "punt_attempt", "field_goal_attempt", "rush_attempt", "pass_attempt", "success",
+    "first_down", "touchdown", "punt_inside_twenty", "punt_out_of_bounds", "punt_downed",
+    "punt_fair_catch", "penalty", "aborted_play", "play_deleted", "timeout", "is_q4_or_later",
+]
+INT16 = [
+    "season", "week", "game_seconds_remaining", "half_seconds_remaining",
+    "quarter_seconds_remaining", "ydstogo", "yardline_100", "score_differential", "temp",
+    "wind", "yards_gained", "kick_distance", "return_yards", "plays_in_drive_so_far",
+]
+INT32 = ["play_id", "drive"]
+FLOAT32 = [
+    "off_epa_4w", "def_epa_4w", "fg_pct_short", "fg_pct_mid", "fg_pct_long", "punt_net_4w",
+    "def_time_on_field_cum", "def_time_on_field_share", "play_elapsed_s", "game_time_elapsed",
+]
+_INTS = {**{c: "Int8" for c in INT8}, **{c: "Int16" for c in INT16}, **{c: "Int32" for c in INT32}}
+
+
+def parquet_path(csv_path) -> Path:
+    """data/x.csv -> data/x.parquet (a directory of partitions)."""
+    return Path(csv_path).with_suffix(".parquet")
+
+
+def compact_dtypes(df):
+    """Cast known columns to the storage dtypes (nullable ints); other columns are left alone."""
+    import pandas as pd
+    df = df.copy()
+    for c in df.columns:
+        if c in CATEGORY:
+            df[c] = df[c].astype("category")
+        elif c in _INTS:
+            v = pd.to_numeric(df[c], errors="coerce")
+            whole = v.dropna()
+            # fractional values would be truncated: keep them as float32 instead
+            df[c] = v.astype(_INTS[c]) if (whole == np.round(whole)).all() else v.astype("float32")
+        elif c in FLOAT32:
+            df[c] = pd.to_numeric(df[c], errors="coerce").astype("float32")
+    return df
+
+
+def _numpy_ints(df):
+    """Nullable ints -> numpy ints, or float32 with NaN where values are missing."""
+    import pandas as pd
+    for c in df.columns:
+        dt = df[c].dtype
+        if isinstance(dt, pd.api.extensions.ExtensionDtype) and pd.api.types.is_integer_dtype(dt):
+            df[c] = df[c].astype("float32") if df[c].hasnans else df[c].astype(dt.numpy_dtype)
+    return df
+
+
+def write_parquet(df, root, by_week: bool = False) -> Path:
+    """
+    Write df as a season (and optionally week) partitioned dataset under `root`.
+    Partitions present in df replace existing ones; other partitions are kept.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    parts = ["season", "week"] if by_week else ["season"]
+    table = pa.Table.from_pandas(compact_dtypes(df), preserve_index=False)
+    pq.write_to_dataset(table, root, partition_cols=parts,
+                        existing_data_behavior="delete_matching")
+    return Path(root)
+
+
+def read_parquet(root, columns=None, seasons=None, weeks=None):
+    """
+    Load a partitioned dataset with column projection and partition pruning.
+    `seasons` / `weeks` are an int or a list of ints (None = all).
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    root = Path(root)
+    keys = ["season"]
+    first = next(root.glob("season=*"), None)
+    if first is not None and any(first.glob("week=*")):
+        keys.append("week")
+    part = ds.partitioning(pa.schema([(k, pa.int16()) for k in keys]), flavor="hive")
+    dataset = ds.dataset(root, format="parquet", partitioning=part)
+    # a column that is all-null in one file is stored as type null there: unify across files
+    files = [f.physical_schema for f in dataset.get_fragments()]
+    if len(files) > 1:
+        schema = pa.unify_schemas(files, promote_options="permissive")
+        for field in part.schema:
+            if schema.get_field_index(field.name) < 0:
+                schema = schema.append(field)
+        dataset = ds.dataset(root, schema=schema, format="parquet", partitioning=part)
+
+    expr = None
+    for key, vals in (("season", seasons), ("week", weeks)):
+        if vals is not None:
+            e = ds.field(key).isin([int(v) for v in np.atleast_1d(vals)])
+            expr = e if expr is None else expr & e
+    table = dataset.to_table(columns=list(columns) if columns is not None else None, filter=expr)
+    # pandas metadata (categoricals, nullable ints) lives in each file's schema
+    table = table.replace_schema_metadata(dataset.schema.metadata)
+    df = table.to_pandas()
+    # partition keys come back last; restore the requested (or original) column order
+    order = list(columns) if columns is not None else [
+        c["name"] for c in table.schema.pandas_metadata.get("columns", []) if c["name"] in df.columns]
+    if len(order) == df.shape[1]:
+        df = df[order]
+    return _numpy_ints(df)
+
+
+def load_table(path, columns=None, seasons=None, weeks=None, compact: bool = True):
+    """
+    Read a cleaned table by its CSV path, preferring the Parquet copy next to it.
+    Without one, the CSV is parsed (only `columns`), filtered, and cast like the Parquet.
+    """
+    import pandas as pd
+
+    pq_root = parquet_path(path)
+    if pq_root.is_dir():
+        return read_parquet(pq_root, columns, seasons, weeks)
+
+    df = pd.read_csv(path, usecols=list(columns) if columns is not None else None, low_memory=False)
+    for key, vals in (("season", seasons), ("week", weeks)):
+        if vals is not None and key in df.columns:
+            df = df.loc[df[key].isin([int(v) for v in np.atleast_1d(vals)])]
+    df = df.reset_index(drop=True)
+    if columns is not None:
+        df = df[list(columns)]
+    return _numpy_ints(compact_dtypes(df)) if compact else df
+
+
+def load_decisions(path="data/decisions_2016_2024.csv", columns=None, seasons=None, weeks=None):
+    return load_table(path, columns, seasons, weeks)
+
+
+if __name__ == "__main__":
+    import argparse
+    import pandas as pd
+
+    ap = argparse.ArgumentParser(description="Convert cleaned CSVs to season-partitioned Parquet.")
+    ap.add_argument("csv", nargs="+")
+    ap.add_argument("--by-week", action="store_true", help="also partition by week")
+    args = ap.parse_args()
+    for path in args.csv:
+        out = write_parquet(pd.read_csv(path, low_memory=False), parquet_path(path), args.by_week)
+        print("Wrote", out)
@@ -0,0 +1,358 @@
+"""
+Live play-feed scoring: consume play-by-play events as they happen, keep per-game state
+incrementally and emit a recommendation the moment a 4th down shows up.
+
+An event is one nflverse-style play-by-play row as a dict (game_id, play_id, drive, qtr,
+game_seconds_remaining, down, ydstogo, yardline_100, posteam, defteam, home/away team,
+score_differential, timeouts, roof / surface / temp / wind, ...). GameState folds a game's
+events in play order and keeps what add_fatigue_features (features.py) computes over a
+whole game, with the same values:
+
+    plays_in_drive_so_far     plays so far in the current drive, this one included
+    def_time_on_field_cum     game clock run off while the current defense has been on the field
+    def_time_on_field_share   ... as a share of the game clock run off so far
+    game_time_elapsed         game clock run off so far
+
+plus the last known score differential and timeouts, so an event without them reads the
+carried-forward values (the differential flips sign with possession). Every 4th-down event
+with a known spot is turned into a model context and scored by score_context_fast (fused
+weights, ~20µs), or score_context for policy="linucb". The emitted dict has the
+recommendation, both μ̂ maps, the logged action when the event carries a play_type, and the
+latency from the event's release by the source (or its arrival) to the recommendation.
+Team metrics (off/def EPA, FG%, punt net) come from a TeamWeekStore when given, looked up
+once per game and team, else the store's defaults.
+
+Sources are async iterables of event dicts. Two ship here:
+
+    ReplaySource    stored play-by-play (.csv / .parquet) played back with one task per game,
+                    paced by the game clock at `speed`x (0: as fast as possible), optionally
+                    with `copies` relabelled copies of every game to load-test many games
+    jsonl_source    newline-delimited JSON events from a file or stdin (a live feed piped in)
+
+A source may mark the end of a game with {"game_id": ..., "event": "end"}, which drops its
+state; otherwise the least recently seen game is dropped past `max_games`.
+
+    python artifacts/stream.py --replay play_by_play_2024.parquet --week 1 --speed 60
+    python artifacts/stream.py --replay play_by_play_2024.parquet --speed 0 --copies 20 --quiet
+    live_feed | python artifacts/stream.py --jsonl -
+"""
+import asyncio
+import json
+import math
+import sys
+import time
+from collections import OrderedDict
+
+try:
+    from .features import load_pbp
+    from .inference import get_bundle, score_context, score_context_fast
+    from .instrument import Histogram
+    from .linucb import DEFAULT_ALPHA
+    from .team_store import DEFAULTS, TEAM_COLS, TeamWeekStore
+except ImportError:  # run as a script from artifacts/
+    from features import load_pbp
+    from inference import get_bundle, score_context, score_context_fast
+    from instrument import Histogram
+    from linucb import DEFAULT_ALPHA
+    from team_store import DEFAULTS, TEAM_COLS, TeamWeekStore
+
+END = "end"
+PLAY_ACTIONS = {"run": "go", "pass": "go", "punt": "punt", "field_goal": "fg"}
+# event fields copied into the model context as they are
+CONTEXT_FIELDS = ["yardline_100", "ydstogo", "qtr", "game_seconds_remaining", "posteam", "defteam",
+                  "home_team", "away_team", "posteam_type", "roof", "surface", "temp", "wind"]
+ECHO_FIELDS = ["season", "week", "game_id", "play_id", "posteam", "defteam", "qtr",
+               "game_seconds_remaining", "yardline_100", "ydstogo"]
+
+
+def _val(ev: dict, key: str):
+    """ev[key], with NaN / "" / missing as None."""
+    v = ev.get(key)
+    if v is None or v == "" or (isinstance(v, float) and math.isnan(v)):
+        return None
+    return v
+
+
+def _num(ev: dict, key: str) -> float:
+    v = _val(ev, key)
+    return math.nan if v is None else float(v)
+
+
+class GameState:
+    """Incremental clock / drive / fatigue / score state of one game."""
+    __slots__ = ("game_id", "prev_gsr", "prev_def", "elapsed", "def_time", "drive_plays",
+                 "posteam", "score_diff", "home_to", "away_to", "team", "plays")
+
+    def __init__(self, game_id):
+        self.game_id = game_id
+        self.prev_gsr = math.nan
+        self.prev_def = None
+        self.elapsed = 0.0               # game clock run off so far
+        self.def_time = {}               # defteam -> clock run off while on the field
+        self.drive_plays = {}            # drive -> plays so far
+        self.posteam = None
+        self.score_diff = None           # from self.posteam's side
+        self.home_to = self.away_to = None
+        self.team = {}                   # posteam -> TEAM_COLS values (store lookups)
+        self.plays = 0
+
+    def update(self, ev: dict) -> dict:
+        """Fold in one play; returns its state features (as add_fatigue_features would)."""
+        self.plays += 1
+        gsr = _num(ev, "game_seconds_remaining")
+        dt = self.prev_gsr - gsr
+        dt = 0.0 if dt != dt else max(dt, 0.0)
+        # each elapsed interval is attributed to the previous defensive team
+        defteam = _val(ev, "defteam")
+        same_def = defteam is not None and defteam == self.prev_def
+        self.elapsed += dt
+        if defteam is not None:
+            cum = self.def_time.get(defteam, 0.0) + (dt if same_def else 0.0)
+            self.def_time[defteam] = cum
+        else:
+            cum = math.nan
+        share = cum / self.elapsed if self.elapsed > 0 and cum == cum else 0.0
+        drive = _val(ev, "drive")
+        if drive is not None:
+            n = self.drive_plays[drive] = self.drive_plays.get(drive, 0) + 1
+        else:
+            n = math.nan
+        self.prev_gsr, self.prev_def = gsr, defteam
+
+        posteam = _val(ev, "posteam")
+        diff = _val(ev, "score_differential")
+        if diff is not None:
+            self.score_diff = float(diff)
+        elif self.score_diff is not None and posteam is not None and posteam != self.posteam:
+            self.score_diff = -self.score_diff
+        if posteam is not None:
+            self.posteam = posteam
+        self._timeouts(ev)
+        return {"plays_in_drive_so_far": n, "def_time_on_field_cum": cum,
+                "def_time_on_field_share": share, "game_time_elapsed": self.elapsed}
+
+    def _timeouts(self, ev: dict) -> None:
+        home, away = _val(ev, "home_timeouts_remaining"), _val(ev, "away_timeouts_remaining")
+        if home is None or away is None:
+            pos, de = _val(ev, "posteam_timeouts_remaining"), _val(ev, "defteam_timeouts_remaining")
+            if pos is not None and de is not None and _val(ev, "posteam_type") in ("home", "away"):
+                home, away = (pos, de) if ev["posteam_type"] == "home" else (de, pos)
+        if home is not None:
+            self.home_to = float(home)
+        if away is not None:
+            self.away_to = float(away)
+
+    def timeouts(self, posteam_type) -> dict:
+        home = self.home_to if self.home_to is not None else math.nan
+        away = self.away_to if self.away_to is not None else math.nan
+        pos, de = (home, away) if posteam_type == "home" else (away, home)
+        return {"home_timeouts_remaining": home, "away_timeouts_remaining": away,
+                "posteam_timeouts_remaining": pos, "defteam_timeouts_remaining": de}
+
+
+class StreamScorer:
+    """Per-game states plus the 4th-down scoring step; process() one event at a time."""
+
+    def __init__(self, bundle=None, team_store=None, metric: str = "wpa", policy: str = "greedy",
+                 alpha: float = DEFAULT_ALPHA, max_games: int = 512):
+        self.bundle = bundle or get_bundle()
+        if policy == "greedy":
+            self.bundle.fused                  # load the weights now, not on the first 4th down
+        if team_store is not None and not isinstance(team_store, TeamWeekStore):
+            team_store = TeamWeekStore.load(team_store)
+        self.team_store = team_store
+        self.metric, self.policy, self.alpha = metric, policy, alpha
+        self.max_games = max_games
+        self.games = OrderedDict()
+        self.latency = Histogram()
+        self.counters = {"events": 0, "decisions": 0, "games": 0}
+
+    def state(self, game_id) -> GameState:
+        g = self.games.get(game_id)
+        if g is None:
+            g = self.games[game_id] = GameState(game_id)
+            self.counters["games"] += 1
+            while len(self.games) > self.max_games:
+                self.games.popitem(last=False)
+        else:
+            self.games.move_to_end(game_id)
+        return g
+
+    def _team(self, g: GameState, ev: dict, posteam) -> dict:
+        vals = g.team.get(posteam)
+        if vals is None:
+            if self.team_store is not None and posteam is not None:
+                vals = self.team_store.lookup(_num(ev, "season"), _num(ev, "week"), posteam)
+            else:
+                vals = {c: DEFAULTS[c] for c in TEAM_COLS}
+            g.team[posteam] = vals
+        return vals
+
+    def context(self, g: GameState, ev: dict, feats: dict) -> dict:
+        """Model context of a 4th-down event from the event and the game state."""
+        ctx = {c: _val(ev, c) for c in CONTEXT_FIELDS}
+        ctx.update(self._team(g, ev, ctx["posteam"]))
+        ctx.update(feats)
+        ctx.update(g.timeouts(ctx["posteam_type"]))
+        ctx["score_differential"] = g.score_diff
+        gtg = _val(ev, "goal_to_go")
+        if gtg is None:
+            gtg = int(ctx["yardline_100"] <= 10 and ctx["ydstogo"] >= ctx["yardline_100"])
+        ctx["goal_to_go"] = int(gtg)
+        return ctx
+
+    def is_decision(self, ev: dict) -> bool:
+        return (_val(ev, "down") is not None and float(ev["down"]) == 4
+                and _val(ev, "yardline_100") is not None and _val(ev, "ydstogo") is not None
+                and _val(ev, "posteam") is not None)
+
+    def process(self, ev: dict, t_recv: float = None):
+        """Fold one event into its game; a recommendation dict for a 4th down, else None."""
+        t0 = ev.get("_t") or t_recv or time.perf_counter()
+        self.counters["events"] += 1
+        gid = ev.get("game_id")
+        if ev.get("event") == END:
+            self.games.pop(gid, None)
+            return None
+        g = self.state(gid)
+        feats = g.update(ev)
+        if not self.is_decision(ev):
+            return None
+
+        ctx = self.context(g, ev, feats)
+        if self.policy == "greedy":
+            epa, wpa, rec, _ = score_context_fast(ctx, self.metric, bundle=self.bundle)
+        else:
+            epa, wpa, rec, _ = score_context(ctx, self.metric, self.policy, self.alpha, self.bundle)
+        out = {c: _val(ev, c) for c in ECHO_FIELDS}
+        out.update(score_differential=ctx["score_differential"], metric=self.metric,
+                   recommended=rec, logged=PLAY_ACTIONS.get(_val(ev, "play_type")), epa=epa, wpa=wpa)
+        dt = time.perf_counter() - t0
+        self.latency.observe(dt)
+        self.counters["decisions"] += 1
+        out["latency_ms"] = dt * 1e3
+        return out
+
+    def summary(self) -> dict:
+        h = self.latency
+        return {**self.counters, "active_games": len(self.games),
+                "latency_p50_ms": h.quantile(0.5) * 1e3, "latency_p99_ms": h.quantile(0.99) * 1e3,
+                "latency_max_ms": h.max * 1e3}
+
+
+# --- sources ---
+class ReplaySource:
+    """
+    Stored play-by-play played back as a live feed: every game runs as its own task,
+    sleeping between plays for the game clock they ran off divided by `speed`
+    (speed=0: no pacing). Paced events carry "_t", the perf_counter time they were
+    released, so latency includes any time spent queued behind other games; unpaced ones
+    are timed from when the consumer takes them.
+    """
+
+    def __init__(self, pbp, seasons=None, weeks=None, games=None, speed: float = 0.0,
+                 copies: int = 1, max_queue: int = 10_000):
+        if not hasattr(pbp, "columns"):
+            pbp = load_pbp(pbp, seasons, weeks)
+        if "play_id" in pbp.columns:
+            pbp = pbp.sort_values(["game_id", "play_id"], kind="stable")
+        groups = [rows for _, rows in pbp.groupby("game_id", sort=False)]
+        if games is not None:
+            groups = groups[:games]
+        self.games = [rows.astype(object).where(rows.notna(), None).to_dict("records") for rows in groups]
+        self.speed = float(speed)
+        self.copies = int(copies)
+        self.max_queue = max_queue
+
+    def __len__(self):
+        return sum(len(g) + 1 for g in self.games) * self.copies
+
+    async def _game(self, plays: list, copy: int, queue: asyncio.Queue) -> None:
+        gid = plays[0]["game_id"] if copy == 0 else f"{plays[0]['game_id']}#{copy}"
+        prev = None
+        try:
+            for play in plays:
+                gsr = play.get("game_seconds_remaining")
+                if self.speed > 0:
+                    if prev is not None and gsr is not None and prev > gsr:
+                        await asyncio.sleep((prev - gsr) / self.speed)
+                    await queue.put({**play, "game_id": gid, "_t": time.perf_counter()})
+                else:
+                    await queue.put({**play, "game_id": gid})
+                    await asyncio.sleep(0)      # interleave the games
+                prev = gsr if gsr is not None else prev
+        finally:                                # the iterator counts one END per game
+            await queue.put({"game_id": gid, "event": END})
+
+    async def __aiter__(self):
+        queue = asyncio.Queue(self.max_queue)
+        tasks = [asyncio.create_task(self._game(g, k, queue))
+                 for k in range(self.copies) for g in self.games if g]
+        left = len(tasks)
+        try:
+            while left:
+                ev = await queue.get()
+                left -= ev.get("event") == END
+                yield ev
+            await asyncio.gather(*tasks)        # re-raise a failed game task
+        finally:
+            for t in tasks:
+                t.cancel()
+
+
+async def jsonl_source(f=None):
+    """Events as JSON objects, one per line, from a text file object (default: stdin)."""
+    f = f or sys.stdin
+    loop = asyncio.get_running_loop()
+    while True:
+        line = await loop.run_in_executor(None, f.readline)
+        if not line:
+            return
+        if line.strip():
+            yield json.loads(line)
+
+
+async def run(source, scorer: StreamScorer, sink=None) -> dict:
+    """Feed every event of `source` through `scorer`; recommendations go to sink(rec)."""
+    async for ev in source:
+        rec = scorer.process(ev, time.perf_counter())
+        if rec is not None and sink is not None:
+            sink(rec)
+    return scorer.summary()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Score 4th downs from a live (or replayed) play-by-play feed.")
+    src = ap.add_mutually_exclusive_group(required=True)
+    src.add_argument("--replay", help="play-by-play file (.csv / .parquet) to play back")
+    src.add_argument("--jsonl", help="file of JSON events, one per line ('-' for stdin)")
+    ap.add_argument("--seasons", type=int, nargs="*", default=None)
+    ap.add_argument("--week", type=int, nargs="*", default=None)
+    ap.add_argument("--games", type=int, default=None, help="replay only the first N games")
+    ap.add_argument("--speed", type=float, default=0.0, help="game-clock seconds per second (0: unpaced)")
+    ap.add_argument("--copies", type=int, default=1, help="concurrent relabelled copies of each game")
+    ap.add_argument("--metric", default="wpa", choices=["epa", "wpa"])
+    ap.add_argument("--policy", default="greedy", choices=["greedy", "linucb"])
+    ap.add_argument("--alpha", type=float, default=DEFAULT_ALPHA)
+    ap.add_argument("--art-dir", default=None)
+    ap.add_argument("--backend", default=None, choices=["joblib", "arrays", "auto"])
+    ap.add_argument("--team-store", default=None, help="team_week.npz for the team metrics")
+    ap.add_argument("--quiet", action="store_true", help="no per-decision output, summary only")
+    args = ap.parse_args()
+
+    scorer = StreamScorer(get_bundle(args.art_dir, args.backend), args.team_store,
+                          args.metric, args.policy, args.alpha)
+    if args.replay:
+        source = ReplaySource(args.replay, args.seasons, args.week, args.games, args.speed, args.copies)
+    else:
+        source = jsonl_source(None if args.jsonl == "-" else open(args.jsonl))
+
+    def emit(rec):
+        print(json.dumps(rec), flush=True)
+
+    t0 = time.perf_counter()
+    summary = asyncio.run(run(source, scorer, None if args.quiet else emit))
+    summary["wall_s"] = time.perf_counter() - t0
+    print(json.dumps(summary), file=sys.stderr)
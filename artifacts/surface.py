@@ -0,0 +1,328 @@
+"""
+Precomputed decision surfaces: μ̂ per action over a situation grid, for instant lookups.
+
+For a fixed base context (a team-week: posteam, its team metrics from team_store.py, plus
+whatever is known about the game: opponent, venue, weather, timeouts) the scorer is run once
+over every situation on the grid
+
+    yardline_100        1..99                  exact (every yard)
+    ydstogo             1-6, 8, 10, 15, 20     interpolated
+    score_differential  -21..21 (9 nodes)      interpolated
+    qtr                 1..4                   exact
+    clock               0, 300, 600, 900       seconds left in the quarter, interpolated
+
+and the μ̂ (both metrics, _apply_action_constraints masks applied, so masked actions hold
+-1e9) and the greedy pick per metric are stored, float32 / int8, about 3.7 MB per team-week.
+The situation-derived inputs follow the app: game_seconds_remaining from qtr and clock,
+goal_to_go, and its hidden defaults for the drive / fatigue features.
+
+A lookup on the grid reads the stored cell. Between nodes μ̂ is interpolated multilinearly
+(the arms are linear in the raw numerics, so this agrees with the scorer up to rounding);
+when the surrounding cells differ in goal_to_go or in which actions are masked, or the
+situation is off the grid (ydstogo > 20, |score| > 21, overtime, fractional yardline), the
+lookup falls back to live scoring. The grid keeps the constraint thresholds (4th-and-5,
+tied, 5:00 left) as nodes so a mask never changes inside a cell.
+
+    python artifacts/surface.py --season 2024 --week 12 --teams KC BUF --set roof=dome
+"""
+import bisect
+import json
+import os
+import numpy as np
+from pathlib import Path
+
+try:
+    from .inference import get_bundle, score_batch
+    from .team_store import TeamWeekStore
+except ImportError:  # run as a script from artifacts/
+    from inference import get_bundle, score_batch
+    from team_store import TeamWeekStore
+
+AXES = {
+    "yardline_100": np.arange(1, 100),
+    "ydstogo": np.array([1, 2, 3, 4, 5, 6, 8, 10, 15, 20]),
+    "score_differential": np.array([-21, -14, -7, -3, 0, 3, 7, 14, 21]),
+    "qtr": np.array([1, 2, 3, 4]),
+    "clock": np.array([0, 300, 600, 900]),
+}
+INTERP = ("ydstogo", "score_differential", "clock")
+MASKED = -1e8            # anything at or below is a masked action (inference uses -1e9)
+FORMAT_VERSION = 1
+
+
+def situation_frame(base: dict, yardline_100, ydstogo, score_differential, qtr, clock):
+    """Contexts for situations (arrays of equal length) on top of a base context, like the app builds them."""
+    import pandas as pd
+
+    yd = np.asarray(yardline_100, dtype=float)
+    ytg = np.asarray(ydstogo, dtype=float)
+    q = np.asarray(qtr, dtype=float)
+    gsr = (4 - q) * 900 + np.asarray(clock, dtype=float)
+    df = pd.DataFrame({k: [v] * len(yd) for k, v in base.items()})
+    df["yardline_100"] = yd
+    df["ydstogo"] = ytg
+    df["score_differential"] = np.asarray(score_differential, dtype=float)
+    df["qtr"] = q
+    df["game_seconds_remaining"] = gsr
+    df["goal_to_go"] = ((yd <= 10) & (ytg >= yd)).astype(int)
+    # the app's hidden neutral defaults for inputs it does not collect
+    if "plays_in_drive_so_far" not in base:
+        df["plays_in_drive_so_far"] = 3
+    if "def_time_on_field_cum" not in base:
+        df["def_time_on_field_cum"] = (0.5 * (3600 - gsr)).astype(int)
+    if "def_time_on_field_share" not in base:
+        df["def_time_on_field_share"] = 0.5
+    return df
+
+
+def _grid(axes: dict):
+    mesh = np.meshgrid(*axes.values(), indexing="ij")
+    return [m.reshape(-1) for m in mesh]
+
+
+def team_week_base(season: int, week: int, team: str, store: TeamWeekStore, **game) -> dict:
+    """Base context for a team-week: posteam, its team metrics, and any known game inputs."""
+    return {"posteam": team, **store.lookup(season, week, team), **game}
+
+
+class DecisionSurfaces:
+    """Masked μ̂ and greedy picks over the situation grid, one surface per base context."""
+
+    def __init__(self, mu, pick, bases, labels, actions, axes=None):
+        self.mu = np.asarray(mu, dtype=np.float32)       # (n, *grid, 2K): EPA then WPA actions
+        self.pick = np.asarray(pick, dtype=np.int8)      # (n, *grid, 2): EPA, WPA argmax
+        self.bases = list(bases)
+        self.labels = [str(x) for x in labels]
+        self.actions = list(actions)
+        self.axes = {k: np.asarray(v) for k, v in (axes or AXES).items()}
+        self.K = len(self.actions)
+        self._nodes = {k: [float(x) for x in v] for k, v in self.axes.items()}   # for bisect
+
+    def __repr__(self):
+        return f"DecisionSurfaces({len(self.labels)} surfaces, {self.nbytes / 1e6:.1f} MB)"
+
+    @property
+    def nbytes(self) -> int:
+        return self.mu.nbytes + self.pick.nbytes
+
+    @classmethod
+    def build(cls, bases, labels=None, bundle=None, axes=None):
+        """Score every grid situation for each base context (masks applied by score_batch)."""
+        b = bundle or get_bundle()
+        axes = {k: np.asarray(v) for k, v in (axes or AXES).items()}
+        shape = tuple(len(v) for v in axes.values())
+        grid = _grid(axes)
+        mu = np.empty((len(bases), *shape, 2 * len(b.actions)), dtype=np.float32)
+        pick = np.empty((len(bases), *shape, 2), dtype=np.int8)
+        for i, base in enumerate(bases):
+            MU_epa, MU_wpa, _ = score_batch(situation_frame(base, *grid), bundle=b)
+            mu[i] = np.hstack([MU_epa, MU_wpa]).reshape(*shape, -1)
+            pick[i] = np.stack([MU_epa.argmax(axis=1), MU_wpa.argmax(axis=1)], axis=1).reshape(*shape, 2)
+        labels = labels if labels is not None else [str(i) for i in range(len(bases))]
+        return cls(mu, pick, bases, labels, b.actions, axes)
+
+    # --- persistence (plain arrays, no pickle) ---
+    def save(self, path) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp.npz")
+        np.savez(tmp, format=np.int64(FORMAT_VERSION), mu=self.mu, pick=self.pick,
+                 bases=np.array([json.dumps(b, sort_keys=True) for b in self.bases]),
+                 labels=np.array(self.labels), actions=np.array(self.actions),
+                 axis_names=np.array(list(self.axes)),
+                 **{f"axis_{k}": v for k, v in self.axes.items()})
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def load(cls, path) -> "DecisionSurfaces":
+        with np.load(path, allow_pickle=False) as z:
+            if int(z["format"]) != FORMAT_VERSION:
+                raise ValueError(f"{path}: unsupported surface format; rebuild it")
+            axes = {str(k): z[f"axis_{k}"] for k in z["axis_names"]}
+            return cls(z["mu"], z["pick"], [json.loads(str(b)) for b in z["bases"]],
+                       [str(x) for x in z["labels"]], [str(a) for a in z["actions"]], axes)
+
+    def index(self, label) -> int:
+        return label if isinstance(label, (int, np.integer)) else self.labels.index(str(label))
+
+    # --- lookups ---
+    def lookup_many(self, entry, yardline_100, ydstogo, score_differential, qtr, clock,
+                    metric: str = "wpa", bundle=None):
+        """
+        Situations (arrays) for one surface -> (MU_epa (N,K), MU_wpa (N,K), recommended (N,),
+        live (N,) bool: True where the row was scored live instead of read from the table).
+        """
+        e = self.index(entry)
+        names = list(self.axes)
+        query = dict(zip(names, (np.atleast_1d(np.asarray(v, dtype=float))
+                                 for v in (yardline_100, ydstogo, score_differential, qtr, clock))))
+        n = len(query["yardline_100"])
+        ok = np.ones(n, dtype=bool)
+        lo, frac = {}, {}
+        for name in names:
+            nodes, q = self.axes[name], query[name]
+            if name in INTERP:
+                ok &= (q >= nodes[0]) & (q <= nodes[-1])
+                j = np.clip(np.searchsorted(nodes, q, side="right") - 1, 0, len(nodes) - 2)
+                lo[name] = j
+                frac[name] = np.where(ok, (q - nodes[j]) / (nodes[j + 1] - nodes[j]), 0.0)
+            else:
+                j = np.clip(np.searchsorted(nodes, q), 0, len(nodes) - 1)
+                ok &= nodes[j] == q
+                lo[name] = j
+
+        MU = np.zeros((n, 2 * self.K))
+        masked_any = np.zeros((n, 2 * self.K), dtype=bool)
+        masked_all = np.ones((n, 2 * self.K), dtype=bool)
+        gtg_q = (query["yardline_100"] <= 10) & (query["ydstogo"] >= query["yardline_100"])
+        gtg_bad = np.zeros(n, dtype=bool)
+        for corner in range(2 ** len(INTERP)):
+            idx, w = dict(lo), np.ones(n)
+            for bit, name in enumerate(INTERP):
+                up = (corner >> bit) & 1
+                idx[name] = lo[name] + up
+                w *= frac[name] if up else 1.0 - frac[name]
+            vals = self.mu[(e, *[idx[k] for k in names])].astype(float)
+            used = (w > 0)[:, None]
+            m = vals <= MASKED
+            masked_any |= m & used
+            masked_all &= m | ~used
+            MU += w[:, None] * np.where(m, 0.0, vals)
+            yd = self.axes["yardline_100"][idx["yardline_100"]]
+            ytg = self.axes["ydstogo"][idx["ydstogo"]]
+            gtg_bad |= (w > 0) & (((yd <= 10) & (ytg >= yd)) != gtg_q)
+        ok &= ~(masked_any != masked_all).any(axis=1) & ~gtg_bad
+        MU[masked_all] = -1e9
+
+        k = self.K
+        on_node = np.all([frac[name] == 0 for name in INTERP], axis=0) & ok
+        j_metric = 1 if metric.lower() == "wpa" else 0
+        pick = np.argmax(MU[:, k:] if j_metric else MU[:, :k], axis=1)
+        if on_node.any():
+            cells = (e, *[lo[name][on_node] for name in names], j_metric)
+            pick[on_node] = self.pick[cells]
+        rec = np.asarray(self.actions, dtype=object)[pick]
+
+        live = ~ok
+        if live.any():
+            ctx = situation_frame(self.bases[e], *(query[name][live] for name in names))
+            L_epa, L_wpa, L_rec = score_batch(ctx, metric=metric, bundle=bundle or get_bundle())
+            MU[live] = np.hstack([L_epa, L_wpa])
+            rec[live] = L_rec
+        return MU[:, :k], MU[:, k:], rec, live
+
+    def _locate(self, name: str, q: float):
+        """(lower node index, fraction to the next node) or None when q is off the axis."""
+        nodes = self._nodes[name]
+        if name not in INTERP:
+            j = bisect.bisect_left(nodes, q)
+            return (j, 0.0) if j < len(nodes) and nodes[j] == q else None
+        if not nodes[0] <= q <= nodes[-1]:
+            return None
+        j = min(bisect.bisect_right(nodes, q) - 1, len(nodes) - 2)
+        return j, (q - nodes[j]) / (nodes[j + 1] - nodes[j])
+
+    def lookup(self, entry, yardline_100, ydstogo, score_differential, qtr, clock,
+               metric: str = "wpa", bundle=None):
+        """One situation; same return contract as inference.score_context_fast."""
+        e = self.index(entry)
+        q = dict(zip(self.axes, (float(yardline_100), float(ydstogo), float(score_differential),
+                                 float(qtr), float(clock))))
+        loc = [self._locate(name, v) for name, v in q.items()]
+        mu, source, j_metric = None, "live", 1 if metric.lower() == "wpa" else 0
+        if all(l is not None for l in loc):
+            (y, _), (t, ft), (d, fd), (qi, _), (c, fc) = loc
+            yd, ytg = q["yardline_100"], q["ydstogo"]
+            gtg = yd <= 10 and ytg >= yd
+            ytg_used = self._nodes["ydstogo"][t:t + 2] if ft > 0 else [self._nodes["ydstogo"][t]]
+            if ft == fd == fc == 0:
+                mu = self.mu[e, y, t, d, qi, c].astype(float)
+                rec = self.actions[self.pick[e, y, t, d, qi, c, j_metric]]
+                source = "table"
+            elif all((yd <= 10 and v >= yd) == gtg for v in ytg_used):
+                block = self.mu[e, y, t:t + 2, d:d + 2, qi, c:c + 2].reshape(8, -1).astype(float)
+                w = np.array([a * b * g for a in (1 - ft, ft) for b in (1 - fd, fd) for g in (1 - fc, fc)])
+                m = block[w > 0] <= MASKED
+                if (m == m[0]).all():
+                    mu = np.where(m[0], -1e9, w @ np.where(block <= MASKED, 0.0, block))
+                    rec = self.actions[int(np.argmax(mu[self.K:] if j_metric else mu[:self.K]))]
+                    source = "table"
+        if mu is None:
+            MU_epa, MU_wpa, recs, _ = self.lookup_many(e, *([v] for v in q.values()), metric=metric,
+                                                       bundle=bundle)
+            mu, rec = np.concatenate([MU_epa[0], MU_wpa[0]]), str(recs[0])
+        epa_scores = {a: float(mu[i]) for i, a in enumerate(self.actions)}
+        wpa_scores = {a: float(mu[self.K + i]) for i, a in enumerate(self.actions)}
+        return epa_scores, wpa_scores, rec, {"epa": epa_scores, "wpa": wpa_scores, "source": source}
+
+
+def accuracy_report(surfaces: DecisionSurfaces, n: int = 2000, seed: int = 0, bundle=None) -> dict:
+    """
+    Table size and the largest |μ̂_table - μ̂_live| over random situations, on grid nodes and
+    between them (unmasked actions; a masked action must be masked on both sides).
+    """
+    b = bundle or get_bundle()
+    rng = np.random.default_rng(seed)
+    ax = surfaces.axes
+    out = {"surfaces": len(surfaces.labels), "cells_per_surface": int(np.prod(surfaces.mu.shape[1:-1])),
+           "bytes": int(surfaces.nbytes)}
+    for kind in ("nodes", "between"):
+        err, agree, masks, table = 0.0, 0, True, 0
+        for e in range(len(surfaces.labels)):
+            sit = {"yardline_100": rng.choice(ax["yardline_100"], n), "qtr": rng.choice(ax["qtr"], n)}
+            for name in INTERP:
+                if kind == "nodes":
+                    sit[name] = rng.choice(ax[name], n).astype(float)
+                else:
+                    sit[name] = rng.uniform(ax[name][0], ax[name][-1], n)
+            if kind == "between":
+                sit["ydstogo"] = np.round(sit["ydstogo"])          # downs are whole yards
+                sit["score_differential"] = np.round(sit["score_differential"])
+                sit["clock"] = np.round(sit["clock"])
+            args = [sit[k] for k in ax]
+            T_epa, T_wpa, T_rec, live = surfaces.lookup_many(e, *args, bundle=b)
+            L_epa, L_wpa, L_rec = score_batch(situation_frame(surfaces.bases[e], *args), bundle=b)
+            T, L = np.hstack([T_epa, T_wpa]), np.hstack([L_epa, L_wpa])
+            mt, ml = T <= MASKED, L <= MASKED
+            masks &= bool((mt == ml).all())
+            both = ~mt & ~ml
+            if both.any():
+                err = max(err, float(np.abs(T - L)[both].max()))
+            agree += int((T_rec == L_rec).sum())
+            table += int((~live).sum())
+        total = n * len(surfaces.labels)
+        out[f"max_abs_err_{kind}"] = err
+        out[f"pick_agreement_{kind}"] = agree / total
+        out[f"table_share_{kind}"] = table / total
+        out[f"masks_match_{kind}"] = masks
+    return out
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Build decision surfaces for team-weeks.")
+    ap.add_argument("--season", type=int, required=True)
+    ap.add_argument("--week", type=int, required=True)
+    ap.add_argument("--teams", nargs="+", required=True)
+    ap.add_argument("--set", action="append", default=[], metavar="KEY=VALUE",
+                    help="known game inputs for every surface, e.g. roof=dome temp=70 defteam=BUF")
+    ap.add_argument("--decisions", default="data/decisions_2016_2024.csv")
+    ap.add_argument("--out", default=None, help="default: data/surfaces_<season>_w<week>.npz")
+    args = ap.parse_args()
+
+    game = {}
+    for kv in args.set:
+        k, v = kv.split("=", 1)
+        try:
+            game[k] = float(v)
+        except ValueError:
+            game[k] = v
+    store = TeamWeekStore.load_or_build(args.decisions)
+    bases = [team_week_base(args.season, args.week, t, store, **game) for t in args.teams]
+    surfaces = DecisionSurfaces.build(bases, labels=args.teams)
+    out = args.out or Path(args.decisions).with_name(f"surfaces_{args.season}_w{args.week}.npz")
+    print("Wrote", surfaces.save(out), surfaces)
+    for k, v in accuracy_report(surfaces).items():
+        print(f"  {k}: {v}")
@@ -0,0 +1,303 @@
+"""
+Off-policy evaluation sweep over policy / model hyperparameters.
+
+A grid spec (JSON) lists values per key; every combination that matters for its policy
+is evaluated with DM / IPS / SNIPS / DR, ESS and bootstrap CIs (ope.py):
+
+    {
+      "target": ["epa", "wpa"], "season": [null, 2024],
+      "policy": ["greedy", "eps", "linucb"],
+      "eps": [0.05, 0.1, 0.2],            # eps policy only
+      "alpha": [0.4, 0.8, 1.6],           # linucb only
+      "lambda_ucb": [1.0, 5.0],           # linucb only
+      "l2": [1.0, 5.0], "min_n": [50], "clip": [null, 50],
+      "bootstrap": 1000, "seed": 123
+    }
+
+The decisions CSV is read and encoded once by the parent (design matrix, behavior
+probabilities, rewards); workers memory-map those arrays read-only. With --sparse the design
+is kept as CSR (data / indices / indptr arrays, also memory-mapped): the Ridge and LinUCB
+statistics and widths run on the sparse rows (linucb.py) and the estimators only ever see
+the (N, K) μ̂ and propensity matrices, so no dense N x d matrix is built anywhere. The encoded
+arrays are reused by later runs only while the data file, the artifact bundle, the team store
+and the layout are the ones they were built from (cache_key, kept in the cache's meta.json).
+Each finished configuration is appended to the output CSV under a stable config_id (which
+includes the team store), so an interrupted sweep resumes where it stopped.
+
+    python artifacts/sweep.py --grid grid.json --out sweep_results.csv [--workers N]
+"""
+import hashlib
+import itertools
+import json
+import os
+import numpy as np
+from functools import lru_cache
+from pathlib import Path
+
+try:
+    from .linucb import arm_stats, confidence_widths, grams_from_stats, ridge_arms
+    from .ope import evaluate, policy_eps_greedy, policy_from_actions, policy_greedy
+    from .team_store import TeamWeekStore
+except ImportError:  # run as a script from artifacts/
+    from linucb import arm_stats, confidence_widths, grams_from_stats, ridge_arms
+    from ope import evaluate, policy_eps_greedy, policy_from_actions, policy_greedy
+    from team_store import TeamWeekStore
+
+GRID_KEYS = ["target", "season", "policy", "eps", "alpha", "lambda_ucb", "l2", "min_n", "clip",
+             "bootstrap", "seed"]
+DEFAULTS = {"target": "wpa", "season": None, "policy": "greedy", "eps": 0.05, "alpha": 0.8,
+            "lambda_ucb": 5.0, "l2": 5.0, "min_n": 50, "clip": None, "bootstrap": 1000, "seed": 123}
+POLICY_KEYS = {"greedy": set(), "eps": {"eps"}, "linucb": {"alpha", "lambda_ucb"}, "behavior": set()}
+# action spellings normalized like model_evaluation.ipynb
+ACTION_ALIASES = {"field_goal": "fg", "fieldgoal": "fg", "field goal": "fg",
+                  "go_for_it": "go", "go-for-it": "go", "go for it": "go"}
+
+
+def expand_grid(spec: dict, team_store: str = None) -> list:
+    """
+    All distinct configs; keys a policy doesn't use are set to None (so they don't multiply).
+    `team_store` (a store id, see store_id) is recorded with every config and keys its config_id.
+    """
+    values = {k: spec.get(k, DEFAULTS[k]) for k in GRID_KEYS}
+    values = {k: v if isinstance(v, list) else [v] for k, v in values.items()}
+    seen, out = set(), []
+    for combo in itertools.product(*values.values()):
+        cfg = {**dict(zip(GRID_KEYS, combo)), "team_store": team_store}
+        if cfg["policy"] not in POLICY_KEYS:
+            raise ValueError(f"Unknown policy {cfg['policy']!r} (expected one of {sorted(POLICY_KEYS)})")
+        for k in ("eps", "alpha", "lambda_ucb"):
+            if k not in POLICY_KEYS[cfg["policy"]]:
+                cfg[k] = None
+        cid = config_id(cfg)
+        if cid not in seen:
+            seen.add(cid)
+            out.append({"config_id": cid, **cfg})
+    return out
+
+
+def config_id(cfg: dict) -> str:
+    key = {k: cfg.get(k) for k in GRID_KEYS}
+    if cfg.get("team_store") is not None:       # results with and without a store are distinct
+        key["team_store"] = cfg["team_store"]
+    blob = json.dumps(key, sort_keys=True)
+    return hashlib.sha1(blob.encode()).hexdigest()[:12]
+
+
+# --- shared data: built once, memory-mapped by the workers ---
+def prepare_data(data_path, cache_dir, art_dir=None, team_store=None, sparse: bool = False) -> Path:
+    """
+    Encode the decisions CSV with the serving preprocessor and save plain .npy arrays.
+    With `team_store` (a TeamWeekStore or its .npz path) the team metrics are taken from the
+    store, so the evaluation sees the same values the app serves. With `sparse` the design
+    is saved as X_data / X_indices / X_indptr (CSR) instead of a dense X.
+    """
+    import pandas as pd
+    try:
+        from .inference import behavior_proba, get_bundle
+    except ImportError:
+        from inference import behavior_proba, get_bundle
+
+    b = get_bundle(art_dir)
+    key = cache_key(data_path, art_dir, team_store, sparse)
+    df = pd.read_csv(data_path)
+    if team_store is not None:
+        if not isinstance(team_store, TeamWeekStore):
+            team_store = TeamWeekStore.load(team_store)
+        df = team_store.attach(df)
+    a = df["action"].astype(str).str.lower().replace(ACTION_ALIASES)
+    df = df.loc[a.isin(b.actions)].reset_index(drop=True)
+    a = a.loc[a.isin(b.actions)].to_numpy()
+
+    f = b.fused
+    X = f.design(*f.encode(df), sparse=sparse)
+    arrays = {
+        "P_beh": behavior_proba(df, bundle=b),
+        "a_idx": np.array([b.actions.index(x) for x in a], dtype=np.int64),
+        "season": (df["season"].to_numpy(dtype=np.int64) if "season" in df.columns
+                   else np.zeros(len(df), dtype=np.int64)),
+        "epa": df["epa"].to_numpy(dtype=float),
+        "wpa": df["wpa"].to_numpy(dtype=float),
+    }
+    if sparse:
+        arrays.update({"X_data": X.data, "X_indices": X.indices, "X_indptr": X.indptr})
+    else:
+        arrays["X"] = X
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    for stale in cache_dir.glob("X*.npy"):
+        stale.unlink()
+    for name, arr in arrays.items():
+        np.save(cache_dir / f"{name}.npy", np.ascontiguousarray(arr))
+    (cache_dir / "meta.json").write_text(json.dumps({"actions": b.actions, "key": key,
+                                                     "sparse": sparse, "shape": list(X.shape)}))
+    return cache_dir
+
+
+def _source(path) -> list:
+    st = os.stat(path)
+    return [str(Path(path).resolve()), st.st_size, st.st_mtime_ns]
+
+def _store_source(team_store):
+    """Identity of a team store: its file's path / size / mtime, or a digest of an in-memory one."""
+    if team_store is None:
+        return None
+    if isinstance(team_store, TeamWeekStore):
+        h = hashlib.sha1()
+        for arr in (team_store.seasons, team_store.teams, team_store.values, team_store.src):
+            h.update(np.ascontiguousarray(arr).tobytes())
+        return ["<memory>", h.hexdigest()]
+    return _source(team_store)
+
+def store_id(team_store):
+    """Short id of a team store for the results table ("<file name>@<digest>"), None without one."""
+    src = _store_source(team_store)
+    if src is None:
+        return None
+    return f"{Path(src[0]).name}@{hashlib.sha1(json.dumps(src).encode()).hexdigest()[:8]}"
+
+def cache_key(data_path, art_dir=None, team_store=None, sparse: bool = False) -> dict:
+    """
+    Everything the encoded arrays depend on: the data file, the bundle that encoded it (resolved
+    directory plus artifact mtimes, as get_bundle keys on), the team store and the layout.
+    """
+    try:
+        from .inference import ART, _mtimes
+    except ImportError:
+        from inference import ART, _mtimes
+    d = Path(art_dir or ART).resolve()
+    return {"data": _source(data_path), "bundle": [str(d), list(_mtimes(d))],
+            "team_store": _store_source(team_store), "sparse": bool(sparse)}
+
+def _cached_key(cache_dir: Path):
+    try:
+        meta = json.loads((cache_dir / "meta.json").read_text())
+    except FileNotFoundError:
+        return None
+    return meta.get("key")
+
+
+_DATA = {}
+
+def _init_worker(cache_dir):
+    d = Path(cache_dir)
+    _DATA.clear()
+    _DATA.update({p.stem: np.load(p, mmap_mode="r") for p in d.glob("*.npy")})
+    meta = json.loads((d / "meta.json").read_text())
+    _DATA["actions"] = meta["actions"]
+    if meta.get("sparse"):
+        from scipy import sparse as sp
+        _DATA["X"] = sp.csr_matrix((_DATA.pop("X_data"), _DATA.pop("X_indices"), _DATA.pop("X_indptr")),
+                                   shape=tuple(meta["shape"]), copy=False)
+    _subset.cache_clear()
+
+
+@lru_cache(maxsize=8)
+def _subset(target: str, season):
+    """Rows for (target, season) with a reward, plus their per-arm sufficient statistics."""
+    r = np.asarray(_DATA[target])
+    rows = ~np.isnan(r)
+    if season is not None:
+        rows &= np.asarray(_DATA["season"]) == int(season)
+    idx = np.flatnonzero(rows)
+    X = _DATA["X"][idx] if hasattr(_DATA["X"], "tocsr") else np.asarray(_DATA["X"])[idx]
+    a_idx = np.asarray(_DATA["a_idx"])[idx]
+    K = len(_DATA["actions"])
+    stats = arm_stats(X, a_idx, r[idx], range(K))
+    return X, np.asarray(_DATA["P_beh"])[idx], r[idx], a_idx, stats
+
+
+def run_config(cfg: dict) -> dict:
+    """Evaluate one configuration against the worker's shared data."""
+    X, P_beh, r, a_idx, stats = _subset(cfg["target"], cfg["season"])
+    coef, intercept, _ = ridge_arms(stats, cfg["l2"], cfg["min_n"])
+    MU = X @ coef.T + intercept
+
+    policy = cfg["policy"]
+    if policy == "greedy":
+        P = policy_greedy(MU)
+    elif policy == "eps":
+        P = policy_eps_greedy(MU, cfg["eps"])
+    elif policy == "linucb":
+        L = np.linalg.cholesky(grams_from_stats(stats, cfg["lambda_ucb"]))
+        ucb = MU + cfg["alpha"] * confidence_widths(X, L)
+        P = policy_from_actions(ucb.argmax(axis=1), MU.shape[1])
+    else:  # "behavior": the logged policy itself
+        P = np.asarray(P_beh)
+    row = evaluate({policy: P}, P_beh, MU, r, a_idx, B=int(cfg["bootstrap"]), seed=int(cfg["seed"]),
+                   clip=cfg["clip"]).iloc[0]
+    return {**cfg, **row.drop("policy").to_dict()}
+
+
+def _append(out: Path, row: dict) -> None:
+    import pandas as pd
+    line = pd.DataFrame([row]).to_csv(index=False, header=not out.exists() or out.stat().st_size == 0)
+    with open(out, "a+") as f:
+        f.seek(0, os.SEEK_END)
+        if f.tell():
+            f.seek(f.tell() - 1)
+            if f.read(1) != "\n":       # previous run died mid-row
+                line = "\n" + line
+        f.write(line)
+        f.flush()
+
+
+def _read_results(out: Path):
+    """Completed rows of the results CSV (a row cut short has no value in its last column)."""
+    import pandas as pd
+    res = pd.read_csv(out, dtype={"config_id": str})
+    res = res.loc[res.iloc[:, -1].notna()]
+    return res.drop_duplicates("config_id", keep="last").reset_index(drop=True)
+
+
+def done_ids(out: Path) -> set:
+    if not out.exists() or out.stat().st_size == 0:
+        return set()
+    return set(_read_results(out)["config_id"])
+
+
+def run_sweep(spec: dict, data_path, out, workers: int = None, art_dir=None, cache_dir=None,
+              team_store=None, sparse: bool = False):
+    """Evaluate every config in the grid not already in `out`; returns the full results table."""
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    out = Path(out)
+    done = done_ids(out)
+    todo = [c for c in expand_grid(spec, store_id(team_store)) if c["config_id"] not in done]
+    if todo:
+        cache_dir = Path(cache_dir or out.with_name(out.stem + "_cache"))
+        if _cached_key(cache_dir) != cache_key(data_path, art_dir, team_store, sparse):
+            prepare_data(data_path, cache_dir, art_dir, team_store, sparse)
+        workers = workers or os.cpu_count() or 1
+        if workers == 1:
+            _init_worker(cache_dir)
+            for cfg in todo:
+                _append(out, run_config(cfg))
+        else:
+            with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(str(cache_dir),)) as ex:
+                futs = [ex.submit(run_config, cfg) for cfg in todo]
+                for fut in as_completed(futs):
+                    _append(out, fut.result())
+    return _read_results(out)
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    ap = argparse.ArgumentParser(description="Parallel OPE sweep over a hyperparameter grid.")
+    ap.add_argument("--grid", required=True, help="JSON grid spec (see module docstring)")
+    ap.add_argument("--data", default="data/decisions_2016_2024.csv")
+    ap.add_argument("--out", default="sweep_results.csv")
+    ap.add_argument("--workers", type=int, default=None, help="default: all cores")
+    ap.add_argument("--art-dir", default=None)
+    ap.add_argument("--team-store", default=None,
+                    help="team_week.npz to take the team metrics from (see team_store.py)")
+    ap.add_argument("--sparse", action="store_true", help="keep the design matrix sparse (CSR)")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    spec = json.load(open(args.grid))
+    res = run_sweep(spec, args.data, args.out, args.workers, args.art_dir,
+                    team_store=args.team_store, sparse=args.sparse)
+    print(f"{len(res)} configurations in {args.out} ({time.perf_counter() - t0:.1f}s)")
+    print(res.sort_values("DR", ascending=False).head(10).to_string(index=False))
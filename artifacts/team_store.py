@@ -0,0 +1,181 @@
+"""
+Team-week feature store: the per-team metrics the app auto-fills, precomputed once.
+
+The team metrics in the decisions table (off/def EPA, FG% by distance, punt net) are constant
+within a (season, week, posteam) up to rounding, so they are averaged once per team-week and
+kept as a dense array
+
+    values  (n_seasons, max_week + 1, n_teams, 6)   float64, TEAM_COLS order
+    src     (n_seasons, max_week + 1, n_teams)      int8, week to read for a lookup (-1: none)
+
+saved as data/team_week.npz next to the decisions CSV. `src` resolves the fallback rule ahead
+of time: a team-week without decisions (bye, or a week not played yet) reads the team's
+latest earlier week of that season. A season after the last stored one reads that season's
+final weeks; anything else unknown (earlier season, unknown team) gets DEFAULTS. A lookup is
+then a couple of integer index operations.
+
+The app, batch scoring (inference.score_batch(team_store=...)) and the OPE sweep read team
+metrics from this one store. features.append_week / stream_build rebuild it.
+
+    python artifacts/team_store.py [--decisions data/decisions_2016_2024.csv] [--out data/team_week.npz]
+"""
+import os
+import numpy as np
+from pathlib import Path
+
+try:
+    from .storage import load_table
+except ImportError:  # run as a script from artifacts/
+    from storage import load_table
+
+TEAM_COLS = ["off_epa_4w", "def_epa_4w", "fg_pct_short", "fg_pct_mid", "fg_pct_long", "punt_net_4w"]
+# league-wide values when a team-week has no history (historical averages for FG% / punt net)
+DEFAULTS = {"off_epa_4w": 0.0, "def_epa_4w": 0.0,
+            "fg_pct_short": 0.88, "fg_pct_mid": 0.75, "fg_pct_long": 0.55, "punt_net_4w": 42.0}
+FORMAT_VERSION = 1
+
+
+def store_path(decisions_path) -> Path:
+    """data/decisions_2016_2024.csv -> data/team_week.npz"""
+    return Path(decisions_path).with_name("team_week.npz")
+
+
+class TeamWeekStore:
+    """Dense (season, week, team) table of TEAM_COLS with a latest-available-week fallback."""
+
+    def __init__(self, seasons, teams, values, src):
+        self.seasons = np.asarray(seasons, dtype=np.int64)
+        self.teams = np.asarray(teams, dtype=str)
+        self.values = np.asarray(values, dtype=float)
+        self.src = np.asarray(src, dtype=np.int8)
+        self.max_week = self.values.shape[1] - 1
+        self.team_idx = {t: i for i, t in enumerate(self.teams)}
+        self.defaults = np.array([DEFAULTS[c] for c in TEAM_COLS])
+
+    def __repr__(self):
+        span = f"{self.seasons[0]}-{self.seasons[-1]}" if len(self.seasons) else "empty"
+        return f"TeamWeekStore({span}, {len(self.teams)} teams, weeks<={self.max_week})"
+
+    @classmethod
+    def from_decisions(cls, dec):
+        """Average TEAM_COLS per (season, week, posteam) of a decisions DataFrame."""
+        import pandas as pd
+
+        df = pd.DataFrame({
+            "season": pd.to_numeric(dec["season"], errors="coerce"),
+            "week": pd.to_numeric(dec["week"], errors="coerce"),
+            "posteam": dec["posteam"].astype(object).where(dec["posteam"].notna()).str.strip().str.upper(),
+        })
+        for c in TEAM_COLS:
+            df[c] = pd.to_numeric(dec[c], errors="coerce") if c in dec.columns else np.nan
+        df = df.dropna(subset=["season", "week", "posteam"])
+        df = df.loc[df["week"] >= 1]
+        seasons = np.sort(df["season"].unique()).astype(np.int64)
+        teams = np.sort(df["posteam"].unique()).astype(str)
+        max_week = int(df["week"].max()) if len(df) else 0
+
+        means = df.groupby(["season", "week", "posteam"], sort=False)[TEAM_COLS].mean()
+        s = np.searchsorted(seasons, means.index.get_level_values(0).to_numpy(np.int64))
+        w = means.index.get_level_values(1).to_numpy(np.int64)
+        t = np.searchsorted(teams, means.index.get_level_values(2).to_numpy(str))
+
+        defaults = np.array([DEFAULTS[c] for c in TEAM_COLS])
+        values = np.tile(defaults, (len(seasons), max_week + 1, len(teams), 1))
+        vals = means.to_numpy(float)
+        values[s, w, t] = np.where(np.isnan(vals), defaults, vals)
+
+        # src[s, w, t] = latest week <= w with decisions for team t in season s, else -1
+        have = np.zeros((len(seasons), max_week + 1, len(teams)), dtype=bool)
+        have[s, w, t] = True
+        weeks = np.arange(max_week + 1)[None, :, None]
+        src = np.maximum.accumulate(np.where(have, weeks, -1), axis=1)
+        return cls(seasons, teams, values, src)
+
+    @classmethod
+    def build(cls, decisions_path="data/decisions_2016_2024.csv"):
+        cols = ["season", "week", "posteam"] + TEAM_COLS
+        return cls.from_decisions(load_table(decisions_path, columns=cols, compact=False))
+
+    def save(self, path) -> Path:
+        path = Path(path)
+        tmp = path.with_name(path.name + ".tmp.npz")
+        np.savez(tmp, format=np.int64(FORMAT_VERSION), columns=np.array(TEAM_COLS),
+                 seasons=self.seasons, teams=self.teams, values=self.values, src=self.src)
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as z:
+            if int(z["format"]) != FORMAT_VERSION or list(z["columns"]) != TEAM_COLS:
+                raise ValueError(f"{path}: unsupported team store format; rebuild it")
+            return cls(z["seasons"], z["teams"], z["values"], z["src"])
+
+    @classmethod
+    def load_or_build(cls, decisions_path="data/decisions_2016_2024.csv", path=None):
+        """Load the saved store; (re)build and save it if missing or older than the decisions."""
+        path = Path(path or store_path(decisions_path))
+        src = Path(decisions_path)
+        if path.exists() and (not src.exists() or path.stat().st_mtime >= src.stat().st_mtime):
+            return cls.load(path)
+        store = cls.build(decisions_path)
+        try:
+            store.save(path)
+        except OSError:          # read-only deployment: serve from memory
+            pass
+        return store
+
+    def lookup_many(self, seasons, weeks, teams) -> np.ndarray:
+        """(N, 6) TEAM_COLS values for N (season, week, team) triples."""
+        seasons = np.asarray(seasons, dtype=float).reshape(-1)
+        weeks = np.asarray(weeks, dtype=float).reshape(-1)
+        teams = np.asarray(teams, dtype=object).reshape(-1)
+        n = len(seasons)
+        out = np.tile(self.defaults, (n, 1))
+        if n == 0 or len(self.seasons) == 0:
+            return out
+
+        t = np.array([self.team_idx.get(str(x).strip().upper(), -1) if isinstance(x, str) else -1
+                      for x in teams], dtype=np.int64)
+        ok = (t >= 0) & ~np.isnan(seasons) & ~np.isnan(weeks)
+        s_val = np.where(ok, seasons, self.seasons[0]).astype(np.int64)
+        s = np.searchsorted(self.seasons, s_val, side="right") - 1
+        ok &= s >= 0
+        s = np.maximum(s, 0)
+        # a later season than stored reads the end of the last stored one
+        w = np.where(self.seasons[s] == s_val, np.where(ok, weeks, 0), self.max_week)
+        w = np.clip(w, 0, self.max_week).astype(np.int64)
+        t = np.maximum(t, 0)
+        wk = self.src[s, w, t].astype(np.int64)
+        ok &= wk >= 0
+        out[ok] = self.values[s[ok], wk[ok], t[ok]]
+        return out
+
+    def lookup(self, season: int, week: int, team: str) -> dict:
+        """TEAM_COLS for one team-week as a dict of floats (the app's auto-fill)."""
+        row = self.lookup_many([season], [week], [team])[0]
+        return {c: float(v) for c, v in zip(TEAM_COLS, row)}
+
+    def attach(self, df, team_col: str = "posteam"):
+        """Copy of df with TEAM_COLS set from the store by its season / week / team columns."""
+        vals = self.lookup_many(df["season"], df["week"], df[team_col])
+        df = df.copy()
+        for j, c in enumerate(TEAM_COLS):
+            df[c] = vals[:, j]
+        return df
+
+
+def refresh_store(decisions_path) -> Path:
+    """Rebuild the store next to a decisions table (after it changed)."""
+    return TeamWeekStore.build(decisions_path).save(store_path(decisions_path))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Build the team-week feature store.")
+    ap.add_argument("--decisions", default="data/decisions_2016_2024.csv")
+    ap.add_argument("--out", default=None, help="default: team_week.npz next to the decisions table")
+    args = ap.parse_args()
+    store = TeamWeekStore.build(args.decisions)
+    print("Wrote", store.save(args.out or store_path(args.decisions)), store)
@@ -0,0 +1,57 @@
+import json
+import os
+import numpy as np
+import pytest
+from assets import AssetCache, build, load_manifest, manifest_path
+
+Image = pytest.importorskip("PIL.Image")
+
+@pytest.fixture
+def root(tmp_path):
+    rng = np.random.default_rng(0)
+    (tmp_path / "team_logos").mkdir()
+    (tmp_path / "team_stadiums").mkdir()
+    photo = rng.integers(0, 256, size=(600, 1200, 3), dtype=np.uint8)
+    Image.fromarray(photo).convert("RGBA").save(tmp_path / "team_stadiums" / "KC_HOME.png")
+    logo = np.zeros((400, 400, 4), dtype=np.uint8)
+    logo[100:300, 100:300] = [200, 30, 30, 255]                 # opaque square on transparency
+    Image.fromarray(logo).save(tmp_path / "team_logos" / "KC.png")
+    Image.new("RGB", (300, 200), "white").save(tmp_path / "field_diagram.png")   # already small
+    return tmp_path
+
+def test_build_writes_sized_hashed_variants(root):
+    assets = build(root)
+    assert set(assets) == {"team_stadiums/KC_HOME.png", "team_logos/KC.png", "field_diagram.png"}
+    stadium, logo = assets["team_stadiums/KC_HOME.png"], assets["team_logos/KC.png"]
+    assert stadium["path"].endswith(".jpg") and (stadium["width"], stadium["height"]) == (800, 400)
+    assert stadium["bytes"] < stadium["source"]["bytes"] / 4
+    im = Image.open(root / "assets" / logo["path"])
+    assert im.size == (100, 100) and im.convert("RGBA").getpixel((0, 0))[3] == 0
+    assert assets["field_diagram.png"]["width"] == 300                    # never upscaled
+    assert json.loads(manifest_path(root).read_text())["assets"] == assets
+
+    # unchanged sources are skipped; a changed one gets a new content-hashed name
+    mtime = (root / "assets" / stadium["path"]).stat().st_mtime_ns
+    Image.new("RGBA", (500, 500), (0, 0, 255, 255)).save(root / "team_logos" / "KC.png")
+    again = build(root)
+    assert (root / "assets" / stadium["path"]).stat().st_mtime_ns == mtime
+    assert again["team_logos/KC.png"]["path"] != logo["path"]
+    assert not (root / "assets" / logo["path"]).exists()
+
+def test_cache_serves_variants_and_falls_back(root):
+    assets = build(root)
+    cache = AssetCache(root)
+    data = cache.get("team_stadiums/KC_HOME.png")
+    assert data == (root / "assets" / assets["team_stadiums/KC_HOME.png"]["path"]).read_bytes()
+    assert cache.get("team_stadiums/KC_HOME.png") is data                 # from memory
+    assert cache.get("team_logos/BUF.png") is None
+
+    # touched but identical source: still fresh; edited source or deleted variant: the original
+    src = root / "team_logos" / "KC.png"
+    os.utime(src, ns=(1, 1))
+    assert isinstance(AssetCache(root).get("team_logos/KC.png"), bytes)
+    Image.new("RGBA", (420, 420), (0, 0, 255, 255)).save(src)
+    assert AssetCache(root).get("team_logos/KC.png") == str(src)
+    (root / "assets" / load_manifest(root)["field_diagram.png"]["path"]).unlink()
+    assert AssetCache(root).get("field_diagram.png") == str(root / "field_diagram.png")
+    assert AssetCache(root / "elsewhere").get("field_diagram.png") is None
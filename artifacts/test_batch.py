@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+from inference import (ACTIONS, _apply_action_constraints_one, _predict_per_arm, _to_df, get_bundle,
+                       score_batch, score_context)
+
+base = {
+  'yardline_100': 52, 'ydstogo': 1, 'score_differential': -3,
+  'qtr': 4, 'game_seconds_remaining': 120,
+  'off_epa_4w': 0.1, 'def_epa_4w': -0.05,
+  'fg_pct_short': 0.90, 'fg_pct_mid': 0.80, 'fg_pct_long': 0.60,
+  'punt_net_4w': 42,
+  'plays_in_drive_so_far': 5,
+  'def_time_on_field_cum': 900, 'def_time_on_field_share': 0.56,
+  'home_timeouts_remaining': 3, 'away_timeouts_remaining': 2,
+  'posteam_timeouts_remaining': 2, 'defteam_timeouts_remaining': 3,
+  'temp': 55, 'wind': 10, 'goal_to_go': 0,
+  'posteam': 'KC', 'defteam': 'BUF', 'home_team': 'BUF', 'away_team': 'KC',
+  'posteam_type': 'away', 'roof': 'outdoors', 'surface': 'grass',
+}
+
+def _variants():
+    rng = np.random.default_rng(7)
+    out = []
+    for _ in range(200):
+        c = dict(base)
+        c['yardline_100'] = int(rng.integers(1, 100))
+        c['ydstogo'] = int(rng.integers(1, 20))
+        c['score_differential'] = int(rng.integers(-17, 18))
+        c['qtr'] = int(rng.integers(1, 5))
+        c['game_seconds_remaining'] = int(rng.integers(0, 3600))
+        c['roof'] = str(rng.choice(['outdoors', 'dome', ' dome ', 'open']))
+        c['wind'] = int(rng.choice([0, 8, 20]))
+        c['temp'] = int(rng.choice([10, 45, 70]))
+        if rng.random() < 0.2:
+            c.pop('posteam')          # missing keys must behave like score_context
+        out.append(c)
+    return out
+
+def _reference(c, b):
+    """The scalar path, row by row: one-row frame, sklearn arms, per-dict action constraints."""
+    Xd = b.pre.transform(_to_df(c, b.feature_cols))
+    epa = _predict_per_arm(Xd, b.arm_epa, b.actions)
+    wpa = _predict_per_arm(Xd, b.arm_wpa, b.actions)
+    _apply_action_constraints_one(c, epa, wpa, b.actions)
+    return epa[0], wpa[0], b.actions[int(np.argmax(wpa[0]))]
+
+def test_batch_matches_single():
+    ctxs = _variants()
+    b = get_bundle(backend="joblib")
+    MU_epa, MU_wpa, rec = score_batch(ctxs, metric="wpa", bundle=b)
+    assert MU_epa.shape == MU_wpa.shape == (len(ctxs), len(ACTIONS))
+    masked = np.zeros(len(ACTIONS), dtype=int)
+    for i, c in enumerate(ctxs):
+        epa, wpa, r = _reference(c, b)
+        np.testing.assert_allclose(MU_epa[i], epa, rtol=1e-12, atol=1e-12)
+        np.testing.assert_allclose(MU_wpa[i], wpa, rtol=1e-12, atol=1e-12)
+        assert rec[i] == r
+        s_epa, s_wpa, s_rec, _ = score_context(c, metric="wpa", bundle=b)
+        np.testing.assert_allclose([s_wpa[a] for a in ACTIONS], wpa, rtol=1e-12, atol=1e-12)
+        assert s_rec == r
+        masked += wpa <= -1e9
+    # the FG-range and punt rules both fire on some rows and not on others
+    assert all(0 < masked[ACTIONS.index(a)] < len(ctxs) for a in ("fg", "punt"))
+
+def test_dataframe_input_matches_dicts():
+    ctxs = [c for c in _variants() if 'posteam' in c]
+    a = score_batch(ctxs, metric="epa")
+    b = score_batch(pd.DataFrame(ctxs), metric="epa")
+    np.testing.assert_allclose(a[0], b[0], rtol=1e-12, atol=1e-12)
+    np.testing.assert_allclose(a[1], b[1], rtol=1e-12, atol=1e-12)
+    assert (a[2] == b[2]).all()
+
+def test_empty_batch():
+    MU_epa, MU_wpa, rec = score_batch([])
+    assert MU_epa.shape == (0, len(ACTIONS)) and rec.shape == (0,)
@@ -0,0 +1,23 @@
+import json
+import numpy as np
+from bench import compare, run_suite, synthetic_decisions, synthetic_pbp
+from features import build_features
+from inference import get_bundle, score_batch
+
+def test_synthetic_data_matches_schema_and_scores():
+    b = get_bundle()
+    df = synthetic_decisions(500, seed=3)
+    assert list(df.columns[:len(b.feature_cols)]) == b.feature_cols
+    assert df["action"].isin(b.actions).all() and (df["ydstogo"] <= df["yardline_100"]).all()
+    MU_epa, MU_wpa, rec = score_batch(df)
+    assert np.isfinite(MU_wpa).all() and len(rec) == 500
+    _, dec = build_features(synthetic_pbp(games=4, plays=40, weeks=range(1, 5)))
+    assert len(dec) and dec["action"].isin(["fg", "go", "punt"]).all()
+
+def test_suite_output_and_regression_compare():
+    res = json.loads(json.dumps(run_suite(["ope", "bootstrap"], quick=True)))
+    assert set(res["results"]) == {"ope[estimators,5000]", "bootstrap[B=100,2000]", "bootstrap[B=1000,2000]"}
+    assert all(v["median_s"] > 0 for v in res["results"].values())
+    slow = {"results": {k: {**v, "median_s": v["median_s"] * 2} for k, v in res["results"].items()}}
+    assert not compare(res, res)["regression"].any()
+    assert compare(slow, res)["regression"].all() and not compare(slow, res, tolerance=1.5)["regression"].any()
@@ -0,0 +1,46 @@
+import os
+import shutil
+import inference
+from inference import ModelBundle, get_bundle
+
+ART = inference.ART
+
+def test_lazy_and_cwd_independent(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)                 # relative paths must not matter
+    b = ModelBundle(ART)
+    assert b._loaded == {}
+    assert b.actions == ["fg", "go", "punt"]
+    assert "pre" not in b._loaded               # metadata alone doesn't unpickle models
+
+def test_cache_keyed_by_dir_and_mtime(tmp_path, monkeypatch):
+    monkeypatch.setattr(inference, "RELOAD_CHECK_S", 0.0)
+    d = tmp_path / "v1"
+    shutil.copytree(ART, d, ignore=shutil.ignore_patterns("*.py", "__pycache__"))
+    b1 = get_bundle(d)
+    assert get_bundle(d) is b1
+    assert get_bundle(ART) is not b1            # versions side by side
+
+    st = os.stat(d / "arm_models_wpa.joblib")
+    os.utime(d / "arm_models_wpa.joblib", ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    b2 = get_bundle(d)
+    assert b2 is not b1 and b2.dir == b1.dir
+
+def test_arrays_backend_serves_without_pickles(tmp_path):
+    import numpy as np
+    from test_batch import _variants
+
+    d = tmp_path / "pickle_free"
+    shutil.copytree(ART, d, ignore=shutil.ignore_patterns("*.py", "__pycache__", "*.joblib", "*.npz"))
+    arr = ModelBundle(d)
+    assert arr.backend == "arrays"
+    assert isinstance(arr.arrays["arm_epa_coef"], np.memmap)
+
+    ref = ModelBundle(ART, backend="joblib")
+    ctxs = _variants()
+    for got, want in zip(arr.score_batch(ctxs, "epa"), ref.score_batch(ctxs, "epa")):
+        if got.dtype == object:
+            assert (got == want).all()
+        else:
+            np.testing.assert_allclose(got, want, rtol=1e-9, atol=1e-12)
+    np.testing.assert_allclose(arr.behavior_proba(ctxs), ref.behavior_proba(ctxs), rtol=1e-7, atol=1e-10)
+    assert "pre" not in arr._loaded
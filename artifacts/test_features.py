@@ -0,0 +1,136 @@
+import numpy as np
+import pandas as pd
+import pytest
+from features import (FILL_COLS, FeatureState, KEY, append_week, build_features, check_consistency,
+                      data_paths, stream_build)
+from storage import load_table, parquet_path, write_parquet
+
+TEAMS = ["ARI", "BUF", "DAL", "GB", "KC", "NE", "SF", "TB"]
+
+def raw_pbp(seasons=(2023, 2024), weeks=range(1, 8), plays=90, seed=0):
+    """Synthetic nflverse-like regular-season play-by-play."""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for season in seasons:
+        for week in weeks:
+            order = rng.permutation(TEAMS)[:6]          # two teams on bye
+            for g in range(3):
+                home, away = order[2 * g], order[2 * g + 1]
+                game_id = f"{season}_{week:02d}_{away}_{home}"
+                gsr, drive, pos = 3600, 1, home
+                for i in range(plays):
+                    gsr = max(gsr - int(rng.integers(0, 45)), 0)
+                    down = i % 4 + 1
+                    if down == 4:
+                        pt = rng.choice(["punt", "field_goal", "run", "pass"], p=[0.5, 0.25, 0.15, 0.1])
+                    else:
+                        pt = rng.choice(["run", "pass", "no_play"], p=[0.45, 0.45, 0.1])
+                    de = away if pos == home else home
+                    fga = pt == "field_goal"
+                    rows.append({
+                        "season": season, "week": week, "season_type": "REG", "game_id": game_id,
+                        "game_date": f"{season}-09-{week:02d}", "play_id": 40 + 25 * i, "drive": drive,
+                        "posteam": pos if i % 23 else None, "defteam": de if i % 23 else None,
+                        "home_team": home, "away_team": away, "posteam_type": "home" if pos == home else "away",
+                        "qtr": min(4, 1 + (3600 - gsr) // 900), "game_seconds_remaining": gsr,
+                        "half_seconds_remaining": gsr % 1800, "quarter_seconds_remaining": gsr % 900,
+                        "down": down if i % 17 else np.nan, "ydstogo": int(rng.integers(1, 15)),
+                        "yardline_100": int(rng.integers(1, 99)), "score_differential": int(rng.integers(-21, 21)),
+                        "home_timeouts_remaining": 3, "away_timeouts_remaining": 2,
+                        "posteam_timeouts_remaining": 3, "defteam_timeouts_remaining": 2,
+                        "roof": "outdoors", "surface": "grass", "temp": float(rng.integers(30, 90)),
+                        "wind": float(rng.integers(0, 20)), "play_type": pt,
+                        "punt_attempt": float(pt == "punt"), "field_goal_attempt": float(fga),
+                        "rush_attempt": float(pt == "run"), "pass_attempt": float(pt == "pass"),
+                        "epa": rng.normal() if i % 31 else np.nan, "wpa": rng.normal() * 0.03,
+                        "success": float(rng.random() < 0.45), "yards_gained": float(rng.integers(-5, 20)),
+                        "first_down": float(rng.random() < 0.3), "touchdown": float(rng.random() < 0.05),
+                        "field_goal_result": rng.choice(["made", "missed"], p=[0.8, 0.2]) if fga else None,
+                        "kick_distance": float(rng.integers(18, 66)) if fga or pt == "punt" else np.nan,
+                        "punt_inside_twenty": 0.0, "punt_out_of_bounds": 0.0, "punt_downed": 0.0,
+                        "punt_fair_catch": 0.0, "return_yards": 0.0, "penalty": float(rng.random() < 0.05),
+                        "aborted_play": 0.0, "play_deleted": 0.0, "goal_to_go": 0.0, "timeout": 0.0,
+                        "timeout_team": None,
+                    })
+                    if down == 4:
+                        drive += 1
+                        pos = away if pos == home else home
+    return pd.DataFrame(rows)
+
+def _same(a, b, cols):
+    a = a.sort_values(KEY).reset_index(drop=True)
+    b = b.sort_values(KEY).reset_index(drop=True)
+    assert len(a) == len(b)
+    for c in cols:
+        if pd.api.types.is_numeric_dtype(a[c]):
+            np.testing.assert_allclose(a[c].to_numpy(float), b[c].to_numpy(float), rtol=1e-12, err_msg=c)
+        else:
+            assert (a[c].fillna("").astype(str) == b[c].fillna("").astype(str)).all(), c
+
+def test_incremental_weeks_match_full_rebuild():
+    pbp = raw_pbp()
+    full_df, full_dec = build_features(pbp)
+    assert full_dec["fg_pct_mid"].notna().any() and full_dec["punt_net_4w"].notna().any()
+
+    early = (pbp["season"] < 2024) | (pbp["week"] <= 3)
+    state = FeatureState.from_clean(build_features(pbp.loc[early])[0])
+    state = FeatureState.from_dict(state.to_dict())                 # survives a save/load
+    for week in range(4, 8):
+        df, dec = state.update(pbp.loc[(pbp["season"] == 2024) & (pbp["week"] == week)])
+        ref_df = full_df.loc[(full_df["season"] == 2024) & (full_df["week"] == week)]
+        ref_dec = full_dec.loc[(full_dec["season"] == 2024) & (full_dec["week"] == week)]
+        _same(df, ref_df, full_df.columns)
+        # earlier weeks were filled with the team means known at the time; the last one is exact
+        cols = full_dec.columns if week == 7 else [c for c in full_dec.columns if c not in FILL_COLS]
+        _same(dec, ref_dec, cols)
+    assert state.off.groupby("posteam").size().max() <= 4 and set(state.off["season"]) == {2024}
+
+    with pytest.raises(ValueError):
+        state.update(pbp.loc[(pbp["season"] == 2024) & (pbp["week"] == 7)])
+
+def test_append_week_writes_tables_and_is_consistent(tmp_path):
+    pbp = raw_pbp()
+    raw = tmp_path / "play_by_play_2024.csv"
+    pbp.loc[pbp["season"] == 2024].to_csv(raw, index=False)
+    paths = data_paths(tmp_path)
+    df, dec = build_features(pbp.loc[(pbp["season"] < 2024) | (pbp["week"] <= 5)])
+    df.to_csv(paths["pbp"], index=False)
+    dec.to_csv(paths["decisions"], index=False)
+    write_parquet(df, parquet_path(paths["pbp"]))
+    write_parquet(dec, parquet_path(paths["decisions"]), by_week=True)
+
+    n_pbp, n_dec = append_week(raw, [6], data_dir=tmp_path)
+    assert n_pbp == ((pbp["season"] == 2024) & (pbp["week"] == 6)).sum() and n_dec > 0
+    assert paths["state"].exists()
+    append_week(raw, [7], data_dir=tmp_path)
+    with pytest.raises(ValueError):
+        append_week(raw, [7], data_dir=tmp_path)
+
+    stored = pd.read_csv(paths["pbp"])
+    assert list(stored.columns) == list(df.columns)
+    assert stored.groupby(["season", "week"]).size().max() == 3 * 90
+    for name in ("pbp", "decisions"):       # Parquet copies got the same rows
+        csv = pd.read_csv(paths[name])
+        pq = load_table(paths[name])
+        assert len(pq) == len(csv) and set(pq["week"]) == set(csv["week"])
+    report = check_consistency(pbp.loc[pbp["season"] == 2024], tmp_path)
+    assert report["mismatches"].sum() == 0, report.loc[report["mismatches"] > 0]
+
+def test_stream_build_matches_in_memory_build(tmp_path):
+    pbp = raw_pbp(seasons=(2022, 2023, 2024), weeks=range(1, 6))
+    files = []
+    for season, part in pbp.groupby("season"):
+        files.append(tmp_path / f"play_by_play_{season}.csv")
+        part.assign(extra=1.0).to_csv(files[-1], index=False)
+    n_pbp, n_dec = stream_build(files, tmp_path / "data")
+    full_df, full_dec = build_features(pbp)
+    assert (n_pbp, n_dec) == (len(full_df), len(full_dec))
+
+    paths = data_paths(tmp_path / "data")
+    _same(pd.read_csv(paths["pbp"]), full_df, full_df.columns)
+    _same(pd.read_csv(paths["decisions"]), full_dec, full_dec.columns)
+    assert sorted(load_table(paths["pbp"], columns=["season"])["season"].unique()) == [2022, 2023, 2024]
+    assert len(load_table(paths["decisions"], seasons=2023)) == (full_dec["season"] == 2023).sum()
+    # and the saved state continues the season
+    state = FeatureState.load(paths["state"])
+    assert state.last == {"2022": 5, "2023": 5, "2024": 5}
@@ -0,0 +1,46 @@
+import numpy as np
+from inference import (PRE, ARM_EPA, ARM_WPA, ACTIONS, _to_df, _predict_per_arm,
+                       score_context, score_context_fast)
+from fused import FusedScorer
+from test_batch import _variants
+
+def _edge_cases():
+    out = []
+    for c in _variants()[:20]:
+        c = dict(c)
+        c['posteam'] = 'LAR'        # not in the fitted vocabulary
+        c['temp'] = None            # numeric missing -> median
+        out.append(c)
+    out.append({'yardline_100': 40, 'posteam': float('nan')})   # NaN category -> imputed
+    out.append({})
+    return out
+
+def _sklearn_mu(ctx):
+    Xd = PRE.transform(_to_df(ctx))
+    return _predict_per_arm(Xd, ARM_EPA)[0], _predict_per_arm(Xd, ARM_WPA)[0]
+
+def test_fused_matches_sklearn_path():
+    fused = FusedScorer.from_sklearn(PRE, ARM_EPA, ARM_WPA, ACTIONS)
+    ctxs = _variants() + _edge_cases()
+    MU_epa, MU_wpa = fused.score(ctxs)
+    for i, c in enumerate(ctxs):
+        ref_epa, ref_wpa = _sklearn_mu(c)
+        np.testing.assert_allclose(MU_epa[i], ref_epa, rtol=1e-9, atol=1e-12)
+        np.testing.assert_allclose(MU_wpa[i], ref_wpa, rtol=1e-9, atol=1e-12)
+        one_epa, one_wpa = fused.score_one(c)
+        np.testing.assert_allclose(one_epa, ref_epa, rtol=1e-9, atol=1e-12)
+        np.testing.assert_allclose(one_wpa, ref_wpa, rtol=1e-9, atol=1e-12)
+
+def test_saved_weights_roundtrip(tmp_path):
+    fused = FusedScorer.from_sklearn(PRE, ARM_EPA, ARM_WPA, ACTIONS)
+    fused.save(tmp_path / "w.npz")
+    loaded = FusedScorer.load(tmp_path / "w.npz")
+    ctxs = _variants()[:10]
+    np.testing.assert_array_equal(loaded.score(ctxs)[0], fused.score(ctxs)[0])
+
+def test_fast_path_recommendation():
+    for c in _variants():
+        epa, wpa, rec, _ = score_context(c)
+        f_epa, f_wpa, f_rec, _ = score_context_fast(c)
+        assert rec == f_rec
+        np.testing.assert_allclose(list(f_wpa.values()), list(wpa.values()), rtol=1e-9, atol=1e-12)
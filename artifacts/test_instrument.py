@@ -0,0 +1,45 @@
+import pstats
+import instrument
+from inference import get_bundle, score_batch, score_context, score_context_fast
+from loadgen import random_contexts
+
+def test_stage_timings_counts_and_prometheus_text():
+    contexts = random_contexts(20)
+    instrument.reset()
+    instrument.enable()
+    try:
+        score_batch(contexts, bundle=get_bundle(backend="joblib"))
+        score_batch(contexts, bundle=get_bundle(backend="arrays"))
+        for c in contexts[:5]:
+            score_context(c, bundle=get_bundle(backend="joblib"))
+            score_context_fast(c)
+        snap = instrument.snapshot()
+    finally:
+        instrument.disable()
+    assert snap["score_batch"]["count"] == 2 and snap["score_context"]["count"] == 5
+    assert snap["score_context_fast"]["count"] == 5
+    for name in ("to_frame", "pre.transform", "predict_arms"):
+        assert snap[name]["count"] == 6                     # one joblib batch + five contexts
+    assert snap["fused.encode"]["count"] == 1 and snap["constraints"]["count"] == 7
+    s = snap["score_batch"]
+    assert 0 < s["p50_s"] <= s["max_s"] and s["sum_s"] >= s["max_s"]
+
+    score_batch(contexts)                                   # disabled: nothing recorded
+    assert instrument.snapshot()["score_batch"]["count"] == 2
+    text = instrument.prometheus_text()
+    assert 'nfl4th_inference_stage_seconds_count{stage="score_batch"} 2' in text
+    assert 'nfl4th_inference_stage_seconds_bucket{stage="score_batch",le="+Inf"} 2' in text
+    instrument.reset()
+
+def test_sampled_cprofile_dumps(tmp_path):
+    instrument.enable(sample=1.0, profile_dir=tmp_path)
+    try:
+        score_batch(random_contexts(5))
+        score_context_fast(random_contexts(1)[0])
+    finally:
+        instrument.enable(False, sample=0.0)
+        instrument.reset()
+    dumps = sorted(p.name.split("-")[0] for p in tmp_path.glob("*.prof"))
+    assert dumps == ["score_batch", "score_context_fast"]
+    stats = pstats.Stats(str(next(tmp_path.glob("score_batch-*.prof"))))
+    assert any(fn[2] == "_score" for fn in stats.stats)
@@ -0,0 +1,70 @@
+import shutil
+import numpy as np
+import pytest
+import inference
+from inference import ModelBundle
+from array_store import save_linucb
+from test_batch import _variants
+
+ART = inference.ART
+
+@pytest.fixture(scope="module")
+def linucb_dir(tmp_path_factory):
+    """Copy of the artifacts with LinUCB factors fit on a synthetic design."""
+    d = tmp_path_factory.mktemp("linucb") / "art"
+    shutil.copytree(ART, d, ignore=shutil.ignore_patterns("*.py", "__pycache__"))
+    b = ModelBundle(d, backend="arrays")
+    f = b.fused
+    X = f.design(*f.encode(_variants() * 5))
+    # fg gets fewer than d+1 rows, so it exercises the λI fallback
+    y = np.random.default_rng(0).choice(b.actions, size=len(X), p=[0.1, 0.5, 0.4])
+    save_linucb(d, "wpa", b.actions, X, y, 5.0)
+    return d, X, y
+
+@pytest.mark.parametrize("backend", ["joblib", "arrays"])
+def test_bonus_matches_explicit_inverse(linucb_dir, backend):
+    d, X, y = linucb_dir
+    b = ModelBundle(d, backend=backend)
+    ctxs = _variants()
+    out = b.linucb_batch(ctxs, "wpa", alpha=0.8)
+
+    Xd = b.fused.design(*b.fused.encode(ctxs))
+    MU_epa, MU_wpa, _ = b.score_batch(ctxs, "wpa")
+    for j, a in enumerate(b.actions):
+        Xa = X[y == a]
+        XtX = Xa.T @ Xa if len(Xa) > X.shape[1] else 0.0
+        A_inv = np.linalg.inv(XtX + 5.0 * np.eye(X.shape[1]))
+        want = 0.8 * np.sqrt(np.einsum("ij,jk,ik->i", Xd, A_inv, Xd))
+        masked = MU_wpa[:, j] <= -1e9
+        np.testing.assert_allclose(out["bonus"][~masked, j], want[~masked], rtol=1e-8)
+        assert (out["bonus"][masked, j] == 0).all()
+    np.testing.assert_allclose(out["mu"], MU_wpa, rtol=1e-9, atol=1e-12)
+    np.testing.assert_allclose(out["ucb"], out["mu"] + out["bonus"])
+    assert (out["recommended"] == np.asarray(b.actions)[out["ucb"].argmax(axis=1)]).all()
+
+def test_score_context_linucb_details(linucb_dir):
+    d, _, _ = linucb_dir
+    b = ModelBundle(d)
+    ctx = _variants()[0]
+    _, wpa, rec, details = b.score_context(ctx, "wpa", policy="linucb", alpha=2.0)
+    lin = details["linucb"]
+    assert lin["alpha"] == 2.0 and lin["mu"] == pytest.approx(wpa)
+    assert rec == max(lin["ucb"], key=lin["ucb"].get)
+    assert "linucb" not in b.score_context(ctx, "wpa")[3]
+
+def test_missing_factors_raise():
+    with pytest.raises(FileNotFoundError):
+        ModelBundle(ART).score_batch(_variants()[:2], "epa", policy="linucb")
+    with pytest.raises(ValueError):
+        ModelBundle(ART).score_batch(_variants()[:2], "epa", policy="thompson")
+
+@pytest.mark.parametrize("rows", [3, 5000])
+def test_sparse_widths_match_dense(rows):
+    from scipy import sparse
+    from linucb import SOLVE_MAX_ROWS, confidence_widths, gram
+    rng = np.random.default_rng(2)
+    X = sparse.random(rows, 40, density=0.1, format="csr", random_state=3)
+    A = gram(sparse.random(500, 40, density=0.2, format="csr", random_state=4)) + 5.0 * np.eye(40)
+    chol = np.stack([np.linalg.cholesky(A * s) for s in rng.uniform(0.5, 2.0, size=3)])
+    assert (rows <= SOLVE_MAX_ROWS) == (rows == 3)          # both paths
+    np.testing.assert_allclose(confidence_widths(X, chol), confidence_widths(X.toarray(), chol), rtol=1e-10)
@@ -0,0 +1,54 @@
+import shutil
+import numpy as np
+import inference
+from sklearn.linear_model import Ridge
+from inference import ModelBundle, get_bundle
+from array_store import save_linucb
+from online import OnlineLinUCB, checkpoint_path
+from test_batch import _variants
+
+ART = inference.ART
+
+def test_online_matches_full_refit_and_hot_reloads(tmp_path, monkeypatch):
+    monkeypatch.setattr(inference, "RELOAD_CHECK_S", 0.0)
+    d = tmp_path / "art"
+    shutil.copytree(ART, d, ignore=shutil.ignore_patterns("*.py", "__pycache__"))
+    ctxs = _variants() * 5
+    f = ModelBundle(d, backend="arrays").fused
+    X = f.design(*f.encode(ctxs))
+    rng = np.random.default_rng(1)
+    # fg starts below d+1 rows (λI fallback) and crosses it during the online updates
+    y = rng.choice(["fg", "go", "punt"], size=len(X), p=[0.2, 0.5, 0.3])
+    r = X @ rng.normal(size=X.shape[1]) * 0.01 + rng.normal(size=len(X)) * 0.05
+    n0 = 700
+    save_linucb(d, "wpa", ["fg", "go", "punt"], X[:n0], y[:n0], 5.0, rewards=r[:n0])
+
+    before = get_bundle(d)
+    learner = OnlineLinUCB.load(d, "wpa", refactor_every=50)
+    learner.observe(ctxs[n0:], y[n0:], r[n0:])
+
+    coef, intercept, const = learner.arms()
+    assert not const.any()
+    for j, a in enumerate(learner.actions):
+        Xa, ra = X[y == a], r[y == a]
+        ref = Ridge(alpha=5.0).fit(Xa, ra)
+        np.testing.assert_allclose(coef[j], ref.coef_, atol=1e-8)
+        np.testing.assert_allclose(intercept[j], ref.intercept_, atol=1e-8)
+        A = Xa.T @ Xa + 5.0 * np.eye(X.shape[1])
+        np.testing.assert_allclose(learner.A_inv[j] @ A, np.eye(X.shape[1]), atol=1e-6)
+
+    learner.save(d)
+    assert checkpoint_path(d, "wpa").exists() and not list(d.glob("*.tmp"))
+    after = get_bundle(d)
+    assert after is not before                      # checkpoint is hot-reloaded
+
+    Xq = f.design(*f.encode(_variants()))
+    for backend in ("joblib", "arrays"):
+        b = ModelBundle(d, backend=backend)
+        MU_epa, MU_wpa, _ = b.score_batch(_variants(), "wpa")
+        want = Xq @ coef.T + intercept
+        ok = MU_wpa > -1e9
+        np.testing.assert_allclose(MU_wpa[ok], want[ok], atol=1e-8)
+        np.testing.assert_allclose(MU_epa, before.score_batch(_variants(), "epa")[0], atol=1e-9)
+        out = b.linucb_batch(_variants(), "wpa", alpha=1.0)
+        np.testing.assert_allclose(out["bonus"][ok], learner.widths(Xq)[ok], rtol=1e-8)
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+from ope import (ESTIMATORS, bootstrap_ci, bootstrap_replicates, estimators, evaluate,
+                 policy_eps_greedy, policy_greedy, replicates_from_counts, row_terms)
+
+def _data(n=400, K=3, seed=0):
+    rng = np.random.default_rng(seed)
+    logits = rng.normal(size=(n, K))
+    P_beh = np.exp(logits) / np.exp(logits).sum(axis=1, keepdims=True)
+    a_idx = np.array([rng.choice(K, p=p) for p in P_beh])
+    MU = rng.normal(size=(n, K)) * 0.1
+    r = MU[np.arange(n), a_idx] + rng.normal(size=n) * 0.3
+    return P_beh, MU, r, a_idx
+
+def _loop(P_eval, P_beh, MU, r, a_idx, B, seed, clip=None):
+    """Reference: the per-replicate loop from model_evaluation.ipynb."""
+    rs = np.random.RandomState(seed)
+    n = len(r)
+    out = []
+    for _ in range(B):
+        idx = rs.randint(0, n, n)
+        out.append(estimators(P_eval[idx], P_beh[idx], MU[idx], r[idx], a_idx[idx], clip=clip)[:4])
+    return np.array(out), rs
+
+@pytest.mark.parametrize("clip", [None, 2.0])
+def test_counts_reproduce_loop_exactly(clip):
+    P_beh, MU, r, a_idx = _data()
+    policies = [policy_greedy(MU), policy_eps_greedy(MU, 0.1)]
+    T = row_terms(np.stack(policies), P_beh, MU, r, a_idx, clip)
+    for m, P in enumerate(policies):
+        ref, _ = _loop(P, P_beh, MU, r, a_idx, B=20, seed=5, clip=clip)
+        rs = np.random.RandomState(5)
+        C = np.stack([np.bincount(rs.randint(0, len(r), len(r)), minlength=len(r)) for _ in range(20)])
+        got = replicates_from_counts(C.astype(float), T)
+        for i, k in enumerate(ESTIMATORS):
+            np.testing.assert_allclose(got[k][:, m], ref[:, i], rtol=1e-10, atol=1e-12)
+
+def test_seeded_chunk_independent_and_matches_loop_statistically():
+    P_beh, MU, r, a_idx = _data()
+    P = policy_eps_greedy(MU, 0.05)
+    a = bootstrap_replicates(P, P_beh, MU, r, a_idx, B=2000, seed=3)
+    b = bootstrap_replicates(P, P_beh, MU, r, a_idx, B=2000, seed=3, max_bytes=8 * len(r) * 7)
+    for k in ESTIMATORS:
+        np.testing.assert_allclose(a[k], b[k], rtol=1e-9, atol=1e-15)   # BLAS blocking only
+
+    ref, _ = _loop(P, P_beh, MU, r, a_idx, B=2000, seed=3)
+    for method in ("multinomial", "poisson"):
+        reps = bootstrap_replicates(P, P_beh, MU, r, a_idx, B=2000, seed=3, method=method)
+        for i, k in enumerate(ESTIMATORS):
+            assert reps[k][:, 0].mean() == pytest.approx(ref[:, i].mean(), abs=0.2 * ref[:, i].std())
+            assert reps[k][:, 0].std() == pytest.approx(ref[:, i].std(), rel=0.15)
+
+def test_evaluate_table():
+    P_beh, MU, r, a_idx = _data()
+    df = evaluate({"greedy": policy_greedy(MU), "behavior": P_beh}, P_beh, MU, r, a_idx, B=200)
+    assert list(df["policy"]) == ["greedy", "behavior"]
+    assert (df["DR_lo"] <= df["DR"]).all() and (df["DR"] <= df["DR_hi"]).all()
+    ci = bootstrap_ci(P_beh, P_beh, MU, r, a_idx, B=200)
+    assert ci["DR"].shape == (1, 2)
@@ -0,0 +1,75 @@
+import shutil
+import numpy as np
+import pytest
+from array_store import save_posterior
+from bench import synthetic_decisions
+from inference import ART, get_bundle
+from linucb import arm_posteriors, arm_stats
+from ope import evaluate
+from posterior import PosteriorSampler, posterior_batch, posterior_context, thompson_actions, thompson_policy
+from test_batch import _variants
+
+@pytest.fixture(scope="module")
+def bundle(tmp_path_factory):
+    """A copy of the artifacts with posterior arrays fitted on synthetic decisions."""
+    d = tmp_path_factory.mktemp("posterior")
+    for p in ART.iterdir():
+        if p.name == "arrays":
+            shutil.copytree(p, d / "arrays")
+        elif p.suffix in (".json", ".joblib", ".npz") and not p.name.startswith("online_"):
+            shutil.copy(p, d / p.name)
+    b = get_bundle(d, backend="joblib")
+    df = synthetic_decisions(3000, seed=5, meta=b.meta)
+    X = b.pre.transform(df[b.feature_cols])
+    for m in ("epa", "wpa"):
+        save_posterior(d, m, b.actions, X, df["action"].to_numpy(), df[m].to_numpy())
+    return get_bundle(d, backend="joblib")
+
+def test_arm_posteriors_match_ridge():
+    from sklearn.linear_model import Ridge
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(600, 6))
+    y = rng.choice(["a", "b", "c"], size=600, p=[0.45, 0.45, 0.1])
+    r = X @ rng.normal(size=6) + 0.7 * rng.normal(size=600)
+    rsq = np.array([np.sum(r[y == a] ** 2) for a in "abc"])
+    post = arm_posteriors(arm_stats(X, y, r, list("abc")), rsq, l2=5.0, min_n=80)
+    Xa, ra = X[y == "a"], r[y == "a"]
+    Xc = Xa - Xa.mean(axis=0)
+    M = Xc.T @ Xc + 5.0 * np.eye(6)
+    dof = np.trace(Xc @ np.linalg.solve(M, Xc.T))
+    s2 = np.sum((ra - Ridge(alpha=5.0).fit(Xa, ra).predict(Xa)) ** 2) / (len(ra) - 1 - dof)
+    np.testing.assert_allclose(post["sigma2"][0], s2, rtol=1e-10)
+    np.testing.assert_allclose(post["factor"][0] @ post["factor"][0].T, s2 * np.linalg.inv(M), atol=1e-12)
+    assert post["n"][2] < 80 and np.allclose(post["factor"][2], 0)     # constant arm
+    np.testing.assert_allclose(post["sigma2"][2], np.var(r[y == "c"], ddof=1))
+    # sampled spread of μ(x) matches σ²[(x - x̄)ᵀ M⁻¹ (x - x̄) + 1/n]
+    x = rng.normal(size=(3, 6)) - Xa.mean(axis=0)
+    dev = PosteriorSampler(**post, samples=40_000, seed=1).deviations(x + Xa.mean(axis=0))
+    var = s2 * (np.einsum("nd,de,ne->n", x, np.linalg.inv(M), x) + 1 / len(ra))
+    np.testing.assert_allclose(dev[:, 0].var(axis=1), var, rtol=0.05)
+
+def test_posterior_batch_and_thompson(bundle):
+    ctxs = [c for c in _variants() if "posteam" in c][:40]
+    out = posterior_batch(ctxs, "wpa", bundle, samples=2000)
+    mean, p = out["mean"], out["p_best"]
+    np.testing.assert_allclose(p.sum(axis=1), 1.0)
+    masked = mean <= -1e9
+    assert (p[masked] == 0).all() and (out["sd"][masked] == 0).all() and (out["sd"][~masked] > 0).all()
+    ok = ~np.isnan(out["delta"])
+    assert (out["delta_lo"][ok] <= out["delta"][ok]).all() and (out["delta"][ok] <= out["delta_hi"][ok]).all()
+    # the posterior-mean best action is the most likely best one
+    assert (p.argmax(axis=1) == mean.argmax(axis=1)).mean() > 0.9
+    one = posterior_context(ctxs[0], "wpa", bundle, samples=2000)
+    np.testing.assert_allclose(list(one["p_best"].values()), p[0])
+
+    P = thompson_policy(ctxs, "wpa", bundle, samples=2000)
+    np.testing.assert_array_equal(P, p)
+    rng = np.random.default_rng(2)
+    a_idx = rng.integers(0, 3, size=len(ctxs))
+    a_idx = np.where(masked[np.arange(len(ctxs)), a_idx], mean.argmax(axis=1), a_idx)
+    P_beh = np.full(mean.shape, 1 / 3)
+    table = evaluate({"thompson": P}, P_beh, np.where(masked, 0.0, mean), rng.normal(size=len(ctxs)), a_idx, B=50)
+    assert table.loc[0, "policy"] == "thompson" and np.isfinite(table.loc[0, "DR"])
+    acts = thompson_actions(ctxs, "wpa", bundle, seed=0, samples=2000)
+    idx = np.array([bundle.actions.index(a) for a in acts])
+    assert not masked[np.arange(len(ctxs)), idx].any()
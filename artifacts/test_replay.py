@@ -0,0 +1,53 @@
+import warnings
+import numpy as np
+import pandas as pd
+import pytest
+from inference import get_bundle, score_batch
+from replay import replay, replay_frame, team_totals
+from test_batch import _variants
+
+@pytest.fixture(scope="module")
+def decisions(tmp_path_factory):
+    rng = np.random.default_rng(11)
+    df = pd.DataFrame([c for c in _variants() if "posteam" in c])
+    df["season"] = rng.choice([2023, 2024], size=len(df))
+    df["week"] = rng.integers(1, 4, size=len(df))
+    df["posteam"] = rng.choice(["KC", "BUF", "GB"], size=len(df))
+    df["play_id"] = np.arange(len(df))
+    df["action"] = rng.choice(["go", "punt", "field goal", "qb_kneel"], size=len(df))
+    df.loc[0, ["action", "yardline_100", "ydstogo"]] = ["fg", 90, 10]    # out of field goal range
+    df["epa"] = rng.normal(size=len(df))
+    df["wpa"] = rng.normal(size=len(df)) * 0.05
+    path = tmp_path_factory.mktemp("replay") / "decisions.csv"
+    df.to_csv(path, index=False)
+    return path, df
+
+def test_replay_frame_gains(decisions):
+    _, df = decisions
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        plays = replay_frame(df, get_bundle(), policies=("greedy",))
+    kept = df.loc[df["action"] != "qb_kneel"].reset_index(drop=True)
+    assert len(plays) == len(kept) and plays["action"].isin(["fg", "go", "punt"]).all()
+    MU_epa, MU_wpa, rec = score_batch(kept, metric="wpa")
+    assert (plays["rec_wpa"].to_numpy() == rec).all()
+    a_idx = plays["action"].map({"fg": 0, "go": 1, "punt": 2}).to_numpy()
+    gain = MU_wpa.max(axis=1) - MU_wpa[np.arange(len(kept)), a_idx]
+    ok = ~plays["logged_masked"].to_numpy()
+    np.testing.assert_allclose(plays["gain_wpa"].to_numpy()[ok], gain[ok], rtol=1e-12)
+    assert (plays["gain_wpa"][ok] >= 0).all() and (plays["gain_wpa"][plays["agree_wpa"]] == 0).all()
+    assert plays.loc[0, "logged_masked"] and np.isnan(plays.loc[0, "gain_epa"])
+
+def test_parallel_replay_matches_serial(decisions, tmp_path):
+    path, df = decisions
+    with pytest.warns(UserWarning, match="LinUCB"):
+        serial = replay(path, tmp_path / "serial", workers=1)
+    par = replay(path, tmp_path / "par", workers=2, policies=("greedy",))
+    pd.testing.assert_frame_equal(serial, par)
+    plays = pd.read_csv(tmp_path / "par" / "replay_plays.csv")
+    assert list(plays["season"].unique()) == [2023, 2024]
+    assert serial["plays"].sum() == len(plays) == (df["action"] != "qb_kneel").sum()
+    assert serial.columns[:4].tolist() == ["season", "week", "posteam", "plays"]
+    tot = team_totals(serial, by=("posteam",))
+    np.testing.assert_allclose(tot["gain_wpa"].sum(), plays["gain_wpa"].sum(), rtol=1e-9)
+    np.testing.assert_allclose((tot["agree_epa"] * tot["plays"]).sum(), plays["agree_epa"].sum())
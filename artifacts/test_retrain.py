@@ -0,0 +1,60 @@
+import json
+import numpy as np
+import pytest
+from bench import synthetic_decisions
+from inference import get_bundle, linucb_batch, score_batch
+from posterior import posterior_batch
+from retrain import retrain, rolling_splits
+
+@pytest.fixture(scope="module")
+def decisions(tmp_path_factory):
+    df = synthetic_decisions(1500, seed=8)
+    df["season"] = np.random.default_rng(8).choice([2022, 2023, 2024], size=len(df))
+    df.loc[::40, "wpa"] = np.nan
+    path = tmp_path_factory.mktemp("retrain") / "decisions.csv"
+    df.to_csv(path, index=False)
+    return path
+
+def test_rolling_splits():
+    assert rolling_splits([2018, 2016, 2017, 2017]) == [([2016], 2017), ([2016, 2017], 2018)]
+    assert rolling_splits(range(2016, 2020), min_train_seasons=3) == [([2016, 2017, 2018], 2019)]
+
+def test_parallel_retrain_writes_loadable_split_artifacts(decisions, tmp_path):
+    par = retrain(decisions, tmp_path / "par", workers=2, cfg={"min_n": 20})
+    serial = retrain(decisions, tmp_path / "serial", workers=1, cfg={"min_n": 20})
+    assert par["eval_season"].tolist() == [2023, 2024] and par["n_train"].tolist()[0] < par["n_train"].tolist()[1]
+    cols = ["behavior_log_loss", "epa_rmse", "wpa_DR", "wpa_ESS"]
+    np.testing.assert_allclose(par[cols].to_numpy(), serial[cols].to_numpy(), rtol=1e-9)
+
+    split = par["dir"].iloc[-1]
+    meta = json.load(open(f"{split}/metadata.json"))
+    assert meta["split"]["train_seasons"] == [2022, 2023] and meta["split"]["eval_season"] == 2024
+    ctxs = synthetic_decisions(50, seed=9)
+    a = score_batch(ctxs, bundle=get_bundle(split, backend="joblib"))
+    b = score_batch(ctxs, bundle=get_bundle(split, backend="arrays"))
+    np.testing.assert_allclose(a[1], b[1], rtol=1e-8, atol=1e-10)
+    assert len(linucb_batch(ctxs, bundle=get_bundle(split, backend="arrays"))["recommended"]) == 50
+    p_best = posterior_batch(ctxs, bundle=get_bundle(split, backend="arrays"), samples=500)["p_best"]
+    np.testing.assert_allclose(p_best.sum(axis=1), 1.0)
+
+    # a second run finds every split done and refits nothing
+    mtime = (tmp_path / "par").glob("*/eval_2024/eval.json").__next__().stat().st_mtime_ns
+    again = retrain(decisions, tmp_path / "par", workers=2, cfg={"min_n": 20})
+    assert len(again) == 2
+    assert next((tmp_path / "par").glob("*/eval_2024/eval.json")).stat().st_mtime_ns == mtime
+
+def test_sparse_design_matches_dense(decisions, tmp_path):
+    dense = retrain(decisions, tmp_path / "d", workers=1, cfg={"min_n": 20}, seasons=[2023, 2024])
+    sparse = retrain(decisions, tmp_path / "s", workers=1, cfg={"min_n": 20, "sparse": True},
+                     seasons=[2023, 2024])
+    np.testing.assert_allclose(sparse[["epa_rmse", "wpa_rmse"]].to_numpy(),
+                               dense[["epa_rmse", "wpa_rmse"]].to_numpy(), rtol=1e-8)
+    np.testing.assert_allclose(sparse["behavior_log_loss"], dense["behavior_log_loss"], rtol=1e-4)
+    ctxs = synthetic_decisions(50, seed=10)
+    for backend in ("joblib", "arrays"):
+        a = score_batch(ctxs, bundle=get_bundle(dense["dir"].iloc[0], backend=backend))
+        b = score_batch(ctxs, bundle=get_bundle(sparse["dir"].iloc[0], backend=backend))
+        np.testing.assert_allclose(a[0], b[0], rtol=1e-7, atol=1e-9)
+    ucb = linucb_batch(ctxs, bundle=get_bundle(sparse["dir"].iloc[0], backend="joblib"))
+    ref = linucb_batch(ctxs, bundle=get_bundle(dense["dir"].iloc[0], backend="joblib"))
+    np.testing.assert_allclose(ucb["bonus"], ref["bonus"], rtol=1e-7)
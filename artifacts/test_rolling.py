@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+import pytest
+from pathlib import Path
+from rolling import Groups
+from features import add_epa_features, add_fatigue_features, fg_pct_wide, fg_week_rates
+from test_features import raw_pbp
+
+def _frame(n=3000, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({"a": rng.choice(["x", "y", "z", None], n, p=[0.4, 0.3, 0.25, 0.05]),
+                       "b": rng.integers(0, 7, n).astype(float),
+                       "v": rng.normal(size=n)})
+    df.loc[rng.random(n) < 0.1, "v"] = np.nan
+    df.loc[rng.random(n) < 0.02, "b"] = np.nan
+    return df
+
+@pytest.mark.parametrize("window,min_periods", [(4, 1), (16, 3)])
+def test_kernels_match_pandas_groupby(window, min_periods):
+    df = _frame()
+    g = Groups(df["a"], df["b"])
+    gb = df.groupby(["a", "b"])["v"]
+    np.testing.assert_array_equal(g.shift(df["v"]), gb.shift().to_numpy())
+    np.testing.assert_allclose(g.cumsum(df["v"]), gb.cumsum().to_numpy(), rtol=1e-12, atol=1e-12)
+    np.testing.assert_array_equal(g.cumcount(), df.groupby(["a", "b"]).cumcount().to_numpy())
+    ref = gb.transform(lambda s: s.shift().rolling(window, min_periods=min_periods).mean())
+    np.testing.assert_allclose(g.prev_rolling_mean(df["v"], window, min_periods), ref.to_numpy(),
+                               rtol=1e-12, atol=1e-14)
+
+def _fatigue_reference(pbp):
+    """The per-column groupby version from data_clean_2016_2024.ipynb."""
+    pbp = pbp.copy()
+    pbp["prev_gsr"] = pbp.groupby("game_id")["game_seconds_remaining"].shift(1)
+    pbp["play_elapsed_s"] = (pbp["prev_gsr"] - pbp["game_seconds_remaining"]).clip(lower=0).fillna(0)
+    pbp["def_team_prev"] = pbp.groupby("game_id")["defteam"].shift(1)
+    pbp["elapsed_prev_for_def"] = np.where(pbp["def_team_prev"] == pbp["defteam"], pbp["play_elapsed_s"], 0.0)
+    pbp["def_time_on_field_cum"] = pbp.groupby(["game_id", "defteam"])["elapsed_prev_for_def"].cumsum()
+    pbp["game_time_elapsed"] = pbp.groupby("game_id")["play_elapsed_s"].cumsum().astype(float)
+    den = pbp["game_time_elapsed"].to_numpy(dtype=float)
+    num = pbp["def_time_on_field_cum"].to_numpy(dtype=float)
+    pbp["def_time_on_field_share"] = np.divide(num, den, out=np.zeros_like(num), where=den > 0)
+    pbp["def_time_on_field_share"] = pbp["def_time_on_field_share"].fillna(0)
+    if "drive" in pbp.columns:
+        pbp["plays_in_drive_so_far"] = pbp.groupby(["game_id", "drive"]).cumcount() + 1
+    return pbp
+
+FATIGUE = ["play_elapsed_s", "game_time_elapsed", "def_time_on_field_cum", "def_time_on_field_share"]
+
+def test_fatigue_features_match_reference():
+    pbp = raw_pbp(seasons=(2024,), weeks=range(1, 4))
+    pbp = pbp.sample(frac=1, random_state=0).sort_values("play_id", kind="stable")   # games interleaved
+    got = add_fatigue_features(pbp.copy())
+    ref = _fatigue_reference(pbp)
+    for c in FATIGUE + ["plays_in_drive_so_far"]:
+        np.testing.assert_array_equal(got[c].to_numpy(float), ref[c].to_numpy(float), err_msg=c)
+
+PBP_CLEAN = Path(__file__).resolve().parent.parent / "data" / "pbp_clean_2016_2024.csv"
+
+@pytest.mark.skipif(not PBP_CLEAN.exists(), reason="needs data/pbp_clean_2016_2024.csv")
+def test_stored_2016_2024_features_reproduced():
+    df = pd.read_csv(PBP_CLEAN, low_memory=False)
+    base = df.drop(columns=["off_epa_4w", "def_epa_4w"] + FATIGUE)
+    got = add_fatigue_features(add_epa_features(base.assign(drive=0)))
+    for c in ["off_epa_4w", "def_epa_4w"] + FATIGUE:
+        np.testing.assert_allclose(got[c].to_numpy(float), df[c].to_numpy(float), rtol=1e-9, atol=1e-12,
+                                   err_msg=c)
+
+def test_fg_pct_matches_notebook_groupby():
+    df = raw_pbp(weeks=range(1, 10))
+    fg = df.loc[df["field_goal_attempt"] == 1, ["season", "posteam", "week", "kick_distance",
+                                                "field_goal_result"]].copy()
+    fg["fg_made"] = (fg["field_goal_result"] == "made").astype(int)
+    fg["dist_bin"] = pd.cut(fg["kick_distance"], bins=[0, 39, 49, 70], labels=["short", "mid", "long"],
+                            include_lowest=True)
+    fg_week = (fg.groupby(["season", "posteam", "week", "dist_bin"], observed=False)["fg_made"].mean()
+                 .reset_index().sort_values(["season", "posteam", "week"]))
+    fg_week["fg_pct"] = (fg_week.groupby(["season", "posteam", "dist_bin"], observed=False)["fg_made"]
+                                .transform(lambda s: s.shift().rolling(16, min_periods=3).mean()))
+    ref = (fg_week.pivot_table(index=["season", "posteam", "week"], columns="dist_bin", values="fg_pct",
+                               observed=False).add_prefix("fg_pct_").reset_index())
+    ref.columns.name = None
+
+    got = fg_pct_wide(fg_week_rates(df))
+    m = ref.merge(got, on=["season", "posteam", "week"], how="outer", suffixes=("", "_got"))
+    assert len(m) == len(ref) == len(got)
+    for c in ["fg_pct_short", "fg_pct_mid", "fg_pct_long"]:
+        np.testing.assert_allclose(m[c].to_numpy(float), m[c + "_got"].to_numpy(float), rtol=1e-12)
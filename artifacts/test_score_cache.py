@@ -0,0 +1,59 @@
+import time
+import numpy as np
+import score_cache
+from inference import score_batch, score_context
+from loadgen import random_contexts
+from score_cache import ScoreCache
+
+def test_cached_scores_match_and_metric_switch_is_a_hit():
+    contexts = random_contexts(50, seed=5)
+    cache = ScoreCache(maxsize=100)
+    MU_epa, MU_wpa, rec = cache.score_batch(contexts, metric="epa")
+    ref = score_batch(contexts, metric="epa")
+    np.testing.assert_allclose(MU_epa, ref[0], atol=1e-6)   # 6-decimal quantization
+    np.testing.assert_allclose(MU_wpa, ref[1], atol=1e-6)
+    assert (rec == ref[2]).all()
+    assert cache.stats()["misses"] == 50 and cache.stats()["hits"] == 0
+
+    _, _, rec_wpa = cache.score_batch(contexts, metric="wpa")
+    assert (rec_wpa == score_batch(contexts, metric="wpa")[2]).all()
+    epa, wpa, r, details = cache.score_context(contexts[3], metric="epa")
+    ref = score_context(contexts[3], metric="epa")
+    assert r == ref[2] and set(details) == {"epa", "wpa"} and list(epa) == list(ref[0])
+    assert cache.stats()["hits"] == 51 and cache.stats()["misses"] == 50
+
+def test_canonical_keys():
+    cache = ScoreCache()
+    cache._resolve()
+    ctx = random_contexts(1)[0]
+    key, _ = cache.canonical(ctx)
+    # noise below the quantum, padded strings and extra keys map to the same entry
+    same = {**ctx, "off_epa_4w": ctx["off_epa_4w"] + 1e-9, "posteam": f" {ctx['posteam']} ", "note": 1}
+    assert cache.canonical(same)[0] == key
+    assert cache.canonical({**ctx, "ydstogo": ctx["ydstogo"] + 1})[0] != key
+    # None and NaN score differently under the action constraints
+    assert cache.canonical({**ctx, "wind": None})[0] != cache.canonical({**ctx, "wind": float("nan")})[0]
+    MU, _, _ = cache.score_batch([{**ctx, "yardline_100": None}, {**ctx, "yardline_100": float("nan")}])
+    ref, _, _ = score_batch([{**ctx, "yardline_100": None}, {**ctx, "yardline_100": float("nan")}])
+    np.testing.assert_allclose(MU, ref, rtol=1e-5)
+
+def test_lru_eviction_ttl_and_invalidation(monkeypatch):
+    contexts = random_contexts(6, seed=2)
+    cache = ScoreCache(maxsize=4, ttl=60)
+    cache.score_batch(contexts[:4])
+    cache.score_batch(contexts[:1])                    # refresh 0: 1 is now the oldest
+    cache.score_batch(contexts[4:5])
+    s = cache.stats()
+    assert (s["evictions"], s["size"], s["hits"]) == (1, 4, 1)
+    cache.score_batch(contexts[:1] + contexts[1:2])
+    assert cache.stats()["hits"] == 2 and cache.stats()["misses"] == 6
+
+    now = time.monotonic()
+    monkeypatch.setattr(score_cache.time, "monotonic", lambda: now + 120)
+    cache.score_batch(contexts[:1])
+    assert cache.stats()["expired"] == 1
+
+    cache._bundle = object()                           # as if get_bundle() returned a new bundle
+    cache.score_batch(contexts[:1])
+    s = cache.stats()
+    assert s["invalidations"] == 1 and s["size"] == 1 and s["misses"] == 8
@@ -0,0 +1,82 @@
+import asyncio
+import numpy as np
+from inference import get_bundle, score_batch
+from loadgen import random_contexts, request, run_load
+from service import ScoringService
+
+def _serve(test, **kw):
+    async def main():
+        service = ScoringService(**kw)
+        await service.start("127.0.0.1", 0)
+        try:
+            return await test(service)
+        finally:
+            await service.stop()
+    return asyncio.run(main())
+
+def test_micro_batched_responses_match_score_batch():
+    contexts = random_contexts(60, seed=3)
+
+    async def test(service):
+        async def one(ctx, metric):
+            reader, writer = await asyncio.open_connection("127.0.0.1", service.port)
+            try:
+                return await request(reader, writer, "POST", "/score", {"context": ctx, "metric": metric})
+            finally:
+                writer.close()
+        got = await asyncio.gather(*(one(c, "epa" if i % 3 else "wpa") for i, c in enumerate(contexts)))
+        reader, writer = await asyncio.open_connection("127.0.0.1", service.port)
+        batch = await request(reader, writer, "POST", "/score_batch", {"contexts": contexts, "metric": "epa"})
+        health = await request(reader, writer, "GET", "/healthz")
+        writer.close()
+        return got, batch, health
+
+    got, batch, health = _serve(test, window_ms=20)
+    b = get_bundle(backend=health[1]["backend"])
+    MU_epa, MU_wpa, _ = score_batch(contexts, bundle=b)
+    rec_epa = score_batch(contexts, metric="epa", bundle=b)[2]
+    rec_wpa = score_batch(contexts, metric="wpa", bundle=b)[2]
+    for i, (status, out) in enumerate(got):
+        assert status == 200
+        assert out["recommended"] == (rec_epa[i] if i % 3 else rec_wpa[i])
+        np.testing.assert_allclose([out["epa"][a] for a in b.actions], MU_epa[i], rtol=1e-12)
+        np.testing.assert_allclose([out["wpa"][a] for a in b.actions], MU_wpa[i], rtol=1e-12)
+    assert batch[0] == 200 and batch[1]["recommended"] == list(rec_epa)
+    np.testing.assert_allclose(batch[1]["wpa"], MU_wpa, rtol=1e-12)
+    status, h = health
+    assert status == 200 and h["status"] == "ok" and h["requests"] == 61
+    assert h["batches"] < 10                     # concurrent requests shared scoring calls
+
+def test_errors_and_backpressure():
+    async def test(service):
+        reader, writer = await asyncio.open_connection("127.0.0.1", service.port)
+        out = [await request(reader, writer, "GET", "/nope"),
+               await request(reader, writer, "GET", "/score"),
+               await request(reader, writer, "POST", "/score", {"context": 3}),
+               await request(reader, writer, "POST", "/score", {"context": {}, "metric": "yards"}),
+               await request(reader, writer, "POST", "/score_batch", {"contexts": random_contexts(8)}),
+               # the shipped artifacts have no LinUCB factors: the server's limitation, not bad input
+               await request(reader, writer, "POST", "/score", {"context": {}, "policy": "linucb"})]
+        # after errors the connection still serves
+        out.append(await request(reader, writer, "POST", "/score", {"context": random_contexts(1)[0]}))
+        writer.close()
+        return out, await run_load(port=service.port, connections=16, requests=200)
+
+    out, load = _serve(test, max_pending=4)
+    assert [s for s, _ in out] == [404, 405, 400, 400, 413, 501, 200]
+    assert "at most 4" in out[4][1]["error"]
+    assert load["status"].get(503, 0) > 0 and load["requests"] == 200
+
+def test_server_failures_are_not_bad_requests():
+    async def test(service):
+        def broken(*args):
+            raise FileNotFoundError("arrays/ went away")
+        service._score = broken
+        reader, writer = await asyncio.open_connection("127.0.0.1", service.port)
+        out = await request(reader, writer, "POST", "/score_batch", {"contexts": random_contexts(3)})
+        writer.close()
+        return out, service.counters
+
+    (status, body), counters = _serve(test)
+    assert status == 503 and "arrays/ went away" in body["error"]
+    assert counters["errors"] == 1 and counters["batches"] == 0
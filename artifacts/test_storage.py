@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+from storage import load_table, parquet_path, write_parquet
+from test_batch import _variants
+
+pytest.importorskip("pyarrow")
+
+@pytest.fixture()
+def table(tmp_path):
+    rng = np.random.default_rng(9)
+    df = pd.DataFrame(_variants())
+    df["season"] = rng.choice([2022, 2023, 2024], size=len(df))
+    df["week"] = rng.integers(1, 19, size=len(df))
+    df["game_id"] = [f"{s}_{w:02d}_X" for s, w in zip(df["season"], df["week"])]
+    df["epa"] = rng.normal(size=len(df))
+    df.loc[5, "epa"] = np.nan
+    path = tmp_path / "decisions.csv"
+    df.to_csv(path, index=False)
+    return path, pd.read_csv(path)
+
+def _same(a, b):
+    assert list(a.columns) == list(b.columns) and len(a) == len(b)
+    for c in a.columns:
+        x, y = a[c], b[c]
+        if not pd.api.types.is_numeric_dtype(x):
+            assert (x.astype(str) == y.astype(str)).all(), c
+        else:
+            np.testing.assert_allclose(x.to_numpy(float), y.to_numpy(float), rtol=1e-6, err_msg=c)
+
+@pytest.mark.parametrize("by_week", [False, True])
+def test_roundtrip_projection_and_pruning(table, by_week):
+    path, csv = table
+    write_parquet(csv, parquet_path(path), by_week=by_week)
+    key = ["season", "week", "game_seconds_remaining", "epa"]
+    full = load_table(path)
+    _same(full.sort_values(key).reset_index(drop=True), csv.sort_values(key).reset_index(drop=True))
+    assert full["posteam"].dtype == "category" and full["season"].dtype == np.int16
+
+    cols = ["posteam", "yardline_100", "epa", "season"]
+    got = load_table(path, columns=cols, seasons=2024, weeks=[1, 2, 3])
+    ref = csv.loc[(csv["season"] == 2024) & csv["week"].isin([1, 2, 3]), cols]
+    assert list(got.columns) == cols
+    _same(got.sort_values(cols).reset_index(drop=True), ref.sort_values(cols).reset_index(drop=True))
+
+def test_csv_fallback_matches_parquet(table):
+    path, csv = table
+    from_csv = load_table(path, columns=["season", "posteam", "epa"], seasons=[2023])
+    write_parquet(csv, parquet_path(path))
+    from_pq = load_table(path, columns=["season", "posteam", "epa"], seasons=[2023])
+    assert dict(from_csv.dtypes) == dict(from_pq.dtypes)
+    _same(from_csv.sort_values(["posteam", "epa"]).reset_index(drop=True),
+          from_pq.sort_values(["posteam", "epa"]).reset_index(drop=True))
+
+def test_rewrite_replaces_only_its_partitions(table):
+    path, csv = table
+    root = parquet_path(path)
+    write_parquet(csv, root)
+    write_parquet(csv.loc[csv["season"] == 2024].head(10), root)
+    got = load_table(path, columns=["season"])
+    counts = got["season"].value_counts()
+    assert counts[2024] == 10
+    assert counts[2023] == (csv["season"] == 2023).sum()
@@ -0,0 +1,64 @@
+import asyncio
+import io
+import json
+import numpy as np
+import pytest
+from bench import synthetic_pbp
+from features import clean_pbp
+from inference import get_bundle, score_context_fast
+from stream import GameState, ReplaySource, StreamScorer, jsonl_source, run
+
+@pytest.fixture(scope="module")
+def pbp():
+    return synthetic_pbp(seasons=(2024,), weeks=[1], games=3, plays=120)
+
+def test_game_state_matches_clean_pbp(pbp):
+    clean = clean_pbp(pbp.copy())
+    states = {}
+    feats = [states.setdefault(ev["game_id"], GameState(ev["game_id"])).update(ev)
+             for ev in pbp.astype(object).where(pbp.notna(), None).to_dict("records")]
+    for c in ["plays_in_drive_so_far", "def_time_on_field_cum", "def_time_on_field_share"]:
+        np.testing.assert_allclose([f[c] for f in feats], clean[c].to_numpy(float), rtol=1e-12)
+
+def test_replay_scores_every_fourth_down(pbp):
+    scorer = StreamScorer(get_bundle())
+    recs = []
+    summary = asyncio.run(run(ReplaySource(pbp, copies=2), scorer, recs.append))
+    assert summary["decisions"] == len(recs) == 2 * int((pbp["down"] == 4).sum())
+    assert summary["games"] == 6 and summary["active_games"] == 0
+    assert {r["game_id"] for r in recs} >= {g + "#1" for g in pbp["game_id"].unique()}
+    r = recs[0]
+    ev = pbp.loc[(pbp["game_id"] == r["game_id"]) & (pbp["play_id"] == r["play_id"])].iloc[0]
+    assert r["logged"] == {"run": "go", "pass": "go", "punt": "punt", "field_goal": "fg"}[ev["play_type"]]
+    assert r["score_differential"] == ev["score_differential"] and r["latency_ms"] >= 0
+    # the same context scored directly gives the same recommendation
+    g = GameState(r["game_id"])
+    for e in pbp.loc[pbp["game_id"] == r["game_id"]].to_dict("records"):
+        feats = g.update(e)
+        if e["play_id"] == r["play_id"]:
+            break
+    epa, wpa, rec, _ = score_context_fast(scorer.context(g, e, feats))
+    assert rec == r["recommended"] and wpa == r["wpa"] and epa == r["epa"]
+
+def test_jsonl_carries_score_and_timeouts_forward():
+    base = {"game_id": "g", "season": 2024, "week": 1, "home_team": "KC", "away_team": "BUF",
+            "roof": "outdoors", "surface": "grass", "qtr": 2, "drive": 3}
+    events = [
+        {**base, "play_id": 1, "down": 1, "posteam": "KC", "defteam": "BUF", "posteam_type": "home",
+         "score_differential": 7, "home_timeouts_remaining": 3, "away_timeouts_remaining": 2,
+         "game_seconds_remaining": 2000, "yardline_100": 60, "ydstogo": 10},
+        {**base, "play_id": 2, "down": 4, "posteam": "BUF", "defteam": "KC", "posteam_type": "away",
+         "drive": 4, "game_seconds_remaining": 1980, "yardline_100": 45, "ydstogo": 2},
+        {"game_id": "g", "event": "end"},
+    ]
+    f = io.StringIO("\n".join(json.dumps(e) for e in events) + "\n")
+    scorer = StreamScorer(get_bundle())
+    recs = []
+    asyncio.run(run(jsonl_source(f), scorer, recs.append))
+    assert len(recs) == 1 and recs[0]["score_differential"] == -7.0
+    g = GameState("g")
+    g.update(events[0])
+    ctx = scorer.context(g, events[1], g.update(events[1]))
+    assert ctx["posteam_timeouts_remaining"] == 2 and ctx["defteam_timeouts_remaining"] == 3
+    assert ctx["plays_in_drive_so_far"] == 1 and ctx["def_time_on_field_cum"] == 0.0
+    assert scorer.summary()["active_games"] == 0
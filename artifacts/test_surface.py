@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+from inference import score_batch
+from surface import AXES, DecisionSurfaces, accuracy_report, situation_frame
+
+BASE = {"posteam": "KC", "defteam": "BUF", "home_team": "KC", "away_team": "BUF",
+        "posteam_type": "home", "roof": "outdoors", "surface": "grass", "temp": 40.0, "wind": 16.0,
+        "off_epa_4w": 0.1, "def_epa_4w": -0.05, "punt_net_4w": 41.0}
+SMALL = {**AXES, "yardline_100": np.arange(1, 61)}
+
+@pytest.fixture(scope="module")
+def surfaces():
+    return DecisionSurfaces.build([BASE, {**BASE, "posteam": "BUF", "roof": "dome"}],
+                                  labels=["KC", "BUF"], axes=SMALL)
+
+def _live(base, *sit):
+    MU_epa, MU_wpa, rec = score_batch(situation_frame(base, *[np.atleast_1d(v) for v in sit]))
+    return np.hstack([MU_epa, MU_wpa]), rec
+
+def test_table_matches_live_scoring(surfaces, tmp_path):
+    surfaces = DecisionSurfaces.load(surfaces.save(tmp_path / "s.npz"))
+    assert surfaces.labels == ["KC", "BUF"] and surfaces.bases[1]["roof"] == "dome"
+    rng = np.random.default_rng(0)
+    n = 500
+    sit = [rng.integers(1, 61, n), rng.integers(1, 21, n).astype(float), rng.integers(-21, 22, n),
+           rng.integers(1, 5, n), rng.integers(0, 901, n)]
+    for e, base in enumerate(surfaces.bases):
+        T_epa, T_wpa, T_rec, live = surfaces.lookup_many(e, *sit)
+        L, L_rec = _live(base, *sit)
+        T = np.hstack([T_epa, T_wpa])
+        assert ((T <= -1e8) == (L <= -1e8)).all()
+        np.testing.assert_allclose(np.where(L <= -1e8, 0, T), np.where(L <= -1e8, 0, L), atol=1e-3)
+        assert (T_rec == L_rec).mean() > 0.99 and (~live).mean() > 0.9
+
+    # on a node the stored cell and pick are returned as is
+    epa, wpa, rec, details = surfaces.lookup("KC", 40, 4, -3, 3, 600)
+    L, L_rec = _live(BASE, 40, 4, -3, 3, 600)
+    assert details["source"] == "table" and rec == L_rec[0]
+    np.testing.assert_allclose(list(epa.values()) + list(wpa.values()), L[0], rtol=1e-5, atol=1e-7)
+
+@pytest.mark.parametrize("sit", [(40, 25, 0, 2, 450),     # ydstogo past the grid
+                                 (70, 4, 0, 2, 450),      # yardline past this table
+                                 (40, 4, 0, 5, 450),      # overtime
+                                 (45, 4, -2, 4, 200),     # punt mask changes inside the cell
+                                 (9, 9, 0, 1, 600)])      # goal_to_go changes inside the cell
+def test_off_grid_falls_back_to_live(surfaces, sit):
+    epa, wpa, rec, details = surfaces.lookup("KC", *sit)
+    L, L_rec = _live(BASE, *sit)
+    assert details["source"] == "live" and rec == L_rec[0]
+    np.testing.assert_allclose(list(epa.values()) + list(wpa.values()), L[0])
+
+def test_accuracy_report(surfaces):
+    rep = accuracy_report(surfaces, n=300)
+    assert rep["cells_per_surface"] == 60 * 10 * 9 * 4 * 4 and rep["bytes"] == surfaces.nbytes
+    assert rep["max_abs_err_nodes"] < 1e-5 and rep["max_abs_err_between"] < 1e-3
+    assert rep["masks_match_nodes"] and rep["masks_match_between"]
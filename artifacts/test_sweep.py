@@ -0,0 +1,110 @@
+import json
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import pytest
+from sweep import expand_grid, run_sweep
+from test_batch import _variants
+
+GRID = {"target": ["epa", "wpa"], "season": [None, 2024], "policy": ["greedy", "eps", "linucb"],
+        "eps": [0.05, 0.2], "alpha": [0.8], "lambda_ucb": [5.0], "l2": [5.0], "min_n": [20],
+        "bootstrap": 50}
+
+@pytest.fixture(scope="module")
+def decisions(tmp_path_factory):
+    rng = np.random.default_rng(4)
+    df = pd.DataFrame(_variants())
+    df["action"] = rng.choice(["go", "punt", "field goal"], size=len(df))
+    df["season"] = rng.choice([2023, 2024], size=len(df))
+    df["epa"] = rng.normal(size=len(df))
+    df["wpa"] = rng.normal(size=len(df)) * 0.05
+    df.loc[3, "wpa"] = np.nan
+    path = tmp_path_factory.mktemp("sweep") / "decisions.csv"
+    df.to_csv(path, index=False)
+    return path
+
+def test_expand_grid_drops_unused_keys():
+    cfgs = expand_grid(GRID)
+    # greedy/linucb don't multiply over eps
+    assert len(cfgs) == 2 * 2 * (1 + 2 + 1)
+    assert len({c["config_id"] for c in cfgs}) == len(cfgs)
+    assert all(c["eps"] is None for c in cfgs if c["policy"] != "eps")
+
+def test_parallel_matches_serial_and_resumes(decisions, tmp_path):
+    serial = run_sweep(GRID, decisions, tmp_path / "serial.csv", workers=1)
+    par_out = tmp_path / "par.csv"
+    par = run_sweep(GRID, decisions, par_out, workers=2)
+    assert len(par) == len(serial) == 16 and par["config_id"].is_unique
+    cols = ["DM", "IPS", "SNIPS", "DR", "ESS", "DR_lo", "DR_hi"]
+    a = serial.set_index("config_id").sort_index()[cols]
+    b = par.set_index("config_id").sort_index()[cols]
+    np.testing.assert_allclose(a.to_numpy(), b.to_numpy(), rtol=1e-9)
+
+    # interrupted after 10 configs: only the rest are evaluated
+    lines = par_out.read_text().splitlines(keepends=True)
+    par_out.write_text("".join(lines[:11]) + lines[11][:20])   # last row cut mid-write
+    resumed = run_sweep(GRID, decisions, par_out, workers=1)
+    assert len(resumed) == 16 and resumed["config_id"].is_unique
+    r = resumed.set_index("config_id").sort_index()[cols]
+    np.testing.assert_allclose(r.to_numpy(), a.to_numpy(), rtol=1e-9)
+
+def test_sparse_design_matches_dense(decisions, tmp_path):
+    grid = {**GRID, "target": ["wpa"], "season": [None], "eps": [0.1]}
+    dense = run_sweep(grid, decisions, tmp_path / "dense.csv", workers=1)
+    sparse = run_sweep(grid, decisions, tmp_path / "sparse.csv", workers=1, sparse=True)
+    assert sorted((tmp_path / "sparse_cache").glob("X*.npy"))[0].name == "X_data.npy"
+    cols = ["DM", "IPS", "SNIPS", "DR", "ESS", "DR_lo", "DR_hi"]
+    a = dense.set_index("config_id").sort_index()[cols]
+    b = sparse.set_index("config_id").sort_index()[cols]
+    np.testing.assert_allclose(a.to_numpy(), b.to_numpy(), rtol=1e-8)
+
+def test_cache_and_resume_follow_the_team_store(decisions, tmp_path):
+    from team_store import TeamWeekStore
+    grid = {**GRID, "target": ["epa"], "season": [None], "policy": ["greedy"]}
+    dec = pd.read_csv(decisions).assign(week=1)
+    decisions = tmp_path / "decisions.csv"
+    dec.to_csv(decisions, index=False)
+    dec[["off_epa_4w", "def_epa_4w", "punt_net_4w"]] = 0.4, -0.3, 30.0
+    store_path = TeamWeekStore.from_decisions(dec).save(tmp_path / "tw.npz")
+    out, cache = tmp_path / "res.csv", tmp_path / "cache"
+
+    plain = run_sweep(grid, decisions, out, workers=1, cache_dir=cache)
+    stored = run_sweep(grid, decisions, out, workers=1, cache_dir=cache, team_store=store_path)
+    fresh = run_sweep(grid, decisions, tmp_path / "fresh.csv", workers=1, cache_dir=tmp_path / "fresh",
+                      team_store=store_path)
+    # the store's config is a new result, computed from arrays re-encoded with the store
+    assert len(stored) == 2 and stored["team_store"].isna().sum() == 1
+    row = stored.loc[stored["team_store"].notna()].iloc[0]
+    assert row["team_store"].startswith("tw.npz@") and row["config_id"] == fresh["config_id"].iloc[0]
+    assert row["DM"] == pytest.approx(fresh["DM"].iloc[0], rel=1e-12)
+    assert row["DM"] != pytest.approx(plain["DM"].iloc[0], rel=1e-6)
+    assert json.loads((cache / "meta.json").read_text())["key"]["team_store"][0] == str(store_path.resolve())
+
+def test_cache_follows_the_artifact_bundle(decisions, tmp_path):
+    import os
+    import shutil
+    from inference import ART
+    art = tmp_path / "art"
+    shutil.copytree(ART, art, ignore=shutil.ignore_patterns("*.py", "__pycache__"))
+    grid = {**GRID, "target": ["epa"], "season": [None], "policy": ["greedy"]}
+    cache = tmp_path / "cache"
+    bundle_dir = lambda: json.loads((cache / "meta.json").read_text())["key"]["bundle"]
+
+    run_sweep(grid, decisions, tmp_path / "a.csv", workers=1, cache_dir=cache, art_dir=art)
+    assert bundle_dir()[0] == str(art.resolve())
+    run_sweep(grid, decisions, tmp_path / "b.csv", workers=1, cache_dir=cache)
+    assert bundle_dir()[0] == str(Path(ART).resolve())
+    # re-exported artifacts in the same directory are re-encoded too
+    run_sweep(grid, decisions, tmp_path / "c.csv", workers=1, cache_dir=cache, art_dir=art)
+    before = bundle_dir()
+    st = os.stat(art / "fused_weights.npz")
+    os.utime(art / "fused_weights.npz", ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    run_sweep(grid, decisions, tmp_path / "d.csv", workers=1, cache_dir=cache, art_dir=art)
+    assert bundle_dir()[0] == before[0] and bundle_dir()[1] != before[1]
+
+def test_empty_results_file_gets_a_header(decisions, tmp_path):
+    out = tmp_path / "res.csv"
+    out.touch()
+    grid = {**GRID, "target": ["epa"], "season": [None], "policy": ["greedy", "eps"], "eps": [0.1]}
+    res = run_sweep(grid, decisions, out, workers=1)
+    assert len(res) == 2 and out.read_text().startswith("config_id,")
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+from features import build_features, data_paths, stream_build
+from inference import score_batch
+from team_store import DEFAULTS, TEAM_COLS, TeamWeekStore, store_path
+from test_features import raw_pbp
+
+@pytest.fixture(scope="module")
+def decisions():
+    return build_features(raw_pbp())[1]
+
+def _app_reference(dec):
+    """The app's former per-rerun aggregation (groupby mean + defaults, exact match or defaults)."""
+    feats = dec.groupby(["season", "week", "posteam"])[TEAM_COLS].mean().fillna(DEFAULTS)
+    return feats
+
+def test_lookup_matches_groupby_and_falls_back(decisions, tmp_path):
+    store = TeamWeekStore.from_decisions(decisions)
+    store = TeamWeekStore.load(store.save(tmp_path / "team_week.npz"))
+    ref = _app_reference(decisions)
+    seasons, weeks, teams = (ref.index.get_level_values(i) for i in range(3))
+    got = store.lookup_many(seasons, weeks, [t.lower() + " " for t in teams])
+    np.testing.assert_allclose(got, ref.to_numpy(float), rtol=1e-12)
+
+    # a bye week reads the team's latest earlier week of the same season
+    played = set(zip(seasons, weeks, teams))
+    season, week, team = next((s, w + 1, t) for s, w, t in sorted(played)
+                              if w < 7 and (s, w + 1, t) not in played)
+    prev = max(w for s, w, t in played if s == season and t == team and w < week)
+    assert store.lookup(season, week, team) == store.lookup(season, prev, team)
+    # after the last stored season: the end of that season; unknown team / earlier season: defaults
+    last = store.lookup(2025, 1, "KC")
+    assert last == store.lookup(2024, 18, "KC") == store.lookup(2024, 7, "KC")
+    assert store.lookup(2024, 3, "XXX") == DEFAULTS == store.lookup(2015, 3, "KC")
+    assert store.lookup(2024, 0, "KC") == DEFAULTS
+
+def test_attach_feeds_batch_scoring(decisions):
+    store = TeamWeekStore.from_decisions(decisions)
+    ctx = decisions.head(50).reset_index(drop=True)
+    blank = ctx.drop(columns=TEAM_COLS)
+    a = score_batch(ctx.assign(**{c: store.attach(ctx)[c] for c in TEAM_COLS}))
+    b = score_batch(blank, team_store=store)
+    np.testing.assert_allclose(a[0], b[0])
+    np.testing.assert_allclose(a[1], b[1])
+    assert (a[2] == b[2]).all()
+
+def test_builds_write_the_store(tmp_path):
+    pbp = raw_pbp(seasons=(2024,), weeks=range(1, 5))
+    stream_build([pbp], tmp_path)
+    paths = data_paths(tmp_path)
+    assert paths["team_store"] == store_path(paths["decisions"]) and paths["team_store"].exists()
+    store = TeamWeekStore.load_or_build(paths["decisions"])
+    assert list(store.seasons) == [2024] and store.max_week == 4
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+from inference import ACTIONS, score_batch, score_context
+from thresholds import go_thresholds
+
+CTX = {"posteam": "KC", "defteam": "BUF", "home_team": "KC", "away_team": "BUF", "roof": "outdoors",
+       "temp": 40.0, "wind": 5.0, "qtr": 2, "game_seconds_remaining": 2000}
+
+@pytest.fixture(scope="module")
+def table():
+    return go_thresholds(CTX, metric="epa", score_differential=[-7, 0], game_seconds_remaining=[2000, 200])
+
+def test_boundary_matches_brute_force(table):
+    assert len(table) == 2 * 2 * 99
+    assert list(table.columns[:3]) == ["score_differential", "game_seconds_remaining", "yardline_100"]
+    for _, r in table.sample(40, random_state=1).iterrows():
+        ctx = {**CTX, "score_differential": r.score_differential,
+               "game_seconds_remaining": r.game_seconds_remaining, "yardline_100": int(r.yardline_100)}
+        k, flip = 0, None
+        for ytg in range(1, min(20, int(r.yardline_100)) + 1):
+            c = {**ctx, "ydstogo": ytg, "goal_to_go": int(r.yardline_100 <= 10 and ytg >= r.yardline_100)}
+            rec = score_context(c, metric="epa")[2]
+            if rec != "go":
+                flip = rec
+                break
+            k = ytg
+        assert (k, flip) == (r.go_max_ytg, r.flips_to)
+
+def test_break_even_is_the_root(table):
+    rows = table.loc[table["break_even_ytg"].notna()]
+    assert len(rows.loc[rows["yardline_100"] <= 10]) and len(rows.loc[rows["yardline_100"] > 30])
+    assert ((rows["break_even_ytg"] >= rows["go_max_ytg"]) & (rows["break_even_ytg"] <= rows["go_max_ytg"] + 1)).all()
+    # goal_to_go is the same at both ends of a segment with a root
+    gtg = ((rows["yardline_100"] <= 10) & (rows["go_max_ytg"] >= rows["yardline_100"])).astype(int)
+    frame = rows.assign(**{k: v for k, v in CTX.items() if k not in rows.columns},
+                        ydstogo=rows["break_even_ytg"], goal_to_go=gtg)
+    MU_epa, _, _ = score_batch(frame.reset_index(drop=True))
+    alt = [ACTIONS.index(a) for a in rows["flips_to"]]
+    gap = MU_epa[:, ACTIONS.index("go")] - MU_epa[np.arange(len(rows)), alt]
+    np.testing.assert_allclose(gap, 0, atol=1e-9)
+
+def test_no_break_even_across_goal_to_go(table):
+    # GO -> FG at ydstogo = yardline_100 inside the 10: goal_to_go switches on at the flip
+    at_goal = table.loc[(table["yardline_100"] <= 10) & table["flips_to"].notna() & (table["go_max_ytg"] >= 1)
+                        & (table["go_max_ytg"] + 1 == table["yardline_100"])]
+    assert len(at_goal) and at_goal["break_even_ytg"].isna().all()
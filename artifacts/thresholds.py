@@ -0,0 +1,103 @@
+"""
+Break-even "go" thresholds: up to which yards-to-go the pick stays GO, per yardline.
+
+For a fixed context, every (yardline_100, ydstogo) pair with ydstogo <= min(max_ytg,
+yardline_100) is scored in one score_batch call (FG range and punt rules applied,
+goal_to_go derived like the app). For each yardline:
+
+    go_max_ytg      largest ydstogo such that GO is the pick at every distance 1..ydstogo
+                    (0 when GO is not the pick at 4th-and-1)
+    flips_to        the pick one yard further (None if GO holds up to the cap)
+    break_even_ytg  where μ̂_go = μ̂_flips_to between go_max_ytg and go_max_ytg + 1; the arms
+                    are linear in ydstogo, so this is the exact root of the two lines (NaN
+                    when the flip comes from a rule, e.g. punting allowed again past 5 to go,
+                    or from goal_to_go switching on at ydstogo = yardline_100)
+    margin_1        μ̂_go - best other feasible action at 4th-and-1 (inf if none is feasible)
+
+Extra keyword lists (score_differential=[-7, 0, 7], game_seconds_remaining=[...]) repeat
+the table per combination, still in one pass; their columns lead the result.
+
+    from artifacts.thresholds import go_thresholds
+    tbl = go_thresholds(context, metric="wpa", score_differential=[-7, 0, 7])
+"""
+import itertools
+import numpy as np
+
+try:
+    from .inference import get_bundle, score_batch
+except ImportError:  # run as a script from artifacts/
+    from inference import get_bundle, score_batch
+
+MASKED = -1e8
+
+
+def go_thresholds(context: dict, metric: str = "wpa", max_ytg: int = 20, yardlines=range(1, 100),
+                  bundle=None, **buckets):
+    """Boundary table (one row per bucket combination and yardline), see the module docstring."""
+    import pandas as pd
+
+    b = bundle or get_bundle()
+    actions = b.actions
+    if "go" not in actions:
+        raise ValueError(f"No 'go' action in {actions}")
+    j_go = actions.index("go")
+    yardlines = np.asarray(list(yardlines), dtype=int)
+    ytg = np.arange(1, max_ytg + 1)
+    names = list(buckets)
+    combos = list(itertools.product(*buckets.values())) or [()]
+    n_y, n_t = len(yardlines), len(ytg)
+
+    # rows: combination x yardline x ydstogo
+    yd = np.tile(np.repeat(yardlines, n_t), len(combos))
+    t = np.tile(ytg, len(combos) * n_y)
+    frame = pd.DataFrame({k: [v] * len(yd) for k, v in context.items()})
+    for i, name in enumerate(names):
+        frame[name] = np.repeat([c[i] for c in combos], n_y * n_t)
+    frame["yardline_100"] = yd
+    frame["ydstogo"] = t
+    gtg = ((yd <= 10) & (t >= yd)).astype(int)
+    frame["goal_to_go"] = gtg
+
+    MU_epa, MU_wpa, _ = score_batch(frame, metric=metric, bundle=b)
+    MU = (MU_wpa if metric.lower() == "wpa" else MU_epa).reshape(len(combos) * n_y, n_t, -1)
+    reach = (t <= yd).reshape(len(combos) * n_y, n_t)          # can't need more yards than the goal line
+    gtg = gtg.reshape(len(combos) * n_y, n_t)
+
+    go = MU[..., j_go]
+    other = MU.copy()
+    other[..., j_go] = -np.inf
+    best_other = other.max(axis=2)
+    alt = other.argmax(axis=2)
+    is_go = (go >= best_other) & (go > MASKED) & reach
+    # GO at every distance 1..k: count the leading run of True
+    k = np.where(is_go.all(axis=1), n_t, np.argmin(is_go, axis=1))
+    k = np.minimum(k, reach.sum(axis=1))
+
+    rows = np.arange(len(k))
+    nxt = np.minimum(k, n_t - 1)                                # index of ydstogo k + 1
+    flips = (k < reach.sum(axis=1))
+    flips_to = np.where(flips, np.asarray(actions, dtype=object)[alt[rows, nxt]], None)
+    # exact root of μ_go - μ_alt between k and k + 1 (both lines, same masks and goal_to_go
+    # on the segment; otherwise k and k + 1 lie on different lines and there is no root)
+    be = np.full(len(k), np.nan)
+    has = flips & (k >= 1)
+    if has.any():
+        r, i = rows[has], k[has] - 1
+        a = alt[r, i + 1]
+        d0 = go[r, i] - MU[r, i, a]
+        d1 = go[r, i + 1] - MU[r, i + 1, a]
+        lin = ((MU[r, i, a] > MASKED) & (MU[r, i + 1, a] > MASKED) & (gtg[r, i] == gtg[r, i + 1])
+               & (d0 != d1))
+        be[r[lin]] = ytg[i[lin]] + d0[lin] / (d0[lin] - d1[lin])
+
+    out = pd.DataFrame({
+        "yardline_100": np.tile(yardlines, len(combos)),
+        "go_max_ytg": k,
+        "flips_to": flips_to,
+        "break_even_ytg": be,
+        "margin_1": np.where(~reach[:, 0], np.nan,
+                             np.where(best_other[:, 0] > MASKED, go[:, 0] - best_other[:, 0], np.inf)),
+    })
+    for i, name in reversed(list(enumerate(names))):
+        out.insert(0, name, np.repeat([c[i] for c in combos], n_y))
+    return out